@@ -13,6 +13,48 @@ router.get('/', async (req, res, next) => {
   }
 });
 
+router.get('/facets', async (req, res, next) => {
+  try {
+    const facets = await productService.getFacets(req.query);
+    res.json({ data: facets });
+  } catch (error) {
+    next(error);
+  }
+});
+
+router.get('/suggest', async (req, res, next) => {
+  try {
+    const suggestions = await productService.suggestProducts(req.query);
+    res.json({ data: suggestions });
+  } catch (error) {
+    next(error);
+  }
+});
+
+router.get('/export', async (req, res, next) => {
+  try {
+    const upstream = await productService.exportProducts(req.query);
+    ['content-type', 'content-disposition'].forEach((header) => {
+      if (upstream.headers[header]) {
+        res.setHeader(header, upstream.headers[header]);
+      }
+    });
+    upstream.data.on('error', next);
+    upstream.data.pipe(res);
+  } catch (error) {
+    next(error);
+  }
+});
+
+router.post('/groups', async (req, res, next) => {
+  try {
+    const groups = await productService.listProductGroups(req.body);
+    res.json({ data: groups });
+  } catch (error) {
+    next(error);
+  }
+});
+
 router.get('/:id', async (req, res, next) => {
   try {
     const product = await productService.getProduct(req.params.id);
@@ -5,6 +5,25 @@ async function listProducts(params = {}) {
   return response.data;
 }
 
+async function exportProducts(params = {}) {
+  return productServiceClient.get('/products/export', { params, responseType: 'stream' });
+}
+
+async function listProductGroups(payload) {
+  const response = await productServiceClient.post('/products/groups', payload);
+  return response.data;
+}
+
+async function getFacets(params = {}) {
+  const response = await productServiceClient.get('/products/facets', { params });
+  return response.data;
+}
+
+async function suggestProducts(params = {}) {
+  const response = await productServiceClient.get('/products/suggest', { params });
+  return response.data;
+}
+
 async function getProduct(id) {
   const response = await productServiceClient.get(`/products/${id}`);
   return response.data;
@@ -32,6 +51,10 @@ async function updateStock(id, payload) {
 
 module.exports = {
   listProducts,
+  exportProducts,
+  listProductGroups,
+  getFacets,
+  suggestProducts,
   getProduct,
   createProduct,
   updateProduct,
@@ -50,6 +50,7 @@ const orderSchema = new Schema(
     items: { type: [orderItemSchema], default: [] },
     shipping: { type: shippingSchema, default: null },
     payment: { type: paymentSchema, default: null },
+    reservationId: { type: String },
   },
   { timestamps: { createdAt: 'createdAt', updatedAt: 'updatedAt' } },
 );
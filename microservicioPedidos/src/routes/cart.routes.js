@@ -1,28 +1,21 @@
 const express = require('express');
 const CartItem = require('../models/CartItem');
 const { authenticate } = require('../middleware/auth');
-const { getProduct } = require('../utils/productClient');
+const { getProduct, getProducts } = require('../utils/productClient');
 
 const router = express.Router();
 
 async function mapWithProduct(items) {
-  const enriched = await Promise.all(
-    items.map(async (item) => {
-      try {
-        const product = await getProduct(item.productId);
-        return {
-          ...item.toObject(),
-          product,
-        };
-      } catch (error) {
-        return {
-          ...item.toObject(),
-          product: null,
-        };
-      }
-    }),
-  );
-  return enriched;
+  let products = new Map();
+  try {
+    products = await getProducts(items.map((item) => item.productId));
+  } catch (error) {
+    // Sin catalogo se devuelven los items sin datos de producto.
+  }
+  return items.map((item) => ({
+    ...item.toObject(),
+    product: products.get(String(item.productId)) || null,
+  }));
 }
 
 router.use(authenticate);
@@ -1,21 +1,21 @@
 const express = require('express');
 const Favorite = require('../models/Favorite');
 const { authenticate } = require('../middleware/auth');
-const { getProduct } = require('../utils/productClient');
+const { getProducts } = require('../utils/productClient');
 
 const router = express.Router();
 
 async function enrichFavorites(favs) {
-  return Promise.all(
-    favs.map(async (fav) => {
-      try {
-        const product = await getProduct(fav.productId);
-        return { ...fav.toObject(), product };
-      } catch (error) {
-        return { ...fav.toObject(), product: null };
-      }
-    }),
-  );
+  let products = new Map();
+  try {
+    products = await getProducts(favs.map((fav) => fav.productId));
+  } catch (error) {
+    // Sin catalogo se devuelven los favoritos sin datos de producto.
+  }
+  return favs.map((fav) => ({
+    ...fav.toObject(),
+    product: products.get(String(fav.productId)) || null,
+  }));
 }
 
 router.use(authenticate);
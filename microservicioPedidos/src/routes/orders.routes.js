@@ -2,7 +2,12 @@ const express = require('express');
 const Order = require('../models/Order');
 const CartItem = require('../models/CartItem');
 const { authenticate } = require('../middleware/auth');
-const { getProduct } = require('../utils/productClient');
+const {
+  getProducts,
+  reserveStock,
+  confirmReservation,
+  releaseReservation,
+} = require('../utils/productClient');
 
 const router = express.Router();
 
@@ -72,6 +77,24 @@ function buildPayment(raw = {}) {
   return payment;
 }
 
+// Confirma la reserva de un pedido recien guardado. Si no se puede, el pedido
+// no debe quedarse guardado: el barrido de reservas caducadas devolveria sus
+// unidades al stock y se podrian vender otra vez.
+async function confirmOrderReservation(order) {
+  try {
+    await confirmReservation(order.reservationId);
+  } catch (error) {
+    try {
+      await releaseReservation(order.reservationId);
+    } catch (releaseError) {
+      // 409: la reserva ya estaba confirmada (solo se perdio la respuesta).
+      if (releaseError.response?.status === 409) return;
+    }
+    await Order.deleteOne({ _id: order._id }).catch(() => {});
+    throw error;
+  }
+}
+
 router.use(authenticate);
 
 router.get('/', async (req, res, next) => {
@@ -94,9 +117,10 @@ router.post('/checkout', async (req, res, next) => {
 
     const items = [];
     let total = 0;
+    const products = await getProducts(cartItems.map((item) => item.productId));
 
     for (const item of cartItems) {
-      const product = await getProduct(item.productId);
+      const product = products.get(String(item.productId));
       if (!product || !product.disponible) {
         return res.status(400).json({ message: `Producto no disponible: ${item.productId}` });
       }
@@ -112,14 +136,31 @@ router.post('/checkout', async (req, res, next) => {
       });
     }
 
-    const order = await Order.create({
-      userId: req.user.id,
-      total,
-      status: 'created',
-      items,
-      shipping,
-      payment,
-    });
+    // El stock se descuenta de forma atomica antes de crear el pedido: dos
+    // checkouts simultaneos no pueden vender la misma ultima unidad.
+    const { reservation, unavailable } = await reserveStock(items);
+    if (!reservation) {
+      return res
+        .status(409)
+        .json({ message: 'Stock insuficiente', unavailable: unavailable.map(String) });
+    }
+
+    let order;
+    try {
+      order = await Order.create({
+        userId: req.user.id,
+        total,
+        status: 'created',
+        items,
+        shipping,
+        payment,
+        reservationId: reservation.id,
+      });
+    } catch (error) {
+      await releaseReservation(reservation.id).catch(() => {});
+      throw error;
+    }
+    await confirmOrderReservation(order);
 
     await CartItem.deleteMany({ userId: req.user.id });
 
@@ -3,6 +3,8 @@ const axios = require('axios');
 const PRODUCT_SERVICE_URL =
   process.env.PRODUCT_SERVICE_URL || 'http://product-service:8002';
 
+const BATCH_SIZE = 200;
+
 const client = axios.create({
   baseURL: PRODUCT_SERVICE_URL,
   timeout: 8000,
@@ -13,6 +15,55 @@ async function getProduct(productId) {
   return response.data?.data || response.data;
 }
 
+// Resuelve varios productos en una sola peticion. Devuelve un Map id -> producto
+// (los ids inexistentes o no numericos no aparecen).
+async function getProducts(productIds) {
+  const ids = [...new Set(productIds.map((id) => Number(id)).filter(Number.isInteger))];
+  const products = new Map();
+  if (!ids.length) {
+    return products;
+  }
+
+  for (let start = 0; start < ids.length; start += BATCH_SIZE) {
+    const response = await client.post('/products/batch-get', {
+      ids: ids.slice(start, start + BATCH_SIZE),
+    });
+    const items = response.data?.items || [];
+    items.forEach((product) => products.set(String(product.id), product));
+  }
+  return products;
+}
+
+// Reserva de forma atomica las unidades de todas las lineas (todas o ninguna).
+// Devuelve { reservation } o { unavailable: [ids] } si falta stock.
+async function reserveStock(lines) {
+  try {
+    const response = await client.post('/products/reservations', {
+      items: lines.map((line) => ({ id: Number(line.productId), cantidad: line.quantity })),
+    });
+    return { reservation: response.data };
+  } catch (error) {
+    if (error.response?.status === 409) {
+      return { unavailable: error.response.data?.detail?.unavailable || [] };
+    }
+    throw error;
+  }
+}
+
+async function confirmReservation(reservationId) {
+  const response = await client.post(`/products/reservations/${reservationId}/confirm`);
+  return response.data;
+}
+
+async function releaseReservation(reservationId) {
+  const response = await client.delete(`/products/reservations/${reservationId}`);
+  return response.data;
+}
+
 module.exports = {
   getProduct,
+  getProducts,
+  reserveStock,
+  confirmReservation,
+  releaseReservation,
 };
@@ -5,24 +5,23 @@ from __future__ import annotations
 import time
 from typing import Optional
 
-from sqlalchemy import create_engine, text
+from sqlalchemy import text
 from sqlalchemy.exc import OperationalError
 
-from .config import get_settings
+from .database import engine
 
 
 def wait_for_database(max_attempts: int = 30, delay_seconds: float = 2.0) -> None:
     """Bloquea la ejecucion hasta que la base de datos este lista."""
 
-    settings = get_settings()
-    engine = create_engine(settings.database_url, pool_pre_ping=True)
-
     last_error: Optional[Exception] = None
     for attempt in range(1, max_attempts + 1):
         try:
             with engine.connect() as connection:
                 connection.execute(text("SELECT 1"))
             print("Base de datos disponible (intento #{})".format(attempt))
+            # Se liberan las conexiones: este proceso termina tras la espera.
+            engine.dispose()
             return
         except OperationalError as exc:
             last_error = exc
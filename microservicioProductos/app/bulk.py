@@ -0,0 +1,166 @@
+"""Lectura y validacion de importaciones masivas (NDJSON o CSV).
+
+El cuerpo se procesa en streaming: el event loop solo lo decodifica y lo
+divide en bloques de lineas; cada bloque se convierte en registros y se
+valida con ``ProductCreate`` en el threadpool, sin cargar el fichero
+completo en memoria. Los parsers guardan su estado (cabecera CSV, registro
+a medias, numero de linea) entre bloques y cada registro conserva su
+numero de linea para el informe de errores.
+"""
+
+from __future__ import annotations
+
+import codecs
+import csv
+import json
+from typing import AsyncIterator, Dict, List, Optional, Tuple, Union
+
+from pydantic import ValidationError
+
+from . import schemas
+
+BULK_FORMATS = ("ndjson", "csv")
+BULK_CHUNK_SIZE = 1000
+
+# (linea, registro ya decodificado o None, error de formato o None)
+Record = Tuple[int, Optional[dict], Optional[str]]
+
+
+async def _iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    pending = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending.rstrip("\r")
+
+
+async def iter_line_batches(
+    chunks: AsyncIterator[bytes], size: int = BULK_CHUNK_SIZE
+) -> AsyncIterator[List[str]]:
+    """Lineas del cuerpo en bloques de ``size``; el parseo se hace fuera del event loop."""
+
+    batch: List[str] = []
+    async for line in _iter_lines(chunks):
+        batch.append(line)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class NdjsonParser:
+    """Convierte lineas NDJSON en registros, numerando las lineas entre bloques."""
+
+    def __init__(self) -> None:
+        self.line_number = 0
+
+    def feed(self, lines: List[str]) -> List[Record]:
+        records: List[Record] = []
+        for line in lines:
+            self.line_number += 1
+            if not line.strip():
+                continue
+            try:
+                value = json.loads(line)
+            except json.JSONDecodeError as error:
+                records.append((self.line_number, None, f"JSON no valido: {error.msg}"))
+                continue
+            if not isinstance(value, dict):
+                records.append((self.line_number, None, "Cada linea debe ser un objeto JSON"))
+                continue
+            records.append((self.line_number, value, None))
+        return records
+
+    def finish(self) -> List[Record]:
+        return []
+
+
+class CsvParser:
+    """Convierte lineas CSV en registros; un registro puede ocupar varias lineas."""
+
+    def __init__(self) -> None:
+        self.header: Optional[List[str]] = None
+        self.buffered: List[str] = []
+        self.start_line = 0
+        self.line_number = 0
+
+    def feed(self, lines: List[str]) -> List[Record]:
+        records: List[Record] = []
+        for line in lines:
+            self.line_number += 1
+            if not self.buffered:
+                self.start_line = self.line_number
+            self.buffered.append(line)
+            text = "\n".join(self.buffered)
+            # Un campo entre comillas puede contener saltos de linea: el registro
+            # esta completo cuando las comillas quedan emparejadas.
+            if text.count('"') % 2:
+                continue
+            self.buffered.clear()
+            if not text.strip():
+                continue
+            values = next(csv.reader([text]))
+            if self.header is None:
+                self.header = [name.strip() for name in values]
+                continue
+            if len(values) != len(self.header):
+                records.append(
+                    (
+                        self.start_line,
+                        None,
+                        f"Se esperaban {len(self.header)} columnas y hay {len(values)}",
+                    )
+                )
+                continue
+            # Las celdas vacias equivalen a campos ausentes (se aplican los valores por defecto).
+            record = {key: value for key, value in zip(self.header, values) if value != ""}
+            records.append((self.start_line, record, None))
+        return records
+
+    def finish(self) -> List[Record]:
+        if self.buffered:
+            return [(self.start_line, None, "Comillas sin cerrar al final del fichero")]
+        return []
+
+
+RecordParser = Union[NdjsonParser, CsvParser]
+
+
+def record_parser(bulk_format: str) -> RecordParser:
+    """Parser con estado para el formato indicado."""
+
+    if bulk_format == "csv":
+        return CsvParser()
+    return NdjsonParser()
+
+
+def _error_messages(error: ValidationError) -> List[str]:
+    return [
+        f"{'.'.join(str(part) for part in item['loc'])}: {item['msg']}" for item in error.errors()
+    ]
+
+
+def validate_records(
+    records: List[Record],
+) -> Tuple[List[Tuple[int, Dict[str, object]]], List[schemas.ProductBulkError]]:
+    """Valida un lote y separa las filas validas de los errores por linea."""
+
+    valid: List[Tuple[int, Dict[str, object]]] = []
+    errors: List[schemas.ProductBulkError] = []
+    for line, record, parse_error in records:
+        if parse_error is not None:
+            errors.append(schemas.ProductBulkError(linea=line, errores=[parse_error]))
+            continue
+        try:
+            product = schemas.ProductCreate.parse_obj(record)
+        except ValidationError as error:
+            errors.append(schemas.ProductBulkError(linea=line, errores=_error_messages(error)))
+            continue
+        valid.append((line, product.dict()))
+    return valid, errors
@@ -0,0 +1,394 @@
+"""Cache de lectura para productos y listados.
+
+Los valores son cuerpos JSON ya serializados (``bytes``), de modo que un
+acierto se devuelve sin consultar la base de datos ni volver a validar con
+Pydantic. Hay tres backends:
+
+- ``memory``: LRU con caducidad por entrada, local a cada proceso.
+- ``redis``: cualquier servidor que hable el protocolo Redis (compartido
+  entre workers y replicas). Acepta un cliente ya construido, por ejemplo
+  ``fakeredis.FakeRedis()`` en pruebas locales.
+- ``none``: desactiva la cache.
+
+Invalidacion: cada producto tiene su clave ``product:<id>`` que se borra al
+escribirlo. Los listados y facetas dependen de muchos productos, asi que su
+clave incluye una generacion del catalogo que se incrementa con cualquier
+escritura; las entradas antiguas dejan de usarse y caducan solas.
+
+Cada entrada guarda, junto al cuerpo, sus validadores HTTP (``ETag`` y
+``Last-Modified``) para poder responder 304 desde la propia cache.
+
+Las rutas asincronas llaman a la cache con ``call_async``: con un backend
+de red (``redis``) la llamada se hace en el threadpool y no bloquea el
+event loop. Sus escrituras acumulan las invalidaciones con
+``deferred_invalidation`` y las aplican despues del mismo modo.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple, TypeVar
+
+from fastapi.concurrency import run_in_threadpool
+
+from .config import get_settings
+
+GENERATION_KEY = "products:generation"
+
+T = TypeVar("T")
+
+
+class CacheBackend(ABC):
+    """Interfaz comun de los backends de cache."""
+
+    name = "base"
+    # True si cada operacion es E/S de red (no se puede llamar desde el event loop).
+    blocking = False
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[bytes]:
+        """Valor guardado en ``key`` o ``None`` si no existe o ha caducado."""
+
+    @abstractmethod
+    def set(self, key: str, value: bytes, ttl: Optional[int] = None) -> None:
+        """Guarda ``value`` durante ``ttl`` segundos (o el TTL por defecto)."""
+
+    @abstractmethod
+    def delete(self, *keys: str) -> None:
+        """Borra las claves indicadas, existan o no."""
+
+    @abstractmethod
+    def incr(self, key: str) -> int:
+        """Incrementa un contador (sin caducidad) y devuelve su nuevo valor."""
+
+    @abstractmethod
+    def get_int(self, key: str) -> int:
+        """Valor de un contador; 0 si no existe."""
+
+    @abstractmethod
+    def stats(self) -> Dict[str, object]:
+        """Metricas del backend para ``GET /metrics``."""
+
+
+class _Counters:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def hit(self) -> None:
+        with self._lock:
+            self.hits += 1
+
+    def miss(self) -> None:
+        with self._lock:
+            self.misses += 1
+
+    def evicted(self, amount: int = 1) -> None:
+        with self._lock:
+            self.evictions += amount
+
+    def snapshot(self) -> Dict[str, object]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            }
+
+
+class NullCache(CacheBackend):
+    """Backend que no guarda nada (cache desactivada)."""
+
+    name = "none"
+
+    def __init__(self) -> None:
+        self._counters = _Counters()
+
+    def get(self, key: str) -> Optional[bytes]:
+        self._counters.miss()
+        return None
+
+    def set(self, key: str, value: bytes, ttl: Optional[int] = None) -> None:
+        return None
+
+    def delete(self, *keys: str) -> None:
+        return None
+
+    def incr(self, key: str) -> int:
+        return 0
+
+    def get_int(self, key: str) -> int:
+        return 0
+
+    def stats(self) -> Dict[str, object]:
+        return {"backend": self.name, **self._counters.snapshot()}
+
+
+class MemoryCache(CacheBackend):
+    """LRU en memoria con caducidad (TTL) por entrada."""
+
+    name = "memory"
+
+    def __init__(self, max_entries: int = 2048, default_ttl: int = 300) -> None:
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self._entries: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        # Los contadores van aparte: no caducan ni compiten en el LRU.
+        self._integers: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._counters = _Counters()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= time.monotonic():
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self._counters.miss()
+                return None
+            self._entries.move_to_end(key)
+        self._counters.hit()
+        return entry[1]
+
+    def set(self, key: str, value: bytes, ttl: Optional[int] = None) -> None:
+        expires_at = time.monotonic() + (ttl if ttl is not None else self.default_ttl)
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            overflow = len(self._entries) - self.max_entries
+            for _ in range(max(overflow, 0)):
+                self._entries.popitem(last=False)
+        if overflow > 0:
+            self._counters.evicted(overflow)
+
+    def delete(self, *keys: str) -> None:
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+                self._integers.pop(key, None)
+
+    def incr(self, key: str) -> int:
+        with self._lock:
+            value = self._integers.get(key, 0) + 1
+            self._integers[key] = value
+            return value
+
+    def get_int(self, key: str) -> int:
+        with self._lock:
+            return self._integers.get(key, 0)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._integers.clear()
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            size = len(self._entries)
+        return {
+            "backend": self.name,
+            "entries": size,
+            "max_entries": self.max_entries,
+            **self._counters.snapshot(),
+        }
+
+
+class RedisCache(CacheBackend):
+    """Backend sobre un cliente con la API de ``redis-py``."""
+
+    name = "redis"
+    blocking = True
+
+    def __init__(self, client, prefix: str = "sport4data:", default_ttl: int = 300) -> None:
+        self.client = client
+        self.prefix = prefix
+        self.default_ttl = default_ttl
+        self._counters = _Counters()
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs) -> "RedisCache":
+        try:
+            import redis
+        except ImportError as error:  # pragma: no cover - dependencia opcional
+            raise RuntimeError(
+                "PRODUCTS_CACHE_BACKEND=redis requiere el paquete 'redis'"
+            ) from error
+        client = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        return cls(client, **kwargs)
+
+    def get(self, key: str) -> Optional[bytes]:
+        value = self.client.get(self.prefix + key)
+        if value is None:
+            self._counters.miss()
+            return None
+        self._counters.hit()
+        return value
+
+    def set(self, key: str, value: bytes, ttl: Optional[int] = None) -> None:
+        self.client.set(self.prefix + key, value, ex=ttl if ttl is not None else self.default_ttl)
+
+    def delete(self, *keys: str) -> None:
+        if keys:
+            self.client.delete(*(self.prefix + key for key in keys))
+
+    def incr(self, key: str) -> int:
+        return int(self.client.incr(self.prefix + key))
+
+    def get_int(self, key: str) -> int:
+        value = self.client.get(self.prefix + key)
+        return int(value) if value is not None else 0
+
+    def stats(self) -> Dict[str, object]:
+        stats: Dict[str, object] = {"backend": self.name, **self._counters.snapshot()}
+        try:
+            # Las expulsiones las decide el servidor (maxmemory-policy).
+            stats["evictions"] = int(self.client.info("stats").get("evicted_keys", 0))
+        except Exception:  # pragma: no cover - servidores sin INFO
+            pass
+        return stats
+
+
+@lru_cache()
+def get_cache() -> CacheBackend:
+    """Backend configurado para este proceso."""
+
+    settings = get_settings()
+    backend = settings.cache_backend.lower()
+    if backend == "none":
+        return NullCache()
+    if backend == "redis":
+        return RedisCache.from_url(settings.cache_url, default_ttl=settings.cache_ttl_seconds)
+    if backend == "memory":
+        return MemoryCache(
+            max_entries=settings.cache_max_entries, default_ttl=settings.cache_ttl_seconds
+        )
+    raise RuntimeError(f"Backend de cache desconocido: {settings.cache_backend}")
+
+
+async def call_async(function: Callable[..., T], *args, **kwargs) -> T:
+    """Llama a una funcion que usa la cache desde una ruta asincrona."""
+
+    if get_cache().blocking:
+        return await run_in_threadpool(function, *args, **kwargs)
+    return function(*args, **kwargs)
+
+
+class PendingInvalidation:
+    """Invalidaciones acumuladas por ``deferred_invalidation``."""
+
+    def __init__(self) -> None:
+        self.requested = False
+        self.product_ids: List[int] = []
+
+    def apply(self) -> None:
+        if self.requested:
+            _apply_invalidation(self.product_ids)
+
+
+_pending_invalidation: ContextVar[Optional[PendingInvalidation]] = ContextVar(
+    "pending_cache_invalidation", default=None
+)
+
+
+@contextmanager
+def deferred_invalidation() -> Iterator[PendingInvalidation]:
+    """Acumula las invalidaciones del bloque en lugar de aplicarlas.
+
+    Lo usan las escrituras de ``crud_async``: los ganchos de ``crud`` corren
+    dentro de ``AsyncSession.run_sync``, en el hilo del event loop.
+    """
+
+    pending = PendingInvalidation()
+    token = _pending_invalidation.set(pending)
+    try:
+        yield pending
+    finally:
+        _pending_invalidation.reset(token)
+
+
+def current_generation() -> int:
+    """Generacion actual del catalogo (cambia con cada escritura)."""
+
+    return get_cache().get_int(GENERATION_KEY)
+
+
+def product_key(product_id: int) -> str:
+    """Clave de la representacion de un producto."""
+
+    return f"product:{product_id}"
+
+
+def listing_key(namespace: str, params: Mapping[str, object], generation: int) -> str:
+    """Clave de un listado segun sus parametros normalizados y la generacion."""
+
+    normalized = sorted((key, str(value)) for key, value in params.items() if value is not None)
+    digest = hashlib.sha1(json.dumps(normalized).encode("utf-8")).hexdigest()
+    return f"{namespace}:{generation}:{digest}"
+
+
+def pack_entry(
+    body: bytes, etag: Optional[str] = None, last_modified: Optional[str] = None
+) -> bytes:
+    """Antepone al cuerpo una linea con sus validadores HTTP."""
+
+    header = json.dumps([etag, last_modified], separators=(",", ":")).encode("utf-8")
+    return header + b"\n" + body
+
+
+def unpack_entry(value: bytes) -> Tuple[bytes, Optional[str], Optional[str]]:
+    """Separa una entrada en ``(cuerpo, etag, last_modified)``."""
+
+    header, _, body = value.partition(b"\n")
+    etag, last_modified = json.loads(header)
+    return body, etag, last_modified
+
+
+def store(key: str, value: bytes, generation: int, ttl: Optional[int] = None) -> None:
+    """Guarda un valor leido en la generacion dada si sigue vigente.
+
+    Si hubo una escritura mientras se consultaba la base de datos, el valor
+    puede estar obsoleto y no se guarda.
+    """
+
+    cache = get_cache()
+    if cache.get_int(GENERATION_KEY) == generation:
+        cache.set(key, value, ttl)
+
+
+def invalidate_product(product_id: Optional[int] = None) -> None:
+    """Descarta la cache de un producto y de todos los listados."""
+
+    invalidate_products([product_id] if product_id is not None else [])
+
+
+def invalidate_products(product_ids: Iterable[int]) -> None:
+    """Descarta varios productos y todos los listados con una sola generacion nueva."""
+
+    pending = _pending_invalidation.get()
+    if pending is not None:
+        pending.requested = True
+        pending.product_ids.extend(product_ids)
+        return
+    _apply_invalidation(product_ids)
+
+
+def _apply_invalidation(product_ids: Iterable[int]) -> None:
+    cache = get_cache()
+    # Primero la generacion: las lecturas en curso ya no guardaran su valor.
+    cache.incr(GENERATION_KEY)
+    keys = [product_key(product_id) for product_id in product_ids]
+    if keys:
+        cache.delete(*keys)
@@ -28,6 +28,42 @@ class Settings(BaseSettings):
         env="PRODUCTS_DATABASE_URL",
         description="Cadena de conexion a PostgreSQL.",
     )
+    database_async: bool = Field(
+        False,
+        env="PRODUCTS_DATABASE_ASYNC",
+        description=(
+            "Sirve las rutas de lectura y stock con un engine asincrono "
+            "(create_async_engine + AsyncSession) en lugar del threadpool."
+        ),
+    )
+    db_pool_size: int = Field(
+        5, env="PRODUCTS_DB_POOL_SIZE", description="Conexiones persistentes por proceso."
+    )
+    db_max_overflow: int = Field(
+        10,
+        env="PRODUCTS_DB_MAX_OVERFLOW",
+        description="Conexiones extra permitidas por encima de db_pool_size en picos.",
+    )
+    db_pool_timeout: float = Field(
+        30.0,
+        env="PRODUCTS_DB_POOL_TIMEOUT",
+        description="Segundos maximos esperando una conexion libre del pool.",
+    )
+    db_pool_recycle: int = Field(
+        1800,
+        env="PRODUCTS_DB_POOL_RECYCLE",
+        description="Segundos tras los que se recicla una conexion (-1 para no reciclar).",
+    )
+    db_pool_pre_ping: bool = Field(
+        True,
+        env="PRODUCTS_DB_POOL_PRE_PING",
+        description="Comprueba la conexion antes de entregarla desde el pool.",
+    )
+    db_statement_timeout_ms: int = Field(
+        0,
+        env="PRODUCTS_DB_STATEMENT_TIMEOUT_MS",
+        description="statement_timeout de PostgreSQL en milisegundos (0 lo desactiva).",
+    )
     static_dir: str = Field(
         default=str(
             next((path for path in _detect_static_dirs() if path.exists()), PROJECT_ROOT / "static")
@@ -40,6 +76,118 @@ class Settings(BaseSettings):
         env="PRODUCTS_STATIC_BASE_URL",
         description="URL publica desde la que se sirven los recursos estaticos.",
     )
+    storage_backend: str = Field(
+        "filesystem",
+        env="PRODUCTS_STORAGE_BACKEND",
+        description="Almacen de las imagenes de producto: filesystem (static_dir) o s3.",
+    )
+    s3_bucket: str = Field("", env="PRODUCTS_S3_BUCKET", description="Bucket de las imagenes.")
+    s3_prefix: str = Field(
+        "", env="PRODUCTS_S3_PREFIX", description="Prefijo de las claves dentro del bucket."
+    )
+    s3_endpoint_url: str = Field(
+        "",
+        env="PRODUCTS_S3_ENDPOINT_URL",
+        description="Endpoint compatible con S3 (MinIO, moto...). Vacio = AWS.",
+    )
+    s3_region: str = Field("", env="PRODUCTS_S3_REGION", description="Region del bucket.")
+    s3_public_url: str = Field(
+        "",
+        env="PRODUCTS_S3_PUBLIC_URL",
+        description="URL publica (CDN) de las imagenes. Vacio = URL del propio bucket.",
+    )
+    s3_max_pool_connections: int = Field(
+        20,
+        env="PRODUCTS_S3_MAX_POOL_CONNECTIONS",
+        description="Conexiones HTTP reutilizables del cliente S3 de cada proceso.",
+    )
+    s3_multipart_threshold_bytes: int = Field(
+        8 * 1024 * 1024,
+        env="PRODUCTS_S3_MULTIPART_THRESHOLD",
+        description="Tamano a partir del cual una subida a S3 se hace por partes.",
+    )
+    s3_multipart_chunk_bytes: int = Field(
+        8 * 1024 * 1024,
+        env="PRODUCTS_S3_MULTIPART_CHUNK",
+        description="Tamano de cada parte de una subida multipart.",
+    )
+
+    cache_backend: str = Field(
+        "memory",
+        env="PRODUCTS_CACHE_BACKEND",
+        description="Cache de lectura: memory (por proceso), redis o none.",
+    )
+    cache_url: str = Field(
+        "redis://localhost:6379/0",
+        env="PRODUCTS_CACHE_URL",
+        description="URL del servidor Redis cuando cache_backend=redis.",
+    )
+    cache_ttl_seconds: int = Field(
+        300,
+        env="PRODUCTS_CACHE_TTL",
+        description="Caducidad por defecto de las entradas de la cache.",
+    )
+    cache_max_entries: int = Field(
+        2048,
+        env="PRODUCTS_CACHE_MAX_ENTRIES",
+        description="Entradas maximas de la cache en memoria antes de expulsar (LRU).",
+    )
+    facets_cache_ttl_seconds: int = Field(
+        60,
+        env="PRODUCTS_FACETS_CACHE_TTL",
+        description="Segundos que se reutilizan las facetas de una misma combinacion de filtros.",
+    )
+    suggest_max_age_seconds: int = Field(
+        30,
+        env="PRODUCTS_SUGGEST_MAX_AGE",
+        description="Segundos tras los que el indice de sugerencias se recarga de la BD.",
+    )
+    catalog_snapshot: bool = Field(
+        False,
+        env="PRODUCTS_CATALOG_SNAPSHOT",
+        description="Resuelve los filtros del listado sobre una instantanea columnar (numpy).",
+    )
+    catalog_snapshot_max_age_seconds: int = Field(
+        60,
+        env="PRODUCTS_CATALOG_SNAPSHOT_MAX_AGE",
+        description="Segundos tras los que la instantanea se recarga desde la base de datos.",
+    )
+    reservation_ttl_seconds: int = Field(
+        900,
+        env="PRODUCTS_RESERVATION_TTL",
+        description="Segundos que una reserva de stock pendiente retiene las unidades.",
+    )
+    reservation_sweep_interval_seconds: int = Field(
+        30,
+        env="PRODUCTS_RESERVATION_SWEEP_INTERVAL",
+        description="Cada cuantos segundos se devuelven al stock las reservas caducadas.",
+    )
+    static_max_age_seconds: int = Field(
+        86400,
+        env="PRODUCTS_STATIC_MAX_AGE",
+        description="max-age de los estaticos no direccionados por contenido.",
+    )
+    static_accel_redirect: str = Field(
+        "",
+        env="PRODUCTS_STATIC_ACCEL_REDIRECT",
+        description="Prefijo interno de nginx (p. ej. /_static/): la API solo responde con "
+        "X-Accel-Redirect y nginx envia el fichero. Vacio = la API sirve los bytes.",
+    )
+    image_max_bytes: int = Field(
+        10 * 1024 * 1024,
+        env="PRODUCTS_IMAGE_MAX_BYTES",
+        description="Tamano maximo en bytes de una imagen de producto subida.",
+    )
+    image_variants: bool = Field(
+        True,
+        env="PRODUCTS_IMAGE_VARIANTS",
+        description="Genera variantes WebP/AVIF redimensionadas de cada imagen (requiere Pillow).",
+    )
+    image_workers: int = Field(
+        2,
+        env="PRODUCTS_IMAGE_WORKERS",
+        description="Procesos dedicados a generar las variantes de imagen.",
+    )
 
     class Config:
         env_file = ".env"
@@ -1,15 +1,214 @@
 """Operaciones de acceso a datos para productos."""
 
-from decimal import Decimal
-from typing import List, Optional
+import base64
+import binascii
+import inspect
+import json
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal, InvalidOperation
+from typing import Dict, Iterator, List, Mapping, Optional, Tuple
+from uuid import uuid4
 
-from sqlalchemy import or_, select
-from sqlalchemy.orm import Session
+from sqlalchemy import (
+    Integer,
+    bindparam,
+    case,
+    cast,
+    column,
+    delete,
+    func,
+    insert,
+    literal,
+    literal_column,
+    null,
+    select,
+    table,
+    text,
+    tuple_,
+    union_all,
+    update,
+)
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy.util import await_only
 
-from . import models, schemas
+from . import (
+    cache,
+    images,
+    models,
+    schemas,
+    search as search_engine,
+    serialization,
+    snapshot,
+    static,
+    storage,
+)
+from .config import get_settings
+from .suggest import PrefixIndex
 
+# Ordenaciones deterministas admitidas; el id final desempata filas iguales.
+# Cada una tiene un indice (o la clave primaria) que la cubre en ambos sentidos.
+SORT_KEYS = {
+    "id": (models.Product.id,),
+    "precio": (models.Product.precio, models.Product.id),
+    "precio_desc": (models.Product.precio, models.Product.id),
+    "nombre": (models.Product.nombre, models.Product.id),
+    "stock": (models.Product.stock, models.Product.id),
+    "newest": (models.Product.id,),
+}
+# Ordenaciones descendentes en todas sus columnas (el indice se recorre al reves).
+DESCENDING_SORTS = frozenset({"precio_desc", "newest"})
+SORT_OPTIONS = tuple(SORT_KEYS)
 
-def list_products(
+# Indice invertido para motores sin texto completo nativo (SQLite en pruebas).
+_search_index = search_engine.InvertedIndex()
+# Indice de prefijos para las sugerencias del buscador.
+_suggest_index = PrefixIndex(get_settings().suggest_max_age_seconds)
+_SUGGEST_COLUMNS = (
+    "id",
+    "nombre",
+    "marca",
+    "categoria",
+    "deporte",
+    "imagen_url",
+    "imagen_variantes",
+    "disponible",
+)
+
+FACET_FIELDS = ("categoria", "deporte", "marca", "color")
+RESERVATION_PENDING = "pendiente"
+RESERVATION_CONFIRMED = "confirmada"
+RESERVATION_RELEASED = "liberada"
+RESERVATION_EXPIRED = "caducada"
+# Reservas caducadas que se procesan en cada barrido.
+RESERVATION_SWEEP_BATCH = 200
+
+# Columnas que aporta cada fila de una importacion masiva (el resto, por defecto).
+BULK_COLUMNS = tuple(schemas.ProductCreate.__fields__)
+
+
+def encode_cursor(product: models.Product, sort: str) -> str:
+    """Genera un cursor opaco a partir de la ultima fila de una pagina."""
+
+    values = [getattr(product, column.key) for column in SORT_KEYS[sort]]
+    payload = json.dumps({"s": sort, "k": [str(value) for value in values]})
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str) -> Tuple:
+    """Recupera los valores de ordenacion guardados en un cursor."""
+
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        raw_values = payload["k"]
+        if payload["s"] != sort or len(raw_values) != len(SORT_KEYS[sort]):
+            raise ValueError("El cursor no corresponde a la ordenacion solicitada")
+
+        values = []
+        for column, raw in zip(SORT_KEYS[sort], raw_values):
+            if column.key in ("id", "stock"):
+                values.append(int(raw))
+            elif column.key == "precio":
+                values.append(Decimal(raw))
+            else:
+                values.append(str(raw))
+    except (
+        binascii.Error,
+        InvalidOperation,
+        KeyError,
+        TypeError,
+        UnicodeError,
+        ValueError,
+    ) as error:
+        raise ValueError("Cursor no valido") from error
+    return tuple(values)
+
+
+def _search_document():
+    return search_engine.document_expression(
+        models.Product.nombre,
+        models.Product.descripcion,
+        models.Product.marca,
+        models.Product.categoria,
+        models.Product.deporte,
+    )
+
+
+def _ensure_search_index(db: Session) -> search_engine.InvertedIndex:
+    if not _search_index.loaded:
+        fields = [getattr(models.Product, field) for field in search_engine.SEARCH_FIELDS]
+        rows = db.execute(select(models.Product.id, *fields))
+        _search_index.replace(
+            (row[0], dict(zip(search_engine.SEARCH_FIELDS, row[1:]))) for row in rows
+        )
+    return _search_index
+
+
+def _ensure_suggest_index(db: Session) -> PrefixIndex:
+    # Tambien se recarga al caducar: otros workers no parchean este indice.
+    if not _suggest_index.fresh:
+        columns = [getattr(models.Product, field) for field in _SUGGEST_COLUMNS]
+        rows = db.execute(select(*columns)).mappings()
+        _suggest_index.replace(rows)
+    return _suggest_index
+
+
+def _ensure_snapshot(db: Session) -> Optional[snapshot.CatalogSnapshot]:
+    catalog = snapshot.get_snapshot()
+    if catalog is not None and not catalog.fresh:
+        columns = [getattr(models.Product, field) for field in snapshot.SNAPSHOT_COLUMNS]
+        catalog.replace(db.execute(select(*columns)).mappings())
+    return catalog
+
+
+def _products_changed(products: List[models.Product]) -> None:
+    """Propaga altas o modificaciones a los indices y caches en memoria."""
+
+    catalog = snapshot.get_snapshot()
+    for product in products:
+        _search_index.add(
+            product.id,
+            {field: getattr(product, field) for field in search_engine.SEARCH_FIELDS},
+        )
+        _suggest_index.add({field: getattr(product, field) for field in _SUGGEST_COLUMNS})
+        if catalog is not None:
+            catalog.upsert(
+                {field: getattr(product, field) for field in snapshot.SNAPSHOT_COLUMNS}
+            )
+        serialization.forget(product.id)
+    cache.invalidate_products(product.id for product in products)
+
+
+def _product_changed(product: models.Product) -> None:
+    _products_changed([product])
+
+
+def _product_removed(product_id: int) -> None:
+    """Propaga una baja fisica a los indices y caches en memoria."""
+
+    _search_index.remove(product_id)
+    _suggest_index.remove(product_id)
+    catalog = snapshot.get_snapshot()
+    if catalog is not None:
+        catalog.remove(product_id)
+    serialization.forget(product_id)
+    cache.invalidate_product(product_id)
+
+
+def _catalog_reloaded() -> None:
+    """Descarta indices y caches en memoria tras una escritura masiva."""
+
+    _search_index.reset()
+    _suggest_index.reset()
+    catalog = snapshot.get_snapshot()
+    if catalog is not None:
+        catalog.reset()
+    cache.invalidate_product()
+
+
+def _filtered_query(
     db: Session,
     *,
     categoria: Optional[str] = None,
@@ -19,12 +218,15 @@ def list_products(
     precio_max: Optional[Decimal] = None,
     disponible: Optional[bool] = None,
     search: Optional[str] = None,
-    skip: int = 0,
-    limit: int = 20,
-) -> List[models.Product]:
-    """Devuelve productos aplicando filtros dinamicos."""
+):
+    """Construye la consulta base con los filtros de listado.
+
+    Devuelve tambien la expresion de relevancia de la busqueda (o ``None``)
+    para ordenar por ella cuando no se pide otra ordenacion.
+    """
 
     query = select(models.Product)
+    relevance = None
 
     if categoria:
         query = query.where(models.Product.categoria == categoria)
@@ -38,46 +240,460 @@ def list_products(
         query = query.where(models.Product.precio <= precio_max)
     if disponible is not None:
         query = query.where(models.Product.disponible == disponible)
-    if search:
-        pattern = f"%{search.lower()}%"
-        query = query.where(
-            or_(
-                models.Product.nombre.ilike(pattern),
-                models.Product.descripcion.ilike(pattern),
+
+    tsquery = search_engine.build_tsquery(search) if search else None
+    if tsquery and db.get_bind().dialect.name == "postgresql":
+        document = _search_document()
+        ts_query = func.to_tsquery(literal_column("'simple'"), tsquery)
+        query = query.where(document.op("@@")(ts_query))
+        relevance = func.ts_rank(document, ts_query).desc()
+    elif tsquery:
+        ranked_ids = _ensure_search_index(db).search(search)
+        query = query.where(models.Product.id.in_(ranked_ids))
+        if ranked_ids:
+            positions = {product_id: index for index, product_id in enumerate(ranked_ids)}
+            relevance = case(positions, value=models.Product.id)
+    return query, relevance
+
+
+def _ordered(query, sort: Optional[str], relevance):
+    if sort is None and relevance is not None:
+        return query.order_by(relevance, models.Product.id)
+    columns = SORT_KEYS[sort or "id"]
+    if sort in DESCENDING_SORTS:
+        return query.order_by(*(column.desc() for column in columns))
+    return query.order_by(*columns)
+
+
+def list_products(
+    db: Session,
+    *,
+    sort: Optional[str] = None,
+    after: Optional[Tuple] = None,
+    skip: int = 0,
+    limit: int = 20,
+    **filters,
+) -> List[models.Product]:
+    """Devuelve productos aplicando filtros dinamicos.
+
+    Sin ``sort`` y con ``search`` los resultados salen por relevancia; en otro
+    caso por id. Con ``after`` se usa paginacion por cursor (keyset): solo se
+    devuelven filas posteriores a esos valores de ordenacion y ``skip`` se
+    ignora.
+
+    Con la instantanea columnar activa, los filtros sin ``search`` y con
+    ordenacion numerica se resuelven en memoria y solo se cargan por id las
+    filas de la pagina.
+    """
+
+    if not filters.get("search") and (sort or "id") in snapshot.SUPPORTED_SORTS:
+        catalog = _ensure_snapshot(db)
+        if catalog is not None:
+            column_filters = {key: value for key, value in filters.items() if key != "search"}
+            page_ids = catalog.query(
+                sort=sort or "id", after=after, skip=skip, limit=limit, **column_filters
             )
-        )
+            return get_products_by_ids(db, page_ids)
+
+    query, relevance = _filtered_query(db, **filters)
+
+    if after is not None:
+        sort = sort or "id"
+        keys, values = tuple_(*SORT_KEYS[sort]), tuple_(*after)
+        query = query.where(keys < values if sort in DESCENDING_SORTS else keys > values)
+    else:
+        query = query.offset(skip)
 
-    query = query.offset(skip).limit(limit)
+    query = _ordered(query, sort, relevance).limit(limit)
     return list(db.execute(query).scalars())
 
 
+def export_query(db: Session, *, sort: Optional[str] = None, batch_size: int = 500, **filters):
+    """Consulta de la exportacion: filtros, orden y lotes de ``batch_size`` filas."""
+
+    query, relevance = _filtered_query(db, **filters)
+    return _ordered(query, sort, relevance).execution_options(yield_per=batch_size)
+
+
+def iter_products(
+    db: Session, *, sort: Optional[str] = None, batch_size: int = 500, **filters
+) -> Iterator[models.Product]:
+    """Recorre todos los productos filtrados con un cursor de servidor.
+
+    Las filas llegan en lotes de ``batch_size`` y cada lote se descarta de la
+    sesion al avanzar, de modo que la memoria no crece con el catalogo.
+    """
+
+    query = export_query(db, sort=sort, batch_size=batch_size, **filters)
+    for partition in db.execute(query).scalars().partitions():
+        yield from partition
+        # expunge_all() invalidaria el mapa de identidad que usa el resultado abierto.
+        for product in partition:
+            db.expunge(product)
+
+
+def list_product_groups(
+    db: Session, groups: List[dict], *, limit: int = 3
+) -> List[List[models.Product]]:
+    """Devuelve los primeros ``limit`` productos de cada grupo de filtros.
+
+    Todos los grupos se resuelven en una unica sentencia: cada rama numera
+    sus filas con ``ROW_NUMBER()`` y se unen con ``UNION ALL``.
+    """
+
+    if not groups:
+        return []
+
+    branches = []
+    for position, filters in enumerate(groups):
+        query, _ = _filtered_query(db, **filters)
+        branches.append(
+            query.add_columns(
+                literal(position).label("grupo"),
+                func.row_number().over(order_by=models.Product.id).label("fila"),
+            )
+        )
+    ranked = union_all(*branches).subquery()
+    product = aliased(models.Product, ranked)
+    statement = (
+        select(product, ranked.c.grupo)
+        .where(ranked.c.fila <= limit)
+        .order_by(ranked.c.grupo, ranked.c.fila)
+    )
+
+    results: List[List[models.Product]] = [[] for _ in groups]
+    for item, position in db.execute(statement):
+        results[position].append(item)
+    return results
+
+
+def product_facets(db: Session, **filters) -> dict:
+    """Conteos por categoria, deporte, marca y color y rango de precios."""
+
+    query, _ = _filtered_query(db, **filters)
+    base = query.with_only_columns(
+        *(getattr(models.Product, field) for field in FACET_FIELDS), models.Product.precio
+    ).subquery()
+    aggregates = (
+        func.count().label("total"),
+        func.min(base.c.precio).label("precio_min"),
+        func.max(base.c.precio).label("precio_max"),
+    )
+
+    if db.get_bind().dialect.name == "postgresql":
+        # Una sola pasada: un grupo por faceta mas el total con GROUPING SETS.
+        grouped = {field: func.grouping(base.c[field]) == 0 for field in FACET_FIELDS}
+        statement = select(
+            case(*((grouped[field], literal(field)) for field in FACET_FIELDS)).label("faceta"),
+            case(*((grouped[field], base.c[field]) for field in FACET_FIELDS)).label("valor"),
+            *aggregates,
+        ).group_by(
+            func.grouping_sets(*(tuple_(base.c[field]) for field in FACET_FIELDS), tuple_())
+        )
+    else:
+        statement = union_all(
+            *(
+                select(
+                    literal(field).label("faceta"), base.c[field].label("valor"), *aggregates
+                ).group_by(base.c[field])
+                for field in FACET_FIELDS
+            ),
+            select(null().label("faceta"), null().label("valor"), *aggregates),
+        )
+
+    facets = {"total": 0, "precio_min": None, "precio_max": None}
+    facets.update({field: [] for field in FACET_FIELDS})
+    for row in db.execute(statement):
+        if row.faceta is None:
+            facets.update(
+                total=row.total, precio_min=row.precio_min, precio_max=row.precio_max
+            )
+        elif row.valor is not None:
+            facets[row.faceta].append({"valor": row.valor, "total": row.total})
+    for field in FACET_FIELDS:
+        facets[field].sort(key=lambda item: (-item["total"], item["valor"]))
+    return facets
+
+
+def suggest_products(
+    db: Session, prefix: str, *, limit: int = 5, disponible: Optional[bool] = None
+) -> List[dict]:
+    """Sugerencias por prefijo de nombre o marca desde el indice en memoria."""
+
+    return _ensure_suggest_index(db).lookup(prefix, limit=limit, disponible=disponible)
+
+
 def get_product(db: Session, product_id: int) -> Optional[models.Product]:
     """Busca un producto por identificador."""
 
     return db.get(models.Product, product_id)
 
 
-def create_product(db: Session, product_in: schemas.ProductCreate) -> models.Product:
-    """Inserta un nuevo producto."""
+def get_products_by_ids(db: Session, product_ids: List[int]) -> List[models.Product]:
+    """Carga varios productos con un solo ``WHERE id IN (...)``.
+
+    Se respeta el orden de ``product_ids`` (sin repetidos); los ids que no
+    existen simplemente no aparecen en el resultado.
+    """
+
+    unique_ids = list(dict.fromkeys(product_ids))
+    if not unique_ids:
+        return []
+    query = select(models.Product).where(models.Product.id.in_(unique_ids))
+    found = {product.id: product for product in db.execute(query).scalars()}
+    return [found[product_id] for product_id in unique_ids if product_id in found]
+
+
+def _is_local_image(path: Optional[str]) -> bool:
+    return bool(path) and not path.lower().startswith(("http://", "https://"))
+
+
+def _acquire_image(db: Session, path: Optional[str], count: int = 1) -> None:
+    """Suma ``count`` referencias al fichero de imagen (en la transaccion en curso)."""
+
+    if not _is_local_image(path):
+        return
+    blobs = models.ImageBlob
+    dialect = postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
+    db.execute(
+        dialect.insert(blobs)
+        .values(ruta=path, referencias=count)
+        .on_conflict_do_update(
+            index_elements=[blobs.ruta], set_={"referencias": blobs.referencias + count}
+        )
+    )
+
+
+def _release_image(
+    db: Session, path: Optional[str], variants: Optional[schemas.ImageVariants]
+) -> List[str]:
+    """Resta una referencia y devuelve los ficheros que han quedado sin uso.
+
+    Con el original se borran sus versiones precomprimidas y sus variantes.
+    Un fichero sin fila en ``imagen_blob`` no se considera propio y nunca se
+    borra.
+    """
 
-    product = models.Product(**product_in.dict())
+    if not _is_local_image(path):
+        return []
+    blobs = models.ImageBlob
+    remaining = db.execute(
+        update(blobs)
+        .where(blobs.ruta == path)
+        .values(referencias=blobs.referencias - 1)
+        .returning(blobs.referencias)
+    ).scalar()
+    if remaining is None or remaining > 0:
+        return []
+    db.execute(delete(blobs).where(blobs.ruta == path, blobs.referencias <= 0))
+    return [path, *static.precompressed_paths(path), *images.variant_paths(variants)]
+
+
+def _delete_unused_files(paths: List[str]) -> None:
+    # Tras el commit: si la transaccion falla, los ficheros siguen en uso.
+    if paths:
+        images.delete_files(paths)
+
+
+def image_is_referenced(db: Session, path: str) -> bool:
+    """Indica si algun producto usa el fichero de imagen."""
+
+    return db.get(models.ImageBlob, path) is not None
+
+
+def discard_unreferenced_image(db: Session, path: Optional[str]) -> None:
+    """Borra una imagen recien guardada que finalmente no se ha asignado."""
+
+    if _is_local_image(path) and not image_is_referenced(db, path):
+        images.delete_files([path, *static.precompressed_paths(path)])
+
+
+def create_product(
+    db: Session, product_in: schemas.ProductCreate
+) -> Optional[models.Product]:
+    """Inserta un nuevo producto; ``None`` si ya existe otro con el mismo nombre y marca."""
+
+    data = product_in.dict()
+    data["imagen_url"] = storage.relative_path(data["imagen_url"])
+    product = models.Product(**data)
     db.add(product)
-    db.commit()
+    try:
+        _acquire_image(db, product.imagen_url)
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        return None
     db.refresh(product)
+    _product_changed(product)
     return product
 
 
+IMPORT_STAGING_TABLE = "producto_importacion"
+
+
+async def _copy_rows_async(driver_connection, statement: str, records: List[tuple]) -> None:
+    async with driver_connection.cursor() as cursor:
+        async with cursor.copy(statement) as copy:
+            for record in records:
+                await copy.write_row(record)
+
+
+def _copy_rows(db: Session, statement: str, records: List[tuple]) -> None:
+    """``COPY ... FROM STDIN`` sobre la conexion psycopg de la sesion.
+
+    Bajo ``AsyncSession.run_sync`` la conexion es la asincrona de psycopg y
+    se espera con ``await_only`` desde el propio greenlet.
+    """
+
+    driver_connection = db.connection().connection.driver_connection
+    if inspect.iscoroutinefunction(driver_connection.commit):
+        await_only(_copy_rows_async(driver_connection, statement, records))
+        return
+    with driver_connection.cursor() as cursor:
+        with cursor.copy(statement) as copy:
+            for record in records:
+                copy.write_row(record)
+
+
+def insert_products_ignoring_conflicts(db: Session, rows: List[dict]) -> List[int]:
+    """Inserta productos omitiendo los que chocan con un nombre y marca existente.
+
+    No confirma la transaccion. En PostgreSQL las filas se cargan con
+    ``COPY`` en una tabla temporal y se pasan con un unico ``INSERT ...
+    SELECT ... ON CONFLICT DO NOTHING``; en otros motores, con un ``INSERT``
+    de varias filas. Las imagenes propias de las filas insertadas suman su
+    referencia en ``imagen_blob``. Devuelve las posiciones (en ``rows``) de
+    las filas insertadas; de dos filas repetidas en el mismo lote se inserta
+    la primera.
+    """
+
+    if not rows:
+        return []
+    rows = [{**row, "imagen_url": storage.relative_path(row.get("imagen_url"))} for row in rows]
+    products = models.Product.__table__
+    if db.get_bind().dialect.name == "postgresql":
+        columns = ", ".join(BULK_COLUMNS)
+        db.execute(
+            text(
+                f"CREATE TEMP TABLE {IMPORT_STAGING_TABLE} ON COMMIT DROP AS "
+                f"SELECT 0 AS posicion, {columns} FROM {products.name} WITH NO DATA"
+            )
+        )
+        _copy_rows(
+            db,
+            f"COPY {IMPORT_STAGING_TABLE} (posicion, {columns}) FROM STDIN",
+            [(position, *(row[name] for name in BULK_COLUMNS)) for position, row in enumerate(rows)],
+        )
+        staged = table(
+            IMPORT_STAGING_TABLE, column("posicion"), *(column(name) for name in BULK_COLUMNS)
+        )
+        statement = postgresql.insert(products).from_select(
+            BULK_COLUMNS,
+            select(*(staged.c[name] for name in BULK_COLUMNS)).order_by(staged.c.posicion),
+        )
+    else:
+        statement = sqlite.insert(products).values(rows)
+    statement = statement.on_conflict_do_nothing().returning(products.c.nombre, products.c.marca)
+
+    # RETURNING devuelve los valores tal cual: se emparejan con las filas en orden.
+    returned: Dict[Tuple[str, Optional[str]], int] = {}
+    for nombre, marca in db.execute(statement):
+        returned[(nombre, marca)] = returned.get((nombre, marca), 0) + 1
+    inserted: List[int] = []
+    image_references: Dict[str, int] = {}
+    for position, row in enumerate(rows):
+        key = (row["nombre"], row.get("marca"))
+        if returned.get(key):
+            returned[key] -= 1
+            inserted.append(position)
+            if _is_local_image(row["imagen_url"]):
+                path = row["imagen_url"]
+                image_references[path] = image_references.get(path, 0) + 1
+    for path, count in sorted(image_references.items()):
+        _acquire_image(db, path, count)
+    return inserted
+
+
+def bulk_insert_products(db: Session, rows: List[dict]) -> List[int]:
+    """Inserta un lote de productos ya validados en una sola transaccion.
+
+    Las filas cuyo nombre y marca ya existen (o se repiten en el lote) se
+    omiten sin rechazar el resto. Devuelve sus posiciones en ``rows``.
+    """
+
+    if not rows:
+        return []
+    try:
+        inserted = insert_products_ignoring_conflicts(db, rows)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    if inserted:
+        _catalog_reloaded()
+    inserted_positions = set(inserted)
+    return [position for position in range(len(rows)) if position not in inserted_positions]
+
+
 def update_product(
     db: Session, product: models.Product, updates: schemas.ProductUpdate
-) -> models.Product:
-    """Actualiza los campos enviados sin tocar el resto."""
+) -> Optional[models.Product]:
+    """Actualiza los campos enviados sin tocar el resto.
 
-    for field, value in updates.dict(exclude_unset=True).items():
+    Devuelve ``None`` si el nuevo nombre y marca ya pertenecen a otro producto.
+    """
+
+    changes = updates.dict(exclude_unset=True)
+    if "imagen_url" in changes:
+        changes["imagen_url"] = storage.relative_path(changes["imagen_url"])
+    previous_image = product.imagen_url
+    previous_variants = product.imagen_variantes
+    image_changed = "imagen_url" in changes and changes["imagen_url"] != previous_image
+    if image_changed:
+        # Las variantes corresponden a la imagen anterior.
+        product.imagen_variantes = None
+    for field, value in changes.items():
         setattr(product, field, value)
 
     db.add(product)
-    db.commit()
+    unused: List[str] = []
+    try:
+        if image_changed:
+            _acquire_image(db, product.imagen_url)
+            unused = _release_image(db, previous_image, previous_variants)
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        return None
+    _delete_unused_files(unused)
     db.refresh(product)
+    _product_changed(product)
+    return product
+
+
+def set_image_variants(
+    db: Session, product_id: int, source: str, variants: schemas.ImageVariants
+) -> Optional[models.Product]:
+    """Guarda las variantes generadas si la imagen del producto sigue siendo ``source``.
+
+    Devuelve ``None`` si el producto ya no existe o su imagen ha cambiado
+    mientras se procesaba: la condicion se evalua en el propio ``UPDATE``.
+    """
+
+    statement = (
+        update(models.Product)
+        .where(models.Product.id == product_id, models.Product.imagen_url == source)
+        .values(imagen_variantes=variants, version=models.Product.version + 1)
+        .returning(models.Product)
+        .execution_options(synchronize_session=False)
+    )
+    product = db.execute(statement).scalars().first()
+    if product is None:
+        db.rollback()
+        return None
+    db.expunge(product)
+    db.commit()
+    _product_changed(product)
     return product
 
 
@@ -88,14 +704,43 @@ def soft_delete_product(db: Session, product: models.Product) -> models.Product:
     db.add(product)
     db.commit()
     db.refresh(product)
+    _product_changed(product)
     return product
 
 
+def seed_key(nombre: Optional[str], marca: Optional[str]) -> str:
+    """Clave natural de un producto: nombre y marca normalizados."""
+
+    return f"{(nombre or '').strip().lower()}||{(marca or '').strip().lower()}"
+
+
+def insert_ignoring_conflicts(db: Session, model, rows: List[dict]) -> int:
+    """``INSERT ... ON CONFLICT DO NOTHING`` de varias filas; devuelve las insertadas."""
+
+    if not rows:
+        return 0
+    dialect = postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
+    statement = dialect.insert(model).values(rows).on_conflict_do_nothing()
+    return db.execute(statement).rowcount
+
+
 def delete_product(db: Session, product: models.Product) -> None:
-    """Elimina fisicamente un producto."""
+    """Elimina fisicamente un producto.
 
+    En la misma transaccion deja una lapida con su nombre y marca para que
+    el seed no vuelva a crearlo y libera su referencia a la imagen: el
+    fichero solo se borra si ningun otro producto lo usa.
+    """
+
+    product_id = product.id
+    key = seed_key(product.nombre, product.marca)
+    unused = _release_image(db, product.imagen_url, product.imagen_variantes)
     db.delete(product)
+    if key != "||":
+        insert_ignoring_conflicts(db, models.SeedTombstone, [{"clave": key}])
     db.commit()
+    _delete_unused_files(unused)
+    _product_removed(product_id)
 
 
 def update_stock(
@@ -107,4 +752,218 @@ def update_stock(
     db.add(product)
     db.commit()
     db.refresh(product)
+    _product_changed(product)
     return product
+
+
+def bulk_update_stock(
+    db: Session, changes: List[schemas.StockChange]
+) -> Tuple[List[models.Product], List[int], List[int]]:
+    """Aplica cambios de stock absolutos o relativos en una sola sentencia.
+
+    Los cambios se pasan como ``(VALUES ...)`` a un ``UPDATE ... FROM`` con
+    ``RETURNING``, dentro de una unica transaccion. Varios cambios del mismo
+    id se combinan en orden. Devuelve los productos actualizados, los ids
+    inexistentes y los que no se aplican porque el stock quedaria negativo.
+    """
+
+    merged: Dict[int, List[Optional[int]]] = {}
+    for change in changes:
+        entry = merged.setdefault(change.id, [None, 0])
+        if change.stock is not None:
+            entry[:] = [change.stock, 0]
+        else:
+            entry[1] += change.delta
+
+    rows, params = [], []
+    for position, (product_id, (stock, delta)) in enumerate(merged.items()):
+        rows.append(f"(:id_{position}, :stock_{position}, :delta_{position})")
+        params += [
+            bindparam(f"id_{position}", product_id, type_=Integer),
+            bindparam(f"stock_{position}", stock, type_=Integer),
+            bindparam(f"delta_{position}", delta, type_=Integer),
+        ]
+    # PostgreSQL y SQLite nombran column1..N las columnas de VALUES.
+    changes_table = (
+        text(
+            "SELECT column1 AS id, column2 AS stock, column3 AS delta "
+            f"FROM (VALUES {', '.join(rows)}) AS valores"
+        )
+        .bindparams(*params)
+        .columns(id=Integer, stock=Integer, delta=Integer)
+        .subquery("cambios")
+    )
+    new_stock = func.coalesce(
+        cast(changes_table.c.stock, Integer), models.Product.stock
+    ) + cast(changes_table.c.delta, Integer)
+    statement = (
+        update(models.Product)
+        .where(models.Product.id == changes_table.c.id, new_stock >= 0)
+        .values(stock=new_stock, version=models.Product.version + 1)
+        .returning(models.Product)
+        .execution_options(synchronize_session=False)
+    )
+
+    updated = list(db.execute(statement).scalars())
+    missing: List[int] = []
+    rejected: List[int] = []
+    if len(updated) < len(merged):
+        updated_ids = {product.id for product in updated}
+        pending = [product_id for product_id in merged if product_id not in updated_ids]
+        existing = set(
+            db.execute(select(models.Product.id).where(models.Product.id.in_(pending))).scalars()
+        )
+        missing = [product_id for product_id in pending if product_id not in existing]
+        rejected = [product_id for product_id in pending if product_id in existing]
+    # Fuera de la sesion no se expiran al confirmar: evita un SELECT por producto.
+    for product in updated:
+        db.expunge(product)
+    db.commit()
+    _products_changed(updated)
+    return updated, missing, rejected
+
+
+def _adjust_stock(db: Session, product_id: int, delta: int) -> Optional[models.Product]:
+    """Suma ``delta`` al stock en una sola sentencia atomica.
+
+    Con ``delta`` negativo solo se aplica si hay unidades suficientes y el
+    producto esta disponible; la condicion se evalua con la fila bloqueada,
+    asi que dos transacciones concurrentes no pueden dejar stock negativo.
+    """
+
+    statement = update(models.Product).where(models.Product.id == product_id)
+    if delta < 0:
+        statement = statement.where(
+            models.Product.stock >= -delta, models.Product.disponible.is_(True)
+        )
+    statement = (
+        statement.values(stock=models.Product.stock + delta, version=models.Product.version + 1)
+        .returning(models.Product)
+        .execution_options(synchronize_session=False)
+    )
+    return db.execute(statement).scalars().first()
+
+
+def _commit_stock_changes(db: Session, products: List[models.Product]) -> None:
+    for product in products:
+        db.expunge(product)
+    db.commit()
+    _products_changed(products)
+
+
+def reserve_stock(
+    db: Session, quantities: Mapping[int, int], ttl_seconds: int
+) -> Tuple[Optional[models.Reservation], List[int]]:
+    """Descuenta el stock de todas las lineas o de ninguna y crea la reserva.
+
+    Las filas se actualizan en orden de id para que dos reservas
+    concurrentes bloqueen los productos en el mismo orden (sin interbloqueos).
+    Devuelve la reserva, o ``None`` y los ids sin unidades suficientes.
+    """
+
+    changed: List[models.Product] = []
+    unavailable: List[int] = []
+    for product_id in sorted(quantities):
+        product = _adjust_stock(db, product_id, -quantities[product_id])
+        if product is None:
+            unavailable.append(product_id)
+        else:
+            changed.append(product)
+    if unavailable:
+        db.rollback()
+        return None, unavailable
+
+    reservation = models.Reservation(
+        id=uuid4().hex,
+        estado=RESERVATION_PENDING,
+        caduca_en=datetime.now(timezone.utc) + timedelta(seconds=ttl_seconds),
+        lineas=[
+            models.ReservationLine(producto_id=product_id, cantidad=quantity)
+            for product_id, quantity in sorted(quantities.items())
+        ],
+    )
+    db.add(reservation)
+    _commit_stock_changes(db, changed)
+    db.refresh(reservation)
+    return reservation, []
+
+
+def get_reservation(db: Session, reservation_id: str) -> Optional[models.Reservation]:
+    """Busca una reserva por identificador."""
+
+    return db.get(models.Reservation, reservation_id)
+
+
+def _close_reservation(db: Session, reservation_id: str, estado: str, *conditions) -> bool:
+    """Cambia una reserva pendiente de estado; solo una transaccion puede lograrlo."""
+
+    result = db.execute(
+        update(models.Reservation)
+        .where(
+            models.Reservation.id == reservation_id,
+            models.Reservation.estado == RESERVATION_PENDING,
+            *conditions,
+        )
+        .values(estado=estado)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount == 1
+
+
+def _return_reserved_stock(db: Session, reservation_id: str, estado: str) -> bool:
+    if not _close_reservation(db, reservation_id, estado):
+        db.rollback()
+        return False
+    lines = db.execute(
+        select(models.ReservationLine)
+        .where(models.ReservationLine.reserva_id == reservation_id)
+        .order_by(models.ReservationLine.producto_id)
+    ).scalars()
+    changed = []
+    for line in lines:
+        product = _adjust_stock(db, line.producto_id, line.cantidad)
+        if product is not None:
+            changed.append(product)
+    _commit_stock_changes(db, changed)
+    return True
+
+
+def confirm_reservation(db: Session, reservation_id: str) -> bool:
+    """Hace definitiva una reserva pendiente que no ha caducado."""
+
+    confirmed = _close_reservation(
+        db,
+        reservation_id,
+        RESERVATION_CONFIRMED,
+        models.Reservation.caduca_en > datetime.now(timezone.utc),
+    )
+    db.commit()
+    return confirmed
+
+
+def release_reservation(db: Session, reservation_id: str) -> bool:
+    """Cancela una reserva pendiente y devuelve sus unidades al stock."""
+
+    return _return_reserved_stock(db, reservation_id, RESERVATION_RELEASED)
+
+
+def release_expired_reservations(db: Session) -> int:
+    """Devuelve al stock las reservas pendientes caducadas; indica cuantas."""
+
+    released = 0
+    while True:
+        expired_ids = list(
+            db.execute(
+                select(models.Reservation.id)
+                .where(
+                    models.Reservation.estado == RESERVATION_PENDING,
+                    models.Reservation.caduca_en <= datetime.now(timezone.utc),
+                )
+                .limit(RESERVATION_SWEEP_BATCH)
+            ).scalars()
+        )
+        db.rollback()
+        for reservation_id in expired_ids:
+            released += _return_reserved_stock(db, reservation_id, RESERVATION_EXPIRED)
+        if len(expired_ids) < RESERVATION_SWEEP_BATCH:
+            return released
@@ -0,0 +1,199 @@
+"""Variantes asincronas de las operaciones de ``crud``.
+
+Cada funcion ejecuta su version sincrona con ``AsyncSession.run_sync``: la
+logica de consulta es la misma, pero la E/S con la base de datos se hace
+sobre la conexion asincrona y no ocupa un hilo del threadpool.
+
+Las escrituras corren en el hilo del event loop, asi que sus efectos con
+E/S fuera de la base de datos se aplican al terminar: la invalidacion de
+la cache con ``cache.call_async`` y el borrado de imagenes sin uso en el
+threadpool.
+"""
+
+from typing import AsyncIterator, Callable, List, Mapping, Optional, Tuple, TypeVar
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import cache, crud, images, models, schemas
+
+T = TypeVar("T")
+
+
+async def _write(db: AsyncSession, function: Callable[..., T], *args, **kwargs) -> T:
+    """Ejecuta una escritura de ``crud`` y despues invalida la cache y borra ficheros."""
+
+    try:
+        with cache.deferred_invalidation() as pending, images.deferred_deletion() as unused:
+            return await db.run_sync(function, *args, **kwargs)
+    finally:
+        # Fuera de los bloques: el threadpool copia el contexto y volveria a diferirlos.
+        await cache.call_async(pending.apply)
+        if unused:
+            await run_in_threadpool(images.delete_files, unused)
+
+
+async def list_products(db: AsyncSession, **kwargs) -> List[models.Product]:
+    """Version asincrona de ``crud.list_products``."""
+
+    return await db.run_sync(crud.list_products, **kwargs)
+
+
+async def iter_products(
+    db: AsyncSession, *, sort: Optional[str] = None, batch_size: int = 500, **filters
+) -> AsyncIterator[models.Product]:
+    """Version asincrona de ``crud.iter_products`` (``AsyncSession.stream``)."""
+
+    query = await db.run_sync(crud.export_query, sort=sort, batch_size=batch_size, **filters)
+    result = await db.stream_scalars(query)
+    async for partition in result.partitions():
+        for product in partition:
+            yield product
+        for product in partition:
+            db.expunge(product)
+
+
+async def list_product_groups(
+    db: AsyncSession, groups: List[dict], *, limit: int = 3
+) -> List[List[models.Product]]:
+    """Version asincrona de ``crud.list_product_groups``."""
+
+    return await db.run_sync(crud.list_product_groups, groups, limit=limit)
+
+
+async def product_facets(db: AsyncSession, **filters) -> dict:
+    """Version asincrona de ``crud.product_facets``."""
+
+    return await db.run_sync(crud.product_facets, **filters)
+
+
+async def suggest_products(
+    db: AsyncSession, prefix: str, *, limit: int = 5, disponible: Optional[bool] = None
+) -> List[dict]:
+    """Version asincrona de ``crud.suggest_products``."""
+
+    return await db.run_sync(
+        crud.suggest_products, prefix, limit=limit, disponible=disponible
+    )
+
+
+async def get_product(db: AsyncSession, product_id: int) -> Optional[models.Product]:
+    """Version asincrona de ``crud.get_product``."""
+
+    return await db.get(models.Product, product_id)
+
+
+async def get_products_by_ids(
+    db: AsyncSession, product_ids: List[int]
+) -> List[models.Product]:
+    """Version asincrona de ``crud.get_products_by_ids``."""
+
+    return await db.run_sync(crud.get_products_by_ids, product_ids)
+
+
+async def create_product(
+    db: AsyncSession, product_in: schemas.ProductCreate
+) -> Optional[models.Product]:
+    """Version asincrona de ``crud.create_product``."""
+
+    return await _write(db, crud.create_product, product_in)
+
+
+async def update_product(
+    db: AsyncSession, product: models.Product, updates: schemas.ProductUpdate
+) -> Optional[models.Product]:
+    """Version asincrona de ``crud.update_product``."""
+
+    return await _write(db, crud.update_product, product, updates)
+
+
+async def soft_delete_product(db: AsyncSession, product: models.Product) -> models.Product:
+    """Version asincrona de ``crud.soft_delete_product``."""
+
+    return await _write(db, crud.soft_delete_product, product)
+
+
+async def delete_product(db: AsyncSession, product: models.Product) -> None:
+    """Version asincrona de ``crud.delete_product``."""
+
+    await _write(db, crud.delete_product, product)
+
+
+async def update_stock(
+    db: AsyncSession, product: models.Product, stock: int
+) -> models.Product:
+    """Version asincrona de ``crud.update_stock``."""
+
+    return await _write(db, crud.update_stock, product, stock)
+
+
+async def bulk_update_stock(
+    db: AsyncSession, changes: List[schemas.StockChange]
+) -> Tuple[List[models.Product], List[int], List[int]]:
+    """Version asincrona de ``crud.bulk_update_stock``."""
+
+    return await _write(db, crud.bulk_update_stock, changes)
+
+
+async def insert_products_ignoring_conflicts(db: AsyncSession, rows: List[dict]) -> List[int]:
+    """Version asincrona de ``crud.insert_products_ignoring_conflicts``."""
+
+    return await db.run_sync(crud.insert_products_ignoring_conflicts, rows)
+
+
+async def bulk_insert_products(db: AsyncSession, rows: List[dict]) -> List[int]:
+    """Version asincrona de ``crud.bulk_insert_products``."""
+
+    return await _write(db, crud.bulk_insert_products, rows)
+
+
+async def image_is_referenced(db: AsyncSession, path: str) -> bool:
+    """Version asincrona de ``crud.image_is_referenced``."""
+
+    return await db.run_sync(crud.image_is_referenced, path)
+
+
+async def discard_unreferenced_image(db: AsyncSession, path: Optional[str]) -> None:
+    """Version asincrona de ``crud.discard_unreferenced_image``."""
+
+    await _write(db, crud.discard_unreferenced_image, path)
+
+
+async def set_image_variants(
+    db: AsyncSession, product_id: int, source: str, variants: schemas.ImageVariants
+) -> Optional[models.Product]:
+    """Version asincrona de ``crud.set_image_variants``."""
+
+    return await _write(db, crud.set_image_variants, product_id, source, variants)
+
+
+async def reserve_stock(
+    db: AsyncSession, quantities: Mapping[int, int], ttl_seconds: int
+) -> Tuple[Optional[models.Reservation], List[int]]:
+    """Version asincrona de ``crud.reserve_stock``."""
+
+    return await _write(db, crud.reserve_stock, quantities, ttl_seconds)
+
+
+async def get_reservation(db: AsyncSession, reservation_id: str) -> Optional[models.Reservation]:
+    """Version asincrona de ``crud.get_reservation``."""
+
+    return await db.run_sync(crud.get_reservation, reservation_id)
+
+
+async def confirm_reservation(db: AsyncSession, reservation_id: str) -> bool:
+    """Version asincrona de ``crud.confirm_reservation``."""
+
+    return await db.run_sync(crud.confirm_reservation, reservation_id)
+
+
+async def release_reservation(db: AsyncSession, reservation_id: str) -> bool:
+    """Version asincrona de ``crud.release_reservation``."""
+
+    return await _write(db, crud.release_reservation, reservation_id)
+
+
+async def release_expired_reservations(db: AsyncSession) -> int:
+    """Version asincrona de ``crud.release_expired_reservations``."""
+
+    return await _write(db, crud.release_expired_reservations)
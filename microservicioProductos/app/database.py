@@ -1,16 +1,174 @@
 """Conexion a la base de datos PostgreSQL y sesion de SQLAlchemy."""
 
+import threading
+import time
+from logging import getLogger
+from typing import AsyncIterator, Dict, Optional
+
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 
 from .config import get_settings
 
+logger = getLogger(__name__)
+
 settings = get_settings()
 
-engine = create_engine(settings.database_url, echo=False, future=True)
+# Drivers asincronos para las URLs sincronas admitidas. psycopg 3 sirve para
+# ambos modos; SQLite necesita aiosqlite.
+ASYNC_DRIVERS = {"sqlite": "aiosqlite"}
+
+
+class CheckoutStats:
+    """Acumula el tiempo que las peticiones esperan una conexion del pool."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.timeouts = 0
+        self.errors = 0
+
+    def record(self, waited: float, timed_out: bool = False, failed: bool = False) -> None:
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+                return
+            if failed:
+                self.errors += 1
+                return
+            self.checkouts += 1
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            average = self.wait_seconds_total / self.checkouts if self.checkouts else 0.0
+            return {
+                "checkouts": self.checkouts,
+                "checkout_timeouts": self.timeouts,
+                "checkout_errors": self.errors,
+                "checkout_wait_seconds_total": round(self.wait_seconds_total, 6),
+                "checkout_wait_seconds_avg": round(average, 6),
+                "checkout_wait_seconds_max": round(self.wait_seconds_max, 6),
+            }
+
+
+class _TimedCheckoutMixin:
+    """Mide cuanto tarda cada checkout (incluida la espera por conexion libre)."""
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.checkout_stats = CheckoutStats()
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.checkout_stats = self.checkout_stats
+        return pool
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            # Pool agotado durante pool_timeout: la unica espera que es un timeout.
+            self.checkout_stats.record(time.perf_counter() - started, timed_out=True)
+            raise
+        except Exception as error:
+            # Fallos al abrir una conexion nueva (servidor caido, credenciales...).
+            self.checkout_stats.record(time.perf_counter() - started, failed=True)
+            logger.warning("Fallo al obtener una conexion del pool: %s", error)
+            raise
+        self.checkout_stats.record(time.perf_counter() - started)
+        return connection
+
+
+class TimedQueuePool(_TimedCheckoutMixin, QueuePool):
+    """QueuePool con metricas de espera en el checkout."""
+
+
+class TimedAsyncQueuePool(_TimedCheckoutMixin, AsyncAdaptedQueuePool):
+    """Variante para el engine asincrono."""
+
+
+def _engine_options(url: str, *, is_async: bool = False) -> dict:
+    """Opciones de pool y conexion segun la configuracion y el motor."""
+
+    options = {"echo": False, "pool_pre_ping": settings.db_pool_pre_ping}
+    backend = make_url(url).get_backend_name()
+    if backend == "sqlite":
+        # SQLite gestiona su propio pool (un fichero, sin servidor).
+        return options
+
+    options.update(
+        poolclass=TimedAsyncQueuePool if is_async else TimedQueuePool,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+    )
+    if backend == "postgresql" and settings.db_statement_timeout_ms > 0:
+        options["connect_args"] = {
+            "options": f"-c statement_timeout={settings.db_statement_timeout_ms}"
+        }
+    return options
+
+
+def _async_database_url(url: str) -> str:
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.get_backend_name())
+    if driver and parsed.get_driver_name() != driver:
+        parsed = parsed.set(drivername=f"{parsed.get_backend_name()}+{driver}")
+    return parsed.render_as_string(hide_password=False)
+
+
+# Unico engine sincrono del proceso: lo comparten la API, el seed y el bootstrap.
+engine = create_engine(
+    settings.database_url, future=True, **_engine_options(settings.database_url)
+)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+async_engine = None
+AsyncSessionLocal = None
+if settings.database_async:
+    async_url = _async_database_url(settings.database_url)
+    async_engine = create_async_engine(async_url, **_engine_options(async_url, is_async=True))
+    # Sin expirar al confirmar: tras el commit no hay IO implicita al serializar.
+    AsyncSessionLocal = async_sessionmaker(
+        async_engine, autoflush=False, expire_on_commit=False, class_=AsyncSession
+    )
+
+
+def _pool_metrics(pool) -> Dict[str, object]:
+    metrics: Dict[str, object] = {"pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        metrics.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=max(pool.overflow(), 0),
+            max_overflow=pool._max_overflow,
+        )
+    stats: Optional[CheckoutStats] = getattr(pool, "checkout_stats", None)
+    if stats is not None:
+        metrics.update(stats.snapshot())
+    return metrics
+
+
+def pool_metrics() -> Dict[str, object]:
+    """Estado de los pools de conexiones de este proceso (worker)."""
+
+    metrics = {"sync": _pool_metrics(engine.pool)}
+    if async_engine is not None:
+        metrics["async"] = _pool_metrics(async_engine.sync_engine.pool)
+    return metrics
+
 
 def get_db():
     """Devuelve una sesion nueva para cada peticion HTTP."""
@@ -20,3 +178,10 @@ def get_db():
     finally:
         db.close()
 
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    """Version asincrona de ``get_db`` (requiere PRODUCTS_DATABASE_ASYNC)."""
+    if AsyncSessionLocal is None:
+        raise RuntimeError("El modo asincrono no esta activado (PRODUCTS_DATABASE_ASYNC)")
+    async with AsyncSessionLocal() as db:
+        yield db
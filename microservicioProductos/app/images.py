@@ -0,0 +1,289 @@
+"""Almacenamiento de imagenes de producto.
+
+Cada imagen se guarda por contenido: ``products/<ab>/<sha256>.<ext>``. Subir
+la misma foto para varios productos reutiliza un unico fichero, y como el
+contenido de una URL nunca cambia se sirve con cabeceras de cache inmutable.
+Las referencias de cada fichero se cuentan en ``imagen_blob`` (ver
+``crud``); solo se borra cuando ningun producto lo usa. Donde se guardan
+los ficheros (disco o S3) lo decide ``storage``.
+
+Las subidas multipart se procesan en streaming: el cuerpo se parsea por
+bloques con ``python-multipart`` y la parte del fichero se escribe a un
+temporal local, con memoria acotada y cortando en cuanto supera
+``PRODUCTS_IMAGE_MAX_BYTES``. Al terminar se publica de una vez (rename
+atomico o subida a S3), asi nunca se sirve una imagen a medio escribir.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import tempfile
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import AsyncIterator, Dict, Iterable, Iterator, List, Optional
+
+import multipart
+from fastapi.concurrency import run_in_threadpool
+from multipart.exceptions import MultipartParseError
+from multipart.multipart import parse_options_header
+
+from .storage import get_storage
+
+IMAGES_SUBDIR = "products"
+UPLOAD_FIELD = "imagen"
+# Ruta de un fichero direccionado por contenido o de una de sus variantes.
+CONTENT_ADDRESSED_PATH = re.compile(
+    rf"^{IMAGES_SUBDIR}/[0-9a-f]{{2}}/[0-9a-f]{{64}}(-[a-z]+)?\.[a-z0-9]{{1,10}}$"
+)
+# Margen para cabeceras y delimitadores multipart al comprobar Content-Length.
+MULTIPART_OVERHEAD_BYTES = 16 * 1024
+
+MIME_TO_EXTENSION = {
+    "image/jpeg": ".jpg",
+    "image/jpg": ".jpg",
+    "image/pjpeg": ".jpg",
+    "image/png": ".png",
+    "image/webp": ".webp",
+    "image/gif": ".gif",
+    "image/heic": ".heic",
+    "image/heif": ".heif",
+    "image/avif": ".avif",
+    "image/bmp": ".bmp",
+    "image/x-ms-bmp": ".bmp",
+    "image/tiff": ".tiff",
+    "image/svg+xml": ".svg",
+    "image/x-icon": ".ico",
+}
+
+
+# Borrados pendientes dentro de ``deferred_deletion`` (None fuera del bloque).
+_pending_deletions: ContextVar[Optional[List[str]]] = ContextVar(
+    "pending_image_deletions", default=None
+)
+
+
+class ImageUploadError(ValueError):
+    """Subida de imagen no valida (formato, campo ausente o vacia)."""
+
+
+class ImageTooLarge(ImageUploadError):
+    """La imagen supera ``PRODUCTS_IMAGE_MAX_BYTES``."""
+
+
+def image_extension(original_name: Optional[str], mime_type: Optional[str]) -> str:
+    """Extension del fichero: la del tipo MIME si se conoce, si no la del nombre."""
+
+    extension = MIME_TO_EXTENSION.get((mime_type or "").lower())
+    if extension:
+        return extension
+    suffix = Path((original_name or "").strip()).suffix.lower()
+    if suffix == ".jpeg":
+        return ".jpg"
+    if re.fullmatch(r"\.[a-z0-9]{1,10}", suffix):
+        return suffix
+    return ".jpg"
+
+
+def content_path(digest: str, extension: str) -> str:
+    """Ruta relativa de un contenido (reparto en subdirectorios por prefijo)."""
+
+    return f"{IMAGES_SUBDIR}/{digest[:2]}/{digest}{extension}"
+
+
+def is_content_addressed(relative_path: Optional[str]) -> bool:
+    """Indica si la ruta apunta a un fichero inmutable (direccionado por contenido)."""
+
+    return bool(relative_path) and CONTENT_ADDRESSED_PATH.match(relative_path) is not None
+
+
+def _temporary_file():
+    return tempfile.NamedTemporaryFile(
+        dir=get_storage().staging_dir(), prefix=".subida-", delete=False
+    )
+
+
+def _publish(handle, relative_path: str) -> str:
+    handle.flush()
+    os.fsync(handle.fileno())
+    handle.close()
+    return get_storage().publish(handle.name, relative_path)
+
+
+def _discard(handle) -> None:
+    handle.close()
+    try:
+        os.unlink(handle.name)
+    except OSError:
+        pass
+
+
+def store_image_bytes(
+    data: bytes, original_name: Optional[str], mime_type: Optional[str]
+) -> str:
+    """Guarda una imagen ya en memoria (ruta base64) y devuelve su ruta relativa."""
+
+    relative_path = content_path(
+        hashlib.sha256(data).hexdigest(), image_extension(original_name, mime_type)
+    )
+    handle = _temporary_file()
+    try:
+        handle.write(data)
+        return _publish(handle, relative_path)
+    except BaseException:
+        _discard(handle)
+        raise
+
+
+def delete_files(relative_paths: Iterable[str]) -> None:
+    """Borra ficheros del almacen, ignorando rutas externas o ausentes."""
+
+    pending = _pending_deletions.get()
+    if pending is not None:
+        pending.extend(relative_paths)
+        return
+    get_storage().delete(relative_paths)
+
+
+@contextmanager
+def deferred_deletion() -> Iterator[List[str]]:
+    """Acumula los borrados del bloque para hacerlos despues (fuera del event loop).
+
+    Lo usan las escrituras de ``crud_async``, que corren en el hilo del
+    event loop; la lista devuelta recoge las rutas pendientes.
+    """
+
+    pending: List[str] = []
+    token = _pending_deletions.set(pending)
+    try:
+        yield pending
+    finally:
+        _pending_deletions.reset(token)
+
+
+def variant_paths(variants: Optional[Dict[str, Dict[str, str]]]) -> List[str]:
+    """Rutas de todos los ficheros de unas variantes."""
+
+    return [path for formats in (variants or {}).values() for path in formats.values()]
+
+
+def check_content_length(value: Optional[str], max_bytes: int) -> None:
+    """Rechaza antes de leer el cuerpo si Content-Length ya excede el limite."""
+
+    try:
+        length = int(value) if value else None
+    except ValueError:
+        raise ImageUploadError("Content-Length no valido")
+    if length is not None and length > max_bytes + MULTIPART_OVERHEAD_BYTES:
+        raise ImageTooLarge(f"La imagen supera el limite de {max_bytes} bytes")
+
+
+class _ImagePart:
+    """Estado del parser: cabeceras de la parte actual y bloques pendientes de escribir."""
+
+    def __init__(self) -> None:
+        self.headers: Dict[bytes, bytes] = {}
+        self.header_field = b""
+        self.header_value = b""
+        self.in_image = False
+        self.found = False
+        self.filename: Optional[str] = None
+        self.mime_type: Optional[str] = None
+        self.pending: List[bytes] = []
+
+    def on_part_begin(self) -> None:
+        self.headers = {}
+
+    def on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self.header_field += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self.header_value += data[start:end]
+
+    def on_header_end(self) -> None:
+        self.headers[self.header_field.lower()] = self.header_value
+        self.header_field = self.header_value = b""
+
+    def on_headers_finished(self) -> None:
+        _, options = parse_options_header(self.headers.get(b"content-disposition", b""))
+        self.in_image = not self.found and options.get(b"name") == UPLOAD_FIELD.encode()
+        if self.in_image:
+            self.found = True
+            raw_name = options.get(b"filename")
+            self.filename = raw_name.decode("utf-8", "replace") if raw_name else None
+            mime = self.headers.get(b"content-type", b"").decode("latin-1")
+            self.mime_type = mime.split(";")[0].strip().lower() or None
+
+    def on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if self.in_image:
+            self.pending.append(data[start:end])
+
+    def on_part_end(self) -> None:
+        self.in_image = False
+
+    def callbacks(self) -> dict:
+        names = (
+            "on_part_begin",
+            "on_header_field",
+            "on_header_value",
+            "on_header_end",
+            "on_headers_finished",
+            "on_part_data",
+            "on_part_end",
+        )
+        return {name: getattr(self, name) for name in names}
+
+
+async def receive_multipart_image(
+    content_type: Optional[str], chunks: AsyncIterator[bytes], max_bytes: int
+) -> str:
+    """Guarda el campo ``imagen`` de un cuerpo multipart y devuelve su ruta relativa.
+
+    Solo se mantiene en memoria el bloque que se esta procesando y el sha256
+    se calcula a la vez que se escribe. Lanza ``ImageTooLarge`` en cuanto se
+    supera ``max_bytes`` e ``ImageUploadError`` si el cuerpo no es multipart,
+    falta el campo o no es una imagen.
+    """
+
+    media_type, params = parse_options_header(content_type or "")
+    boundary = params.get(b"boundary")
+    if media_type != b"multipart/form-data" or not boundary:
+        raise ImageUploadError("Se esperaba un cuerpo multipart/form-data")
+
+    part = _ImagePart()
+    parser = multipart.MultipartParser(boundary, part.callbacks())
+    handle = await run_in_threadpool(_temporary_file)
+    digest = hashlib.sha256()
+    written = 0
+    try:
+        async for chunk in chunks:
+            try:
+                parser.write(chunk)
+            except MultipartParseError as error:
+                raise ImageUploadError(f"Cuerpo multipart no valido: {error}")
+            if not part.pending:
+                continue
+            data = b"".join(part.pending)
+            part.pending.clear()
+            written += len(data)
+            if written > max_bytes:
+                raise ImageTooLarge(f"La imagen supera el limite de {max_bytes} bytes")
+            digest.update(data)
+            await run_in_threadpool(handle.write, data)
+        parser.finalize()
+
+        if not part.found:
+            raise ImageUploadError(f"Falta el campo '{UPLOAD_FIELD}' con la imagen")
+        if not written:
+            raise ImageUploadError("La imagen enviada esta vacia")
+        if part.mime_type and not part.mime_type.startswith("image/"):
+            raise ImageUploadError(f"Tipo de archivo no admitido: {part.mime_type}")
+        relative_path = content_path(
+            digest.hexdigest(), image_extension(part.filename, part.mime_type)
+        )
+        return await run_in_threadpool(_publish, handle, relative_path)
+    except BaseException:
+        await run_in_threadpool(_discard, handle)
+        raise
@@ -6,33 +6,87 @@ Pasos recomendados:
 3. Ejecutar `uvicorn app.main:app --reload` para iniciar el servidor local.
 """
 
+import asyncio
+from contextlib import asynccontextmanager
 from logging import getLogger
 from pathlib import Path
-from typing import Dict
+from typing import Any, Dict
 
 from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
+from fastapi.concurrency import run_in_threadpool
 
+from . import crud, crud_async, variants
+from .cache import get_cache
 from .config import get_settings
-from .database import Base, engine
-from .routers import products
+from .database import AsyncSessionLocal, SessionLocal, engine, pool_metrics
+from .migrations import apply_migrations
+from .routers import products, reservations
+from .static import StaticAssets
+
+# Garantiza que las tablas e indices existan antes de recibir peticiones.
+apply_migrations(engine)
+
+logger = getLogger(__name__)
+settings = get_settings()
+
+
+def _release_expired_reservations() -> int:
+    db = SessionLocal()
+    try:
+        return crud.release_expired_reservations(db)
+    finally:
+        db.close()
+
+
+async def _release_expired_reservations_async() -> int:
+    async with AsyncSessionLocal() as db:
+        return await crud_async.release_expired_reservations(db)
+
+
+async def _sweep_reservations() -> None:
+    """Devuelve periodicamente al stock las reservas caducadas."""
+
+    while True:
+        try:
+            if AsyncSessionLocal is not None:
+                released = await _release_expired_reservations_async()
+            else:
+                released = await run_in_threadpool(_release_expired_reservations)
+            if released:
+                logger.info("Reservas caducadas liberadas: %s", released)
+        except Exception:
+            logger.exception("No se pudieron liberar las reservas caducadas")
+        await asyncio.sleep(settings.reservation_sweep_interval_seconds)
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    sweeper = asyncio.create_task(_sweep_reservations())
+    try:
+        yield
+    finally:
+        sweeper.cancel()
+        variants.shutdown()
 
-# Garantiza que la tabla exista antes de recibir peticiones.
-Base.metadata.create_all(bind=engine)
 
 app = FastAPI(
     title="Sport4Data - Microservicio de Productos",
     description="API REST para gestionar productos deportivos",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
+if settings.database_async:
+    from .routers import products_async, reservations_async
+
+    products_async.override_routes(products.router)
+    products_async.override_routes(reservations.router, reservations_async.router)
 app.include_router(products.router)
+app.include_router(reservations.router)
 
-logger = getLogger(__name__)
-settings = get_settings()
 static_dir = Path(settings.static_dir).resolve()
 if static_dir.exists():
-    app.mount("/static", StaticFiles(directory=static_dir), name="static")
+    app.mount("/static", StaticAssets(directory=static_dir), name="static")
 else:
     logger.warning(
         "Directorio estatico %s no encontrado. Las imagenes locales no podran servirse.", static_dir
@@ -44,3 +98,10 @@ def healthcheck() -> Dict[str, str]:
     """Endpoint sencillo para verificar el estado del servicio."""
 
     return {"status": "ok", "service": "products"}
+
+
+@app.get("/metrics")
+def metrics() -> Dict[str, Any]:
+    """Metricas internas del proceso (pool de conexiones y cache)."""
+
+    return {"pool": pool_metrics(), "cache": get_cache().stats()}
@@ -0,0 +1,188 @@
+"""Migraciones incrementales del esquema.
+
+``Base.metadata.create_all`` solo crea tablas que no existen: nunca anade
+indices ni columnas a una tabla ya creada. Los cambios sobre tablas
+existentes se declaran aqui como pasos versionados que se aplican una sola
+vez y quedan registrados en la tabla ``schema_migrations``.
+
+Ejecutar a mano: ``python -m app.migrations``.
+"""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Callable, List, Tuple
+
+from sqlalchemy import Column, DateTime, MetaData, String, Table, func, inspect, select, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.schema import CreateIndex
+
+from . import models
+from .config import get_settings
+from .database import Base, engine as default_engine
+
+# Identificador arbitrario para serializar migraciones entre procesos en PostgreSQL.
+MIGRATIONS_LOCK_ID = 48151623
+# Fichero donde se guardaban las eliminaciones del seed antes de 0005.
+SEED_DELETIONS_FILENAME = ".seed_deleted_products.json"
+
+migration_metadata = MetaData()
+schema_migrations = Table(
+    "schema_migrations",
+    migration_metadata,
+    Column("version", String(100), primary_key=True),
+    Column("applied_at", DateTime(timezone=True), server_default=func.now(), nullable=False),
+)
+
+
+def _create_product_indexes(connection: Connection) -> None:
+    """Crea los indices declarados en el modelo que falten en la base."""
+
+    for index in models.Product.__table__.indexes:
+        if index.unique:
+            # Los unicos necesitan depurar antes los datos (ver 0004).
+            continue
+        # IF NOT EXISTS en lugar de checkfirst: reflejar los indices de expresiones
+        # avisa (SAWarning) en SQLite. Invocado asi respeta ``ddl_if`` (GIN solo en PG).
+        CreateIndex(index, if_not_exists=True)(index, connection)
+
+
+def _column_names(connection: Connection, table_name: str) -> set:
+    return {column["name"] for column in inspect(connection).get_columns(table_name)}
+
+
+def _add_product_version_columns(connection: Connection) -> None:
+    """Anade version y updated_at (base de ETag y Last-Modified)."""
+
+    existing = _column_names(connection, "producto")
+    if "version" not in existing:
+        connection.execute(
+            text("ALTER TABLE producto ADD COLUMN version INTEGER NOT NULL DEFAULT 1")
+        )
+    if "updated_at" not in existing:
+        if connection.dialect.name == "sqlite":
+            # SQLite no admite ADD COLUMN con valores por defecto no constantes.
+            connection.execute(text("ALTER TABLE producto ADD COLUMN updated_at DATETIME"))
+            connection.execute(text("UPDATE producto SET updated_at = CURRENT_TIMESTAMP"))
+        else:
+            connection.execute(
+                text(
+                    "ALTER TABLE producto ADD COLUMN updated_at "
+                    "TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now()"
+                )
+            )
+
+
+def _deduplicate_products(connection: Connection) -> None:
+    """Elimina duplicados por nombre y marca y crea el indice unico.
+
+    Se conserva el producto con el id mas bajo de cada grupo; el borrado es
+    una sola sentencia con ``row_number()``.
+    """
+
+    connection.execute(
+        text(
+            "DELETE FROM producto WHERE id IN ("
+            " SELECT id FROM ("
+            "  SELECT id, row_number() OVER ("
+            "   PARTITION BY lower(trim(nombre)), lower(coalesce(trim(marca), ''))"
+            "   ORDER BY id"
+            "  ) AS posicion FROM producto"
+            " ) AS repetidos WHERE posicion > 1"
+            ")"
+        )
+    )
+    for index in models.Product.__table__.indexes:
+        if index.unique:
+            # IF NOT EXISTS: SQLite no refleja indices de expresiones (checkfirst falla).
+            connection.execute(CreateIndex(index, if_not_exists=True))
+
+
+def _import_seed_deletions_file(connection: Connection) -> None:
+    """Pasa las eliminaciones del seed del antiguo JSON a ``seed_tombstone``.
+
+    El fichero se renombra a ``.migrado`` para conservarlo sin que se siga usando.
+    """
+
+    path = Path(get_settings().static_dir).resolve() / SEED_DELETIONS_FILENAME
+    try:
+        payload = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return
+    if not isinstance(payload, list):
+        return
+
+    keys = sorted({str(item).strip() for item in payload if str(item).strip()})
+    tombstones = models.SeedTombstone.__table__
+    existing = set(connection.execute(select(tombstones.c.clave)).scalars())
+    rows = [{"clave": key} for key in keys if key not in existing]
+    if rows:
+        connection.execute(tombstones.insert(), rows)
+    try:
+        path.rename(path.with_name(path.name + ".migrado"))
+    except OSError:
+        pass
+
+
+def _add_product_image_variants_column(connection: Connection) -> None:
+    """Anade imagen_variantes (rutas de las versiones redimensionadas)."""
+
+    if "imagen_variantes" not in _column_names(connection, "producto"):
+        connection.execute(text("ALTER TABLE producto ADD COLUMN imagen_variantes JSON"))
+
+
+def _count_image_references(connection: Connection) -> None:
+    """Registra en imagen_blob las imagenes locales que ya usan los productos."""
+
+    products = models.Product.__table__
+    blobs = models.ImageBlob.__table__
+    local_images = (
+        select(products.c.imagen_url, func.count())
+        .where(products.c.imagen_url.is_not(None))
+        .where(~func.lower(products.c.imagen_url).startswith("http://"))
+        .where(~func.lower(products.c.imagen_url).startswith("https://"))
+        .group_by(products.c.imagen_url)
+    )
+    connection.execute(
+        blobs.insert().from_select(["ruta", "referencias"], local_images)
+    )
+
+
+MIGRATIONS: List[Tuple[str, Callable[[Connection], None]]] = [
+    ("0001_indices_filtros_producto", _create_product_indexes),
+    ("0002_version_producto", _add_product_version_columns),
+    ("0003_indices_ordenacion_producto", _create_product_indexes),
+    ("0004_producto_nombre_marca_unico", _deduplicate_products),
+    ("0005_seed_tombstone_desde_json", _import_seed_deletions_file),
+    ("0006_variantes_imagen_producto", _add_product_image_variants_column),
+    ("0007_referencias_imagenes", _count_image_references),
+]
+
+
+def apply_migrations(engine: Engine = default_engine) -> List[str]:
+    """Aplica en orden las migraciones pendientes y devuelve las ejecutadas."""
+
+    Base.metadata.create_all(bind=engine)
+    applied_now: List[str] = []
+    with engine.begin() as connection:
+        if connection.dialect.name == "postgresql":
+            # Varios workers pueden arrancar a la vez: solo uno migra.
+            connection.execute(
+                text("SELECT pg_advisory_xact_lock(:lock_id)"),
+                {"lock_id": MIGRATIONS_LOCK_ID},
+            )
+        migration_metadata.create_all(bind=connection)
+        applied = set(connection.execute(select(schema_migrations.c.version)).scalars())
+        for version, step in MIGRATIONS:
+            if version in applied:
+                continue
+            step(connection)
+            connection.execute(schema_migrations.insert().values(version=version))
+            applied_now.append(version)
+    return applied_now
+
+
+if __name__ == "__main__":
+    executed = apply_migrations()
+    print(f"Migraciones aplicadas: {', '.join(executed) if executed else 'ninguna pendiente'}")
@@ -1,8 +1,24 @@
 """Modelos de base de datos."""
 
-from sqlalchemy import Boolean, Column, Integer, Numeric, String, Text
+from sqlalchemy import (
+    Boolean,
+    Column,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    JSON,
+    Numeric,
+    String,
+    Text,
+    event,
+    func,
+    literal_column,
+)
+from sqlalchemy.orm import object_session, relationship
 
 from .database import Base
+from .search import document_expression
 
 
 class Product(Base):
@@ -20,5 +36,120 @@ class Product(Base):
     stock = Column(Integer, nullable=False, default=0)
     descripcion = Column(Text, nullable=True)
     imagen_url = Column(Text, nullable=True)
+    # Rutas de las variantes redimensionadas: {"thumb": {"webp": ..., "avif": ...}, ...}.
+    imagen_variantes = Column(JSON, nullable=True)
     disponible = Column(Boolean, default=True, nullable=False)
+    # Control de cambios para ETag/Last-Modified. Cada UPDATE suma 1 en SQL
+    # (ver _bump_product_version); no es un bloqueo optimista, porque las
+    # reservas y los cambios de stock masivos tambien la incrementan.
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    updated_at = Column(
+        DateTime(timezone=True),
+        nullable=False,
+        server_default=func.now(),
+        onupdate=func.now(),
+    )
 
+    __table_args__ = (
+        # Filtros del listado y tarjetas de la portada (deporte x categoria).
+        Index("ix_producto_disponible_deporte_categoria", disponible, deporte, categoria),
+        Index("ix_producto_categoria_precio", categoria, precio),
+        Index("ix_producto_deporte_precio", deporte, precio),
+        Index("ix_producto_marca", marca),
+        # Ordenaciones del listado (sort=precio|precio_desc|nombre|stock) y su keyset.
+        Index("ix_producto_precio_id", precio, id),
+        Index("ix_producto_nombre_id", nombre, id),
+        Index("ix_producto_stock_id", stock, id),
+        # Clave natural del catalogo (la misma que usa el seed): nombre y marca
+        # sin distinguir mayusculas ni espacios en los extremos.
+        Index(
+            "ux_producto_nombre_marca",
+            func.lower(func.trim(nombre)),
+            func.lower(func.coalesce(func.trim(marca), literal_column("''"))),
+            unique=True,
+        ),
+        # Indice GIN de texto completo; solo existe en PostgreSQL.
+        Index(
+            "ix_producto_busqueda",
+            document_expression(nombre, descripcion, marca, categoria, deporte),
+            postgresql_using="gin",
+        ).ddl_if(dialect="postgresql"),
+    )
+
+
+@event.listens_for(Product, "before_update")
+def _bump_product_version(mapper, connection, target: Product) -> None:
+    # version = version + 1 en el propio UPDATE, sin comprobar la version leida.
+    session = object_session(target)
+    if session is not None and session.is_modified(target, include_collections=False):
+        target.version = Product.version + 1
+
+
+class Reservation(Base):
+    """Reserva temporal de stock en la tabla 'reserva'.
+
+    El stock se descuenta al crearla; si caduca o se libera se devuelve, y
+    al confirmarla queda descontado definitivamente.
+    """
+
+    __tablename__ = "reserva"
+
+    id = Column(String(32), primary_key=True)
+    estado = Column(String(20), nullable=False, default="pendiente")
+    caduca_en = Column(DateTime(timezone=True), nullable=False)
+    creada_en = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+    lineas = relationship(
+        "ReservationLine",
+        cascade="all, delete-orphan",
+        lazy="selectin",
+        order_by="ReservationLine.producto_id",
+    )
+
+    __table_args__ = (
+        # Barrido de reservas pendientes ya caducadas.
+        Index("ix_reserva_estado_caduca_en", estado, caduca_en),
+    )
+
+
+class ReservationLine(Base):
+    """Producto y cantidad incluidos en una reserva."""
+
+    __tablename__ = "reserva_linea"
+
+    reserva_id = Column(
+        String(32), ForeignKey("reserva.id", ondelete="CASCADE"), primary_key=True
+    )
+    # Sin clave foranea: una reserva no debe impedir borrar el producto.
+    producto_id = Column(Integer, primary_key=True)
+    cantidad = Column(Integer, nullable=False)
+
+
+class SeedState(Base):
+    """Huella del ultimo lote de datos de ejemplo aplicado."""
+
+    __tablename__ = "seed_estado"
+
+    nombre = Column(String(60), primary_key=True)
+    huella = Column(String(64), nullable=False)
+    aplicado_en = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+
+class SeedTombstone(Base):
+    """Producto de ejemplo eliminado que el seed no debe volver a crear."""
+
+    __tablename__ = "seed_tombstone"
+
+    # Clave normalizada "nombre||marca" (ver ``crud.seed_key``).
+    clave = Column(String(400), primary_key=True)
+    creado_en = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+
+class ImageBlob(Base):
+    """Fichero de imagen del directorio estatico y cuantos productos lo usan."""
+
+    __tablename__ = "imagen_blob"
+
+    ruta = Column(Text, primary_key=True)
+    referencias = Column(Integer, nullable=False, default=0)
+    creado_en = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
@@ -2,155 +2,157 @@
 
 import base64
 import binascii
+import csv
+import hashlib
+import io
 import json
-import re
-from pathlib import Path
-from typing import List, Optional
-from urllib.parse import quote
-from uuid import uuid4
-
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Iterator, List, Optional, Tuple, Union
+
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Body,
+    Depends,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    status,
+)
+from fastapi.encoders import jsonable_encoder
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
 
-from .. import crud, schemas
+from .. import bulk, cache, crud, images, schemas, serialization, variants
 from ..config import get_settings
-from ..database import get_db
+from ..database import SessionLocal, get_db
 
 router = APIRouter(prefix="/products", tags=["products"])
-SEED_DELETIONS_FILENAME = ".seed_deleted_products.json"
-
-MIME_TO_EXTENSION = {
-    "image/jpeg": ".jpg",
-    "image/jpg": ".jpg",
-    "image/png": ".png",
-    "image/webp": ".webp",
-    "image/gif": ".gif",
-    "image/heic": ".heic",
-    "image/heif": ".heif",
-    "image/avif": ".avif",
-    "image/bmp": ".bmp",
-    "image/x-ms-bmp": ".bmp",
-    "image/tiff": ".tiff",
-    "image/svg+xml": ".svg",
-    "image/x-icon": ".ico",
+EXPORT_CHUNK_SIZE = 64 * 1024
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
 }
+DUPLICATE_PRODUCT_MESSAGE = "Ya existe un producto con ese nombre y marca"
 
 
-def _normalize_seed_key(nombre: Optional[str], marca: Optional[str]) -> str:
-    return f"{(nombre or '').strip().lower()}||{(marca or '').strip().lower()}"
-
-
-def _seed_deletions_path() -> Path:
-    settings = get_settings()
-    static_dir = Path(settings.static_dir).resolve()
-    static_dir.mkdir(parents=True, exist_ok=True)
-    return static_dir / SEED_DELETIONS_FILENAME
+def _serialize_product(product) -> schemas.Product:
+    data = schemas.Product.from_orm(product)
+    data.imagen_url = serialization.resolve_imagen_url(data.imagen_url)
+    data.imagen_variantes = serialization.resolve_image_variants(data.imagen_variantes)
+    return data
 
 
-def _load_seed_deletions() -> set[str]:
-    path = _seed_deletions_path()
-    if not path.exists():
-        return set()
+def _json_bytes(payload) -> bytes:
+    """Codifica una respuesta igual que JSONResponse, pero como bytes cacheables."""
 
-    try:
-        payload = json.loads(path.read_text(encoding="utf-8"))
-    except (OSError, json.JSONDecodeError):
-        return set()
+    return json.dumps(
+        jsonable_encoder(payload), ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
 
-    if not isinstance(payload, list):
-        return set()
-    return {str(item).strip() for item in payload if str(item).strip()}
 
+def _http_date(value: Optional[datetime]) -> Optional[str]:
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        # SQLite devuelve las fechas sin zona; CURRENT_TIMESTAMP es UTC.
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
 
-def _save_seed_deletions(values: set[str]) -> None:
-    path = _seed_deletions_path()
-    ordered = sorted(values)
-    path.write_text(
-        json.dumps(ordered, ensure_ascii=False, indent=2),
-        encoding="utf-8",
-    )
 
+def _product_validators(product) -> tuple[str, Optional[str]]:
+    """ETag fuerte y Last-Modified de un producto segun su version."""
 
-def _register_seed_deletion(nombre: Optional[str], marca: Optional[str]) -> None:
-    key = _normalize_seed_key(nombre, marca)
-    if key == "||":
-        return
-    deletions = _load_seed_deletions()
-    if key in deletions:
-        return
-    deletions.add(key)
-    try:
-        _save_seed_deletions(deletions)
-    except OSError as error:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"No se pudo guardar el estado de eliminaciones del seed: {error}",
-        )
+    return f'"p{product.id}-v{product.version}"', _http_date(product.updated_at)
 
 
-def _resolve_local_image_path(image_value: Optional[str]) -> Optional[Path]:
-    if not image_value:
-        return None
+def _listing_etag(products: list, params: dict) -> str:
+    """ETag de un listado: parametros mas id y version de cada fila devuelta."""
 
-    raw_value = image_value.strip()
-    if not raw_value:
-        return None
+    digest = hashlib.sha1(
+        json.dumps(sorted((key, str(value)) for key, value in params.items())).encode("utf-8")
+    )
+    for product in products:
+        digest.update(f"{product.id}:{product.version};".encode("ascii"))
+    return f'"l-{digest.hexdigest()}"'
 
-    settings = get_settings()
-    static_dir = Path(settings.static_dir).resolve()
-    base_url = settings.static_base_url.rstrip("/")
 
-    if raw_value.lower().startswith(("http://", "https://")):
-        expected_prefix = f"{base_url}/"
-        if not raw_value.startswith(expected_prefix):
-            return None
-        raw_value = raw_value[len(expected_prefix) :]
+def _not_modified(request: Request, etag: str, last_modified: Optional[str]) -> bool:
+    """Evalua If-None-Match (o, en su ausencia, If-Modified-Since)."""
 
-    relative_path = raw_value.replace("\\", "/").lstrip("/")
-    if not relative_path:
-        return None
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return etag in candidates
 
-    candidate = (static_dir / relative_path).resolve()
+    if_modified_since = request.headers.get("if-modified-since")
+    if not if_modified_since or not last_modified:
+        return False
     try:
-        candidate.relative_to(static_dir)
-    except ValueError:
-        return None
-    return candidate
-
+        return parsedate_to_datetime(last_modified) <= parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+
+
+def _validator_headers(etag: Optional[str], last_modified: Optional[str]) -> dict:
+    headers = {}
+    if etag:
+        headers["ETag"] = etag
+        # El cliente puede guardar la respuesta, pero debe revalidarla.
+        headers["Cache-Control"] = "no-cache"
+    if last_modified:
+        headers["Last-Modified"] = last_modified
+    return headers
+
+
+def _json_response(
+    body: bytes, etag: Optional[str] = None, last_modified: Optional[str] = None
+) -> Response:
+    return Response(
+        content=body,
+        media_type="application/json",
+        headers=_validator_headers(etag, last_modified),
+    )
 
-def _delete_local_image(image_value: Optional[str]) -> None:
-    image_path = _resolve_local_image_path(image_value)
-    if not image_path or not image_path.exists() or not image_path.is_file():
-        return
 
-    try:
-        image_path.unlink()
-    except OSError:
-        # No bloqueamos la operacion principal por un problema de limpieza.
-        return
+def _not_modified_response(etag: str, last_modified: Optional[str] = None) -> Response:
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers=_validator_headers(etag, last_modified),
+    )
 
 
-def _resolve_imagen_url(value: Optional[str]) -> Optional[str]:
-    """Devuelve URLs absolutas usando la configuracion publica."""
+def _cached_json(key: str, request: Optional[Request] = None) -> Optional[Response]:
+    value = cache.get_cache().get(key)
+    if value is None:
+        return None
+    body, etag, last_modified = cache.unpack_entry(value)
+    if request is not None and etag and _not_modified(request, etag, last_modified):
+        return _not_modified_response(etag, last_modified)
+    return _json_response(body, etag, last_modified)
 
-    if not value:
-        return value
 
-    normalized = value.strip()
-    if normalized.lower().startswith(("http://", "https://")):
-        return normalized
+def _store_body(
+    key: str,
+    body: bytes,
+    generation: int,
+    ttl: Optional[int] = None,
+    *,
+    etag: Optional[str] = None,
+    last_modified: Optional[str] = None,
+) -> Response:
+    cache.store(key, cache.pack_entry(body, etag, last_modified), generation, ttl)
+    return _json_response(body, etag, last_modified)
 
-    settings = get_settings()
-    base_url = settings.static_base_url.rstrip("/")
-    path = normalized.replace("\\", "/").lstrip("/")
-    encoded_path = quote(path, safe="/:@%+-_.~")
-    return f"{base_url}/{encoded_path}"
 
-
-def _serialize_product(product) -> schemas.Product:
-    data = schemas.Product.from_orm(product)
-    data.imagen_url = _resolve_imagen_url(data.imagen_url)
-    return data
+def _store_json(key: str, payload, generation: int, ttl: Optional[int] = None) -> Response:
+    return _store_body(key, _json_bytes(payload), generation, ttl)
 
 
 def _parse_base64_payload(raw_value: str) -> tuple[bytes, Optional[str]]:
@@ -189,21 +191,6 @@ def _parse_base64_payload(raw_value: str) -> tuple[bytes, Optional[str]]:
     return decoded, mime_hint
 
 
-def _build_image_filename(
-    original_name: Optional[str], mime_type: Optional[str]
-) -> str:
-    source_name = (original_name or "producto").strip()
-    suffix = Path(source_name).suffix.lower()
-    if not suffix:
-        suffix = MIME_TO_EXTENSION.get((mime_type or "").lower(), ".jpg")
-    elif not re.fullmatch(r"\.[a-z0-9]{1,10}", suffix):
-        suffix = MIME_TO_EXTENSION.get((mime_type or "").lower(), ".jpg")
-
-    stem = Path(source_name).stem.lower()
-    safe_stem = re.sub(r"[^a-z0-9]+", "-", stem).strip("-") or "producto"
-    return f"{safe_stem}-{uuid4().hex[:10]}{suffix}"
-
-
 def _store_product_image(
     encoded_image: Optional[str],
     image_name: Optional[str],
@@ -213,33 +200,24 @@ def _store_product_image(
         return None
 
     image_bytes, mime_hint = _parse_base64_payload(encoded_image)
-    mime_type = (image_mime or mime_hint or "").strip().lower() or None
-    filename = _build_image_filename(image_name, mime_type)
-
-    settings = get_settings()
-    products_dir = Path(settings.static_dir).resolve() / "products"
-    try:
-        products_dir.mkdir(parents=True, exist_ok=True)
-    except OSError as error:
+    max_bytes = get_settings().image_max_bytes
+    if len(image_bytes) > max_bytes:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"No se pudo preparar el directorio de imagenes: {error}",
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"La imagen supera el limite de {max_bytes} bytes",
         )
+    mime_type = (image_mime or mime_hint or "").strip().lower() or None
 
-    target_path = products_dir / filename
     try:
-        target_path.write_bytes(image_bytes)
+        return images.store_image_bytes(image_bytes, image_name, mime_type)
     except OSError as error:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"No se pudo guardar la imagen del producto: {error}",
         )
 
-    return f"products/{filename}"
 
-
-@router.get("", response_model=List[schemas.Product])
-def list_products(
+def product_filters(
     categoria: Optional[str] = Query(None, description="Filtra por categoria exacta"),
     deporte: Optional[str] = Query(None, description="Filtra por deporte exacto"),
     marca: Optional[str] = Query(None, description="Filtra por marca exacta"),
@@ -247,39 +225,420 @@ def list_products(
     precio_max: Optional[float] = Query(None, ge=0),
     disponible: Optional[bool] = Query(None),
     search: Optional[str] = Query(
-        None, description="Cadena para buscar en nombre o descripcion"
+        None,
+        description=(
+            "Texto a buscar (sin distinguir tildes) en nombre, descripcion, "
+            "marca, categoria y deporte"
+        ),
     ),
+) -> dict:
+    """Filtros de catalogo compartidos por listado, exportacion y facetas."""
+
+    return {
+        "categoria": categoria,
+        "deporte": deporte,
+        "marca": marca,
+        "precio_min": precio_min,
+        "precio_max": precio_max,
+        "disponible": disponible,
+        "search": search,
+    }
+
+
+def listing_sort(sort: Optional[str], cursor: Optional[str]) -> Optional[str]:
+    """Ordenacion efectiva del listado.
+
+    Con cursor hace falta una clave determinista: la relevancia de la
+    busqueda no se puede comparar entre paginas, asi que se ordena por id.
+    """
+
+    if cursor is not None and sort is None:
+        return "id"
+    return sort
+
+
+def decode_cursor_param(cursor: Optional[str], sort: Optional[str]):
+    """Traduce el cursor recibido o responde 400 si no es valido."""
+
+    if not cursor:
+        return None
+    try:
+        return crud.decode_cursor(cursor, sort or "id")
+    except ValueError as error:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(error))
+
+
+def build_product_listing(
+    products: list, cursor: Optional[str], sort: Optional[str], limit: int
+) -> bytes:
+    """JSON del listado segun el modo de paginacion."""
+
+    if cursor is None:
+        return serialization.products_json(products)
+
+    page = products[:limit]
+    next_cursor = None
+    if len(products) > limit:
+        next_cursor = crud.encode_cursor(page[-1], sort or "id")
+    return (
+        b'{"items":'
+        + serialization.products_json(page)
+        + b',"next_cursor":'
+        + serialization.dumps(next_cursor)
+        + b"}"
+    )
+
+
+def build_product_groups(keys: List[str], results: List[list]) -> bytes:
+    """JSON de ``POST /products/groups`` a partir de los productos de cada grupo."""
+
+    groups = [
+        b'{"key":%s,"items":%s}' % (serialization.dumps(key), serialization.products_json(products))
+        for key, products in zip(keys, results)
+    ]
+    return b"[" + b",".join(groups) + b"]"
+
+
+def build_batch_get(ids: List[int], products: list) -> bytes:
+    """JSON de ``POST /products/batch-get`` con los ids que no existen."""
+
+    found_ids = {product.id for product in products}
+    missing = [product_id for product_id in dict.fromkeys(ids) if product_id not in found_ids]
+    return (
+        b'{"items":'
+        + serialization.products_json(products)
+        + b',"missing":'
+        + serialization.dumps(missing)
+        + b"}"
+    )
+
+
+SortQuery = Query(
+    None,
+    pattern=f"^({'|'.join(crud.SORT_OPTIONS)})$",
+    description=(
+        "Ordenacion determinista de los resultados. Por defecto, relevancia "
+        "si hay busqueda sin cursor e id en otro caso"
+    ),
+)
+CursorQuery = Query(
+    None,
+    description=(
+        "Activa la paginacion por cursor. Vacio para la primera pagina; "
+        "despues, el next_cursor de la respuesta anterior"
+    ),
+)
+
+
+@router.get("", response_model=Union[schemas.ProductPage, List[schemas.Product]])
+def list_products(
+    request: Request,
+    filters: dict = Depends(product_filters),
+    sort: Optional[str] = SortQuery,
+    cursor: Optional[str] = CursorQuery,
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
     db: Session = Depends(get_db),
-) -> List[schemas.Product]:
-    """Lista productos con paginacion y filtros."""
+) -> Union[schemas.ProductPage, List[schemas.Product]]:
+    """Lista productos con paginacion y filtros.
+
+    Sin ``cursor`` devuelve una lista paginada con ``skip``/``limit``. Con
+    ``cursor`` devuelve ``{items, next_cursor}`` y cada pagina cuesta lo mismo
+    sin importar su profundidad; una busqueda sin ``sort`` se ordena entonces
+    por id en lugar de por relevancia.
+
+    La respuesta lleva un ``ETag`` calculado con la version de cada fila;
+    con ``If-None-Match`` coincidente se responde 304 sin serializar nada.
+    """
+
+    sort = listing_sort(sort, cursor)
+    generation = cache.current_generation()
+    params = {**filters, "sort": sort, "cursor": cursor, "skip": skip, "limit": limit}
+    key = cache.listing_key("list", params, generation)
+    cached = _cached_json(key, request)
+    if cached is not None:
+        return cached
 
     products = crud.list_products(
         db,
-        categoria=categoria,
-        deporte=deporte,
-        marca=marca,
-        precio_min=precio_min,
-        precio_max=precio_max,
-        disponible=disponible,
-        search=search,
+        sort=sort,
+        after=decode_cursor_param(cursor, sort),
         skip=skip,
-        limit=limit,
+        limit=limit + 1 if cursor is not None else limit,
+        **filters,
+    )
+    etag = _listing_etag(products, params)
+    if _not_modified(request, etag, None):
+        return _not_modified_response(etag)
+    return _store_body(
+        key, build_product_listing(products, cursor, sort, limit), generation, etag=etag
+    )
+
+
+class ExportEncoder:
+    """Serializa productos exportados en bloques de ~``EXPORT_CHUNK_SIZE``."""
+
+    def __init__(self, export_format: str) -> None:
+        self.fields = serialization.EXPORT_FIELDS
+        self.buffer = io.StringIO()
+        self.writer = csv.writer(self.buffer) if export_format == "csv" else None
+        if self.writer:
+            self.writer.writerow(self.fields)
+
+    def add(self, product) -> Optional[str]:
+        """Anade un producto y devuelve un bloque si el buffer se ha llenado."""
+
+        # Sin memorizar: una exportacion completa expulsaria los productos calientes.
+        data = serialization.product_dict(product)
+        if self.writer:
+            self.writer.writerow([data[field] for field in self.fields])
+        else:
+            self.buffer.write(serialization.dumps(data).decode("utf-8"))
+            self.buffer.write("\n")
+        if self.buffer.tell() >= EXPORT_CHUNK_SIZE:
+            return self.flush()
+        return None
+
+    def flush(self) -> Optional[str]:
+        """Devuelve lo acumulado (``None`` si no hay nada) y vacia el buffer."""
+
+        chunk = self.buffer.getvalue()
+        self.buffer.seek(0)
+        self.buffer.truncate()
+        return chunk or None
+
+
+def _export_chunks(export_format: str, sort: Optional[str], filters: dict) -> Iterator[str]:
+    """Serializa el catalogo filtrado en bloques de ~64 KB."""
+
+    # La sesion vive tanto como el stream: la de get_db se cierra antes.
+    db = SessionLocal()
+    encoder = ExportEncoder(export_format)
+    try:
+        for product in crud.iter_products(db, sort=sort, **filters):
+            chunk = encoder.add(product)
+            if chunk:
+                yield chunk
+        chunk = encoder.flush()
+        if chunk:
+            yield chunk
+    finally:
+        db.close()
+
+
+@router.get("/export")
+def export_products(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    filters: dict = Depends(product_filters),
+    sort: Optional[str] = SortQuery,
+) -> StreamingResponse:
+    """Exporta todo el catalogo filtrado como NDJSON o CSV en streaming."""
+
+    return StreamingResponse(
+        _export_chunks(format, sort, filters),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="productos.{format}"'},
+    )
+
+
+@router.get("/facets", response_model=schemas.ProductFacets)
+def product_facets(
+    filters: dict = Depends(product_filters),
+    db: Session = Depends(get_db),
+) -> schemas.ProductFacets:
+    """Conteos por categoria, deporte, marca y color y rango de precios."""
+
+    generation = cache.current_generation()
+    key = cache.listing_key("facets", filters, generation)
+    cached = _cached_json(key)
+    if cached is not None:
+        return cached
+
+    facets = crud.product_facets(db, **filters)
+    return _store_json(key, facets, generation, get_settings().facets_cache_ttl_seconds)
+
+
+@router.get("/suggest", response_model=List[schemas.ProductSuggestion])
+def suggest_products(
+    q: str = Query(..., min_length=1, max_length=100, description="Prefijo escrito"),
+    limit: int = Query(5, ge=1, le=20),
+    disponible: Optional[bool] = Query(None),
+    db: Session = Depends(get_db),
+) -> JSONResponse:
+    """Sugerencias de autocompletado por prefijo de nombre o marca."""
+
+    suggestions = crud.suggest_products(db, q, limit=limit, disponible=disponible)
+    # Se responde directamente para evitar la validacion de response_model.
+    return JSONResponse(
+        [
+            serialization.suggestion_dict(suggestion) for suggestion in suggestions
+        ]
+    )
+
+
+@router.post("/groups", response_model=List[schemas.ProductGroup])
+def list_product_groups(
+    payload: schemas.ProductGroupsRequest,
+    db: Session = Depends(get_db),
+) -> List[schemas.ProductGroup]:
+    """Primeros productos de varios grupos de filtros en una sola consulta."""
+
+    filters = [group.dict(exclude={"key"}) for group in payload.groups]
+    results = crud.list_product_groups(db, filters, limit=payload.limit)
+    return _json_response(build_product_groups([group.key for group in payload.groups], results))
+
+
+@router.post("/batch-get", response_model=schemas.ProductBatchGetResponse)
+def batch_get_products(
+    payload: schemas.ProductBatchGetRequest,
+    db: Session = Depends(get_db),
+) -> schemas.ProductBatchGetResponse:
+    """Devuelve varios productos por id en una sola consulta."""
+
+    products = crud.get_products_by_ids(db, payload.ids)
+    return _json_response(build_batch_get(payload.ids, products))
+
+
+def build_stock_batch(updated: list, missing: List[int], rejected: List[int]) -> bytes:
+    """JSON de ``PATCH /products/stock``."""
+
+    return b'{"items":%s,"missing":%s,"rejected":%s}' % (
+        serialization.products_json(updated),
+        serialization.dumps(missing),
+        serialization.dumps(rejected),
     )
-    return [_serialize_product(product) for product in products]
+
+
+@router.patch("/stock", response_model=schemas.StockBatchResult)
+def update_stock_batch(
+    changes: schemas.StockChangeBatch = Body(...),
+    db: Session = Depends(get_db),
+) -> schemas.StockBatchResult:
+    """Aplica ``[{id, stock}]`` o ``[{id, delta}]`` en una sola sentencia y transaccion."""
+
+    updated, missing, rejected = crud.bulk_update_stock(db, changes)
+    return _json_response(build_stock_batch(updated, missing, rejected))
+
+
+def parse_import_lines(
+    parser: bulk.RecordParser,
+    lines: Optional[List[str]],
+    result: schemas.ProductBulkResult,
+) -> List[Tuple[int, dict]]:
+    """Parsea y valida un bloque de lineas (``None`` cierra el parser).
+
+    Devuelve las filas validas con su numero de linea; los errores quedan en
+    ``result``. Se ejecuta en el threadpool: el event loop solo lee el cuerpo.
+    """
+
+    records = parser.feed(lines) if lines is not None else parser.finish()
+    if not records:
+        return []
+    result.recibidos += len(records)
+    valid, errors = bulk.validate_records(records)
+    result.errores.extend(errors)
+    return valid
+
+
+def import_database_errors(bind) -> tuple:
+    """Errores de la base de datos que rechazan un lote sin cortar la importacion."""
+
+    return (SQLAlchemyError, bind.dialect.dbapi.Error)
+
+
+def record_import(
+    result: schemas.ProductBulkResult,
+    valid: List[Tuple[int, dict]],
+    skipped: List[int],
+    error: Optional[Exception] = None,
+) -> None:
+    """Anota en ``result`` un lote insertado (omitiendo ``skipped``) o rechazado."""
+
+    if error is not None:
+        detail = str(getattr(error, "orig", None) or error).strip().splitlines()[0]
+        message = f"Lote rechazado por la base de datos: {detail}"
+        result.errores.extend(
+            schemas.ProductBulkError(linea=line, errores=[message]) for line, _ in valid
+        )
+    else:
+        result.insertados += len(valid) - len(skipped)
+        result.errores.extend(
+            schemas.ProductBulkError(
+                linea=valid[position][0], errores=[DUPLICATE_PRODUCT_MESSAGE]
+            )
+            for position in skipped
+        )
+    result.errores.sort(key=lambda item: item.linea)
+
+
+def _import_lines(
+    db: Session,
+    parser: bulk.RecordParser,
+    lines: Optional[List[str]],
+    result: schemas.ProductBulkResult,
+) -> None:
+    """Parsea, valida e inserta un bloque de lineas en el threadpool."""
+
+    valid = parse_import_lines(parser, lines, result)
+    if not valid:
+        return
+    try:
+        skipped = crud.bulk_insert_products(db, [row for _, row in valid])
+    except import_database_errors(db.get_bind()) as error:
+        record_import(result, valid, [], error)
+    else:
+        record_import(result, valid, skipped)
+
+
+@router.post("/bulk", response_model=schemas.ProductBulkResult)
+async def bulk_import_products(
+    request: Request,
+    format: str = Query("ndjson", pattern=f"^({'|'.join(bulk.BULK_FORMATS)})$"),
+    db: Session = Depends(get_db),
+) -> schemas.ProductBulkResult:
+    """Importa productos desde un cuerpo NDJSON o CSV (mismas columnas que la exportacion).
+
+    El cuerpo se lee en streaming y se parsea, valida e inserta en el
+    threadpool en bloques de ``BULK_CHUNK_SIZE`` lineas, cada uno en su
+    propia transaccion. Las filas invalidas no detienen la importacion: se
+    devuelven en ``errores`` con su numero de linea.
+    """
+
+    result = schemas.ProductBulkResult()
+    parser = bulk.record_parser(format)
+    async for lines in bulk.iter_line_batches(request.stream()):
+        await run_in_threadpool(_import_lines, db, parser, lines, result)
+    await run_in_threadpool(_import_lines, db, parser, None, result)
+    return result
 
 
 @router.get("/{product_id}", response_model=schemas.Product)
-def retrieve_product(product_id: int, db: Session = Depends(get_db)) -> schemas.Product:
-    """Devuelve un producto concreto."""
+def retrieve_product(
+    product_id: int, request: Request, db: Session = Depends(get_db)
+) -> schemas.Product:
+    """Devuelve un producto concreto (admite If-None-Match e If-Modified-Since)."""
+
+    generation = cache.current_generation()
+    key = cache.product_key(product_id)
+    cached = _cached_json(key, request)
+    if cached is not None:
+        return cached
 
     product = crud.get_product(db, product_id)
     if not product:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Producto no encontrado"
         )
-    return _serialize_product(product)
+    etag, last_modified = _product_validators(product)
+    if _not_modified(request, etag, last_modified):
+        return _not_modified_response(etag, last_modified)
+    return _store_body(
+        key,
+        serialization.product_json(product),
+        generation,
+        etag=etag,
+        last_modified=last_modified,
+    )
 
 
 @router.post(
@@ -289,6 +648,7 @@ def retrieve_product(product_id: int, db: Session = Depends(get_db)) -> schemas.
 )
 def create_product(
     product_in: schemas.ProductCreateRequest,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
 ) -> schemas.Product:
     """Crea un producto (deberia ser accesible solo para administradores)."""
@@ -305,6 +665,14 @@ def create_product(
 
     product_payload = schemas.ProductCreate(**product_data)
     product = crud.create_product(db, product_payload)
+    if product is None:
+        if product_in.imagen_base64:
+            crud.discard_unreferenced_image(db, product_data["imagen_url"])
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=DUPLICATE_PRODUCT_MESSAGE,
+        )
+    background_tasks.add_task(variants.process_product_image, product.id, product.imagen_url)
     return _serialize_product(product)
 
 
@@ -312,6 +680,7 @@ def create_product(
 def update_product(
     product_id: int,
     updates: schemas.ProductUpdateRequest,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
 ) -> schemas.Product:
     """Actualiza todos los campos enviados."""
@@ -334,11 +703,106 @@ def update_product(
 
     update_payload = schemas.ProductUpdate(**update_data)
     updated = crud.update_product(db, product, update_payload)
-    if updates.imagen_base64 and previous_image != updated.imagen_url:
-        _delete_local_image(previous_image)
+    if updated is None:
+        if updates.imagen_base64:
+            crud.discard_unreferenced_image(db, update_data["imagen_url"])
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=DUPLICATE_PRODUCT_MESSAGE,
+        )
+    if previous_image != updated.imagen_url:
+        background_tasks.add_task(variants.process_product_image, updated.id, updated.imagen_url)
     return _serialize_product(updated)
 
 
+def _product_exists(product_id: int) -> bool:
+    db = SessionLocal()
+    try:
+        return crud.get_product(db, product_id) is not None
+    finally:
+        db.close()
+
+
+def _assign_uploaded_image(
+    product_id: int, image_url: str
+) -> Tuple[bool, Optional[schemas.Product]]:
+    """Asigna una imagen ya guardada: ``(existe, producto actualizado o None)``.
+
+    Si el producto ha desaparecido o no se puede actualizar, la imagen se
+    descarta cuando nadie mas la usa.
+    """
+
+    db = SessionLocal()
+    try:
+        product = crud.get_product(db, product_id)
+        updated = None
+        if product is not None:
+            updated = crud.update_product(
+                db, product, schemas.ProductUpdate(imagen_url=image_url)
+            )
+        if updated is None:
+            crud.discard_unreferenced_image(db, image_url)
+            return product is not None, None
+        return True, _serialize_product(updated)
+    finally:
+        db.close()
+
+
+@router.post("/{product_id}/image", response_model=schemas.Product)
+async def upload_product_image(
+    product_id: int,
+    request: Request,
+    background_tasks: BackgroundTasks,
+) -> schemas.Product:
+    """Sustituye la imagen con una subida multipart (campo ``imagen``).
+
+    El fichero se escribe a disco por bloques segun llega y se publica con un
+    rename atomico con su sha256 como nombre (si ya existe, se reutiliza); se
+    responde 413 sin leer el cuerpo si ``Content-Length``
+    ya supera ``PRODUCTS_IMAGE_MAX_BYTES``, o en cuanto se sobrepasa al leerlo.
+    Mientras llega el cuerpo no se retiene ninguna conexion del pool: el
+    producto se comprueba antes y se actualiza despues, cada vez con una
+    sesion corta.
+    """
+
+    if not await run_in_threadpool(_product_exists, product_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Producto no encontrado"
+        )
+
+    max_bytes = get_settings().image_max_bytes
+    try:
+        images.check_content_length(request.headers.get("content-length"), max_bytes)
+        image_url = await images.receive_multipart_image(
+            request.headers.get("content-type"), request.stream(), max_bytes
+        )
+    except images.ImageTooLarge as error:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(error)
+        )
+    except images.ImageUploadError as error:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(error))
+    except OSError as error:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"No se pudo guardar la imagen del producto: {error}",
+        )
+
+    found, updated = await run_in_threadpool(_assign_uploaded_image, product_id, image_url)
+    if not found:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Producto no encontrado"
+        )
+    if updated is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="No se pudo actualizar el producto",
+        )
+    if not updated.imagen_variantes:
+        background_tasks.add_task(variants.process_product_image, updated.id, image_url)
+    return updated
+
+
 @router.delete("/{product_id}", response_model=schemas.Product)
 def delete_product(product_id: int, db: Session = Depends(get_db)) -> schemas.Product:
     """Elimina un producto de forma permanente."""
@@ -348,11 +812,8 @@ def delete_product(product_id: int, db: Session = Depends(get_db)) -> schemas.Pr
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Producto no encontrado"
         )
-    original_image = product.imagen_url
-    _register_seed_deletion(product.nombre, product.marca)
     deleted_snapshot = _serialize_product(product)
     crud.delete_product(db, product)
-    _delete_local_image(original_image)
     return deleted_snapshot
 
 
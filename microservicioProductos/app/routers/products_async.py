@@ -0,0 +1,456 @@
+"""Rutas asincronas de productos (PRODUCTS_DATABASE_ASYNC=true).
+
+Replican sobre ``AsyncSession`` las rutas de ``products`` que usan la base
+de datos (lecturas, exportacion, altas, cambios, bajas, imagen, importacion
+masiva y stock). ``override_routes`` las coloca en el router sincrono en la
+misma posicion que la ruta a la que sustituyen, para conservar el orden de
+resolucion (``/export`` antes que ``/{product_id}``, etc.). La cache se
+consulta con ``cache.call_async`` para no bloquear el event loop con Redis.
+"""
+
+from typing import AsyncIterator, List, Optional, Tuple, Union
+
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Body,
+    Depends,
+    HTTPException,
+    Query,
+    Request,
+    status,
+)
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .. import bulk, cache, crud_async, images, schemas, serialization, variants
+from ..config import get_settings
+from ..database import AsyncSessionLocal, get_async_db
+from .products import (
+    DUPLICATE_PRODUCT_MESSAGE,
+    EXPORT_MEDIA_TYPES,
+    CursorQuery,
+    ExportEncoder,
+    SortQuery,
+    _cached_json,
+    _listing_etag,
+    _not_modified,
+    _not_modified_response,
+    _json_response,
+    _product_validators,
+    _serialize_product,
+    _store_body,
+    _store_json,
+    _store_product_image,
+    build_batch_get,
+    build_product_groups,
+    build_product_listing,
+    build_stock_batch,
+    decode_cursor_param,
+    import_database_errors,
+    listing_sort,
+    parse_import_lines,
+    product_filters,
+    record_import,
+)
+
+router = APIRouter(prefix="/products", tags=["products"])
+
+
+@router.get("", response_model=Union[schemas.ProductPage, List[schemas.Product]])
+async def list_products(
+    request: Request,
+    filters: dict = Depends(product_filters),
+    sort: Optional[str] = SortQuery,
+    cursor: Optional[str] = CursorQuery,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_db),
+) -> Union[schemas.ProductPage, List[schemas.Product]]:
+    """Lista productos con paginacion y filtros."""
+
+    sort = listing_sort(sort, cursor)
+    generation = await cache.call_async(cache.current_generation)
+    params = {**filters, "sort": sort, "cursor": cursor, "skip": skip, "limit": limit}
+    key = cache.listing_key("list", params, generation)
+    cached = await cache.call_async(_cached_json, key, request)
+    if cached is not None:
+        return cached
+
+    products = await crud_async.list_products(
+        db,
+        sort=sort,
+        after=decode_cursor_param(cursor, sort),
+        skip=skip,
+        limit=limit + 1 if cursor is not None else limit,
+        **filters,
+    )
+    etag = _listing_etag(products, params)
+    if _not_modified(request, etag, None):
+        return _not_modified_response(etag)
+    return await cache.call_async(
+        _store_body,
+        key,
+        build_product_listing(products, cursor, sort, limit),
+        generation,
+        etag=etag,
+    )
+
+
+async def _export_chunks(
+    export_format: str, sort: Optional[str], filters: dict
+) -> AsyncIterator[str]:
+    """Serializa el catalogo filtrado en bloques de ~64 KB."""
+
+    # La sesion vive tanto como el stream: la de get_async_db se cierra antes.
+    encoder = ExportEncoder(export_format)
+    async with AsyncSessionLocal() as db:
+        async for product in crud_async.iter_products(db, sort=sort, **filters):
+            chunk = encoder.add(product)
+            if chunk:
+                yield chunk
+    chunk = encoder.flush()
+    if chunk:
+        yield chunk
+
+
+@router.get("/export")
+async def export_products(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    filters: dict = Depends(product_filters),
+    sort: Optional[str] = SortQuery,
+) -> StreamingResponse:
+    """Exporta todo el catalogo filtrado como NDJSON o CSV en streaming."""
+
+    return StreamingResponse(
+        _export_chunks(format, sort, filters),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="productos.{format}"'},
+    )
+
+
+@router.get("/facets", response_model=schemas.ProductFacets)
+async def product_facets(
+    filters: dict = Depends(product_filters),
+    db: AsyncSession = Depends(get_async_db),
+) -> schemas.ProductFacets:
+    """Conteos por categoria, deporte, marca y color y rango de precios."""
+
+    generation = await cache.call_async(cache.current_generation)
+    key = cache.listing_key("facets", filters, generation)
+    cached = await cache.call_async(_cached_json, key)
+    if cached is not None:
+        return cached
+
+    facets = await crud_async.product_facets(db, **filters)
+    return await cache.call_async(
+        _store_json, key, facets, generation, get_settings().facets_cache_ttl_seconds
+    )
+
+
+@router.get("/suggest", response_model=List[schemas.ProductSuggestion])
+async def suggest_products(
+    q: str = Query(..., min_length=1, max_length=100, description="Prefijo escrito"),
+    limit: int = Query(5, ge=1, le=20),
+    disponible: Optional[bool] = Query(None),
+    db: AsyncSession = Depends(get_async_db),
+) -> JSONResponse:
+    """Sugerencias de autocompletado por prefijo de nombre o marca."""
+
+    suggestions = await crud_async.suggest_products(
+        db, q, limit=limit, disponible=disponible
+    )
+    return JSONResponse(
+        [
+            serialization.suggestion_dict(suggestion) for suggestion in suggestions
+        ]
+    )
+
+
+@router.post("/groups", response_model=List[schemas.ProductGroup])
+async def list_product_groups(
+    payload: schemas.ProductGroupsRequest,
+    db: AsyncSession = Depends(get_async_db),
+) -> List[schemas.ProductGroup]:
+    """Primeros productos de varios grupos de filtros en una sola consulta."""
+
+    filters = [group.dict(exclude={"key"}) for group in payload.groups]
+    results = await crud_async.list_product_groups(db, filters, limit=payload.limit)
+    return _json_response(build_product_groups([group.key for group in payload.groups], results))
+
+
+@router.post("/batch-get", response_model=schemas.ProductBatchGetResponse)
+async def batch_get_products(
+    payload: schemas.ProductBatchGetRequest,
+    db: AsyncSession = Depends(get_async_db),
+) -> schemas.ProductBatchGetResponse:
+    """Devuelve varios productos por id en una sola consulta."""
+
+    products = await crud_async.get_products_by_ids(db, payload.ids)
+    return _json_response(build_batch_get(payload.ids, products))
+
+
+@router.patch("/stock", response_model=schemas.StockBatchResult)
+async def update_stock_batch(
+    changes: schemas.StockChangeBatch = Body(...),
+    db: AsyncSession = Depends(get_async_db),
+) -> schemas.StockBatchResult:
+    """Aplica ``[{id, stock}]`` o ``[{id, delta}]`` en una sola sentencia y transaccion."""
+
+    updated, missing, rejected = await crud_async.bulk_update_stock(db, changes)
+    return _json_response(build_stock_batch(updated, missing, rejected))
+
+
+async def _import_lines(
+    db: AsyncSession,
+    parser: bulk.RecordParser,
+    lines: Optional[List[str]],
+    result: schemas.ProductBulkResult,
+) -> None:
+    """Parsea y valida un bloque en el threadpool y lo inserta por ``AsyncSession``."""
+
+    valid = await run_in_threadpool(parse_import_lines, parser, lines, result)
+    if not valid:
+        return
+    try:
+        skipped = await crud_async.bulk_insert_products(db, [row for _, row in valid])
+    except import_database_errors(db.get_bind()) as error:
+        record_import(result, valid, [], error)
+    else:
+        record_import(result, valid, skipped)
+
+
+@router.post("/bulk", response_model=schemas.ProductBulkResult)
+async def bulk_import_products(
+    request: Request,
+    format: str = Query("ndjson", pattern=f"^({'|'.join(bulk.BULK_FORMATS)})$"),
+    db: AsyncSession = Depends(get_async_db),
+) -> schemas.ProductBulkResult:
+    """Importa productos desde un cuerpo NDJSON o CSV (mismas columnas que la exportacion)."""
+
+    result = schemas.ProductBulkResult()
+    parser = bulk.record_parser(format)
+    async for lines in bulk.iter_line_batches(request.stream()):
+        await _import_lines(db, parser, lines, result)
+    await _import_lines(db, parser, None, result)
+    return result
+
+
+@router.get("/{product_id}", response_model=schemas.Product)
+async def retrieve_product(
+    product_id: int, request: Request, db: AsyncSession = Depends(get_async_db)
+) -> schemas.Product:
+    """Devuelve un producto concreto (admite If-None-Match e If-Modified-Since)."""
+
+    generation = await cache.call_async(cache.current_generation)
+    key = cache.product_key(product_id)
+    cached = await cache.call_async(_cached_json, key, request)
+    if cached is not None:
+        return cached
+
+    product = await crud_async.get_product(db, product_id)
+    if not product:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Producto no encontrado"
+        )
+    etag, last_modified = _product_validators(product)
+    if _not_modified(request, etag, last_modified):
+        return _not_modified_response(etag, last_modified)
+    return await cache.call_async(
+        _store_body,
+        key,
+        serialization.product_json(product),
+        generation,
+        etag=etag,
+        last_modified=last_modified,
+    )
+
+
+@router.post(
+    "",
+    response_model=schemas.Product,
+    status_code=status.HTTP_201_CREATED,
+)
+async def create_product(
+    product_in: schemas.ProductCreateRequest,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_async_db),
+) -> schemas.Product:
+    """Crea un producto (deberia ser accesible solo para administradores)."""
+
+    product_data = product_in.dict(
+        exclude={"imagen_base64", "imagen_nombre", "imagen_mime"}
+    )
+    if product_in.imagen_base64:
+        product_data["imagen_url"] = await run_in_threadpool(
+            _store_product_image,
+            product_in.imagen_base64,
+            product_in.imagen_nombre,
+            product_in.imagen_mime,
+        )
+
+    product = await crud_async.create_product(db, schemas.ProductCreate(**product_data))
+    if product is None:
+        if product_in.imagen_base64:
+            await crud_async.discard_unreferenced_image(db, product_data["imagen_url"])
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=DUPLICATE_PRODUCT_MESSAGE,
+        )
+    background_tasks.add_task(variants.process_product_image, product.id, product.imagen_url)
+    return _serialize_product(product)
+
+
+@router.put("/{product_id}", response_model=schemas.Product)
+async def update_product(
+    product_id: int,
+    updates: schemas.ProductUpdateRequest,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_async_db),
+) -> schemas.Product:
+    """Actualiza todos los campos enviados."""
+
+    product = await crud_async.get_product(db, product_id)
+    if not product:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Producto no encontrado"
+        )
+    previous_image = product.imagen_url
+    update_data = updates.dict(
+        exclude_unset=True, exclude={"imagen_base64", "imagen_nombre", "imagen_mime"}
+    )
+    if updates.imagen_base64:
+        update_data["imagen_url"] = await run_in_threadpool(
+            _store_product_image,
+            updates.imagen_base64,
+            updates.imagen_nombre,
+            updates.imagen_mime,
+        )
+
+    updated = await crud_async.update_product(db, product, schemas.ProductUpdate(**update_data))
+    if updated is None:
+        if updates.imagen_base64:
+            await crud_async.discard_unreferenced_image(db, update_data["imagen_url"])
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=DUPLICATE_PRODUCT_MESSAGE,
+        )
+    if previous_image != updated.imagen_url:
+        background_tasks.add_task(variants.process_product_image, updated.id, updated.imagen_url)
+    return _serialize_product(updated)
+
+
+async def _assign_uploaded_image(
+    product_id: int, image_url: str
+) -> Tuple[bool, Optional[schemas.Product]]:
+    """Asigna una imagen ya guardada: ``(existe, producto actualizado o None)``."""
+
+    async with AsyncSessionLocal() as db:
+        product = await crud_async.get_product(db, product_id)
+        updated = None
+        if product is not None:
+            updated = await crud_async.update_product(
+                db, product, schemas.ProductUpdate(imagen_url=image_url)
+            )
+        if updated is None:
+            await crud_async.discard_unreferenced_image(db, image_url)
+            return product is not None, None
+        return True, _serialize_product(updated)
+
+
+@router.post("/{product_id}/image", response_model=schemas.Product)
+async def upload_product_image(
+    product_id: int,
+    request: Request,
+    background_tasks: BackgroundTasks,
+) -> schemas.Product:
+    """Sustituye la imagen con una subida multipart (campo ``imagen``).
+
+    Igual que la ruta sincrona: mientras llega el cuerpo no se retiene
+    ninguna conexion; el producto se comprueba antes y se actualiza despues.
+    """
+
+    async with AsyncSessionLocal() as db:
+        exists = await crud_async.get_product(db, product_id) is not None
+    if not exists:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Producto no encontrado"
+        )
+
+    max_bytes = get_settings().image_max_bytes
+    try:
+        images.check_content_length(request.headers.get("content-length"), max_bytes)
+        image_url = await images.receive_multipart_image(
+            request.headers.get("content-type"), request.stream(), max_bytes
+        )
+    except images.ImageTooLarge as error:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(error)
+        )
+    except images.ImageUploadError as error:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(error))
+    except OSError as error:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"No se pudo guardar la imagen del producto: {error}",
+        )
+
+    found, updated = await _assign_uploaded_image(product_id, image_url)
+    if not found:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Producto no encontrado"
+        )
+    if updated is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="No se pudo actualizar el producto",
+        )
+    if not updated.imagen_variantes:
+        background_tasks.add_task(variants.process_product_image, updated.id, image_url)
+    return updated
+
+
+@router.delete("/{product_id}", response_model=schemas.Product)
+async def delete_product(
+    product_id: int, db: AsyncSession = Depends(get_async_db)
+) -> schemas.Product:
+    """Elimina un producto de forma permanente."""
+
+    product = await crud_async.get_product(db, product_id)
+    if not product:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Producto no encontrado"
+        )
+    deleted_snapshot = _serialize_product(product)
+    await crud_async.delete_product(db, product)
+    return deleted_snapshot
+
+
+@router.patch("/{product_id}/stock", response_model=schemas.Product)
+async def update_stock(
+    product_id: int,
+    payload: schemas.StockUpdate,
+    db: AsyncSession = Depends(get_async_db),
+) -> schemas.Product:
+    """Actualiza solo el stock de un producto."""
+
+    product = await crud_async.get_product(db, product_id)
+    if not product:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Producto no encontrado"
+        )
+    updated = await crud_async.update_stock(db, product, payload.stock)
+    return _serialize_product(updated)
+
+
+def override_routes(target: APIRouter, source: APIRouter = router) -> None:
+    """Sustituye en ``target`` las rutas que tienen version asincrona en ``source``."""
+
+    replacements = {
+        (route.path, frozenset(route.methods)): route for route in source.routes
+    }
+    target.routes[:] = [
+        replacements.get((route.path, frozenset(getattr(route, "methods", ()))), route)
+        for route in target.routes
+    ]
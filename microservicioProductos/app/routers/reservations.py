@@ -0,0 +1,108 @@
+"""Rutas de reservas de stock para el checkout."""
+
+from collections import Counter
+from datetime import timezone
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+
+from .. import crud, models, schemas
+from ..config import get_settings
+from ..database import get_db
+
+router = APIRouter(prefix="/products/reservations", tags=["reservations"])
+
+
+def _serialize_reservation(reservation: models.Reservation) -> schemas.Reservation:
+    caduca_en = reservation.caduca_en
+    if caduca_en.tzinfo is None:
+        # SQLite devuelve las fechas sin zona; se guardan en UTC.
+        caduca_en = caduca_en.replace(tzinfo=timezone.utc)
+    return schemas.Reservation(
+        id=reservation.id,
+        estado=reservation.estado,
+        caduca_en=caduca_en,
+        items=[
+            schemas.ReservationLine(id=line.producto_id, cantidad=line.cantidad)
+            for line in reservation.lineas
+        ],
+    )
+
+
+def _get_reservation_or_404(db: Session, reservation_id: str) -> models.Reservation:
+    reservation = crud.get_reservation(db, reservation_id)
+    if not reservation:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Reserva no encontrada"
+        )
+    return reservation
+
+
+@router.post("", response_model=schemas.Reservation, status_code=status.HTTP_201_CREATED)
+def create_reservation(
+    payload: schemas.ReservationCreate,
+    db: Session = Depends(get_db),
+) -> schemas.Reservation:
+    """Descuenta el stock de todas las lineas de forma atomica (todas o ninguna).
+
+    Responde 409 con los ids sin unidades suficientes si alguna linea no
+    se puede reservar; en ese caso no se modifica ningun stock.
+    """
+
+    quantities = Counter()
+    for line in payload.items:
+        quantities[line.id] += line.cantidad
+    ttl = payload.ttl_segundos or get_settings().reservation_ttl_seconds
+
+    reservation, unavailable = crud.reserve_stock(db, quantities, ttl)
+    if reservation is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={"message": "Stock insuficiente", "unavailable": unavailable},
+        )
+    return _serialize_reservation(reservation)
+
+
+@router.get("/{reservation_id}", response_model=schemas.Reservation)
+def retrieve_reservation(
+    reservation_id: str, db: Session = Depends(get_db)
+) -> schemas.Reservation:
+    """Devuelve el estado de una reserva."""
+
+    return _serialize_reservation(_get_reservation_or_404(db, reservation_id))
+
+
+@router.post("/{reservation_id}/confirm", response_model=schemas.Reservation)
+def confirm_reservation(
+    reservation_id: str, db: Session = Depends(get_db)
+) -> schemas.Reservation:
+    """Confirma una reserva pendiente: el stock queda descontado."""
+
+    _get_reservation_or_404(db, reservation_id)
+    if not crud.confirm_reservation(db, reservation_id):
+        reservation = _get_reservation_or_404(db, reservation_id)
+        if reservation.estado != crud.RESERVATION_CONFIRMED:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"La reserva no se puede confirmar (estado: {reservation.estado})",
+            )
+    db.expire_all()
+    return _serialize_reservation(_get_reservation_or_404(db, reservation_id))
+
+
+@router.delete("/{reservation_id}", response_model=schemas.Reservation)
+def release_reservation(
+    reservation_id: str, db: Session = Depends(get_db)
+) -> schemas.Reservation:
+    """Libera una reserva pendiente y devuelve sus unidades al stock."""
+
+    _get_reservation_or_404(db, reservation_id)
+    if not crud.release_reservation(db, reservation_id):
+        reservation = _get_reservation_or_404(db, reservation_id)
+        if reservation.estado == crud.RESERVATION_CONFIRMED:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="La reserva ya esta confirmada",
+            )
+    db.expire_all()
+    return _serialize_reservation(_get_reservation_or_404(db, reservation_id))
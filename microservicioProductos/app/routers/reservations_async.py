@@ -0,0 +1,92 @@
+"""Rutas asincronas de reservas de stock (PRODUCTS_DATABASE_ASYNC=true).
+
+Replican ``reservations`` sobre ``AsyncSession``; ``products_async.override_routes``
+las coloca en el router sincrono.
+"""
+
+from collections import Counter
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .. import crud, crud_async, models, schemas
+from ..config import get_settings
+from ..database import get_async_db
+from .reservations import _serialize_reservation
+
+router = APIRouter(prefix="/products/reservations", tags=["reservations"])
+
+
+async def _get_reservation_or_404(db: AsyncSession, reservation_id: str) -> models.Reservation:
+    reservation = await crud_async.get_reservation(db, reservation_id)
+    if not reservation:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Reserva no encontrada"
+        )
+    return reservation
+
+
+@router.post("", response_model=schemas.Reservation, status_code=status.HTTP_201_CREATED)
+async def create_reservation(
+    payload: schemas.ReservationCreate,
+    db: AsyncSession = Depends(get_async_db),
+) -> schemas.Reservation:
+    """Descuenta el stock de todas las lineas de forma atomica (todas o ninguna)."""
+
+    quantities = Counter()
+    for line in payload.items:
+        quantities[line.id] += line.cantidad
+    ttl = payload.ttl_segundos or get_settings().reservation_ttl_seconds
+
+    reservation, unavailable = await crud_async.reserve_stock(db, quantities, ttl)
+    if reservation is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={"message": "Stock insuficiente", "unavailable": unavailable},
+        )
+    return _serialize_reservation(reservation)
+
+
+@router.get("/{reservation_id}", response_model=schemas.Reservation)
+async def retrieve_reservation(
+    reservation_id: str, db: AsyncSession = Depends(get_async_db)
+) -> schemas.Reservation:
+    """Devuelve el estado de una reserva."""
+
+    return _serialize_reservation(await _get_reservation_or_404(db, reservation_id))
+
+
+@router.post("/{reservation_id}/confirm", response_model=schemas.Reservation)
+async def confirm_reservation(
+    reservation_id: str, db: AsyncSession = Depends(get_async_db)
+) -> schemas.Reservation:
+    """Confirma una reserva pendiente: el stock queda descontado."""
+
+    await _get_reservation_or_404(db, reservation_id)
+    if not await crud_async.confirm_reservation(db, reservation_id):
+        reservation = await _get_reservation_or_404(db, reservation_id)
+        if reservation.estado != crud.RESERVATION_CONFIRMED:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"La reserva no se puede confirmar (estado: {reservation.estado})",
+            )
+    db.expire_all()
+    return _serialize_reservation(await _get_reservation_or_404(db, reservation_id))
+
+
+@router.delete("/{reservation_id}", response_model=schemas.Reservation)
+async def release_reservation(
+    reservation_id: str, db: AsyncSession = Depends(get_async_db)
+) -> schemas.Reservation:
+    """Libera una reserva pendiente y devuelve sus unidades al stock."""
+
+    await _get_reservation_or_404(db, reservation_id)
+    if not await crud_async.release_reservation(db, reservation_id):
+        reservation = await _get_reservation_or_404(db, reservation_id)
+        if reservation.estado == crud.RESERVATION_CONFIRMED:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="La reserva ya esta confirmada",
+            )
+    db.expire_all()
+    return _serialize_reservation(await _get_reservation_or_404(db, reservation_id))
@@ -1,9 +1,10 @@
 """Esquemas Pydantic para validar solicitudes y respuestas."""
 
+from datetime import datetime
 from decimal import Decimal
-from typing import Optional
+from typing import Dict, List, Optional
 
-from pydantic import BaseModel, Field, condecimal
+from pydantic import BaseModel, Field, condecimal, conlist, root_validator
 
 
 class ProductBase(BaseModel):
@@ -74,16 +75,174 @@ class ProductUpdateRequest(ProductUpdate):
     )
 
 
+ImageVariants = Dict[str, Dict[str, str]]
+
+
 class Product(ProductBase):
     """Representacion completa enviada al cliente."""
 
     id: int
+    imagen_variantes: Optional[ImageVariants] = Field(
+        None,
+        description="URLs de la imagen redimensionada por tamano y formato; "
+        "null mientras se procesa o si la imagen es externa",
+        example={
+            "thumb": {"webp": "https://cdn.sport4data.com/img/zapatillas-pro-thumb.webp"},
+            "medium": {"webp": "https://cdn.sport4data.com/img/zapatillas-pro-medium.webp"},
+        },
+    )
 
     class Config:
         orm_mode = True
 
 
+class ProductSuggestion(BaseModel):
+    """Campos minimos que muestra el desplegable de sugerencias."""
+
+    id: int
+    nombre: str
+    categoria: Optional[str] = None
+    deporte: Optional[str] = None
+    imagen_url: Optional[str] = None
+    imagen_variantes: Optional[ImageVariants] = None
+
+
+class FacetValue(BaseModel):
+    """Numero de productos que tienen un valor concreto."""
+
+    valor: str
+    total: int
+
+
+class ProductFacets(BaseModel):
+    """Valores disponibles para cada filtro segun los filtros aplicados."""
+
+    total: int
+    precio_min: Optional[Decimal] = None
+    precio_max: Optional[Decimal] = None
+    categoria: List[FacetValue] = []
+    deporte: List[FacetValue] = []
+    marca: List[FacetValue] = []
+    color: List[FacetValue] = []
+
+
+class ProductGroupFilter(BaseModel):
+    """Filtros de un grupo (por ejemplo, una tarjeta de la portada)."""
+
+    key: Optional[str] = Field(None, description="Identificador libre devuelto tal cual")
+    categoria: Optional[str] = None
+    deporte: Optional[str] = None
+    marca: Optional[str] = None
+    precio_min: Optional[Decimal] = Field(None, ge=0)
+    precio_max: Optional[Decimal] = Field(None, ge=0)
+    disponible: Optional[bool] = None
+
+
+class ProductGroupsRequest(BaseModel):
+    """Lote de grupos de filtros resuelto en una sola consulta."""
+
+    groups: List[ProductGroupFilter] = Field(..., min_items=1, max_items=50)
+    limit: int = Field(3, ge=1, le=20, description="Productos por grupo")
+
+
+class ProductGroup(BaseModel):
+    """Productos de un grupo, en el mismo orden en que se pidio."""
+
+    key: Optional[str] = None
+    items: List[Product]
+
+
+class ProductBatchGetRequest(BaseModel):
+    """Ids de productos a recuperar en una sola consulta."""
+
+    ids: List[int] = Field(..., min_items=1, max_items=200, example=[1, 2, 3])
+
+
+class ProductBatchGetResponse(BaseModel):
+    """Productos encontrados (en el orden pedido) e ids inexistentes."""
+
+    items: List[Product]
+    missing: List[int] = []
+
+
+class ProductPage(BaseModel):
+    """Pagina de productos obtenida con paginacion por cursor."""
+
+    items: List[Product]
+    next_cursor: Optional[str] = Field(
+        None, description="Cursor para pedir la pagina siguiente; nulo al final"
+    )
+
+
+class ProductBulkError(BaseModel):
+    """Fila de una importacion masiva que no se pudo insertar."""
+
+    linea: int = Field(..., description="Linea del fichero donde empieza el registro")
+    errores: List[str]
+
+
+class ProductBulkResult(BaseModel):
+    """Resumen de una importacion masiva."""
+
+    recibidos: int = 0
+    insertados: int = 0
+    errores: List[ProductBulkError] = []
+
+
 class StockUpdate(BaseModel):
     """Cuerpo minimo para actualizar el stock."""
 
     stock: int = Field(..., ge=0, example=25)
+
+
+class StockChange(BaseModel):
+    """Cambio de stock de un producto: valor absoluto o incremento."""
+
+    id: int
+    stock: Optional[int] = Field(None, ge=0, example=25)
+    delta: Optional[int] = Field(None, example=-2)
+
+    @root_validator(skip_on_failure=True)
+    def _one_of_stock_or_delta(cls, values):
+        if (values.get("stock") is None) == (values.get("delta") is None):
+            raise ValueError("Indica exactamente uno de 'stock' o 'delta'")
+        return values
+
+
+StockChangeBatch = conlist(StockChange, min_items=1, max_items=5000)
+
+
+class StockBatchResult(BaseModel):
+    """Resultado de una actualizacion de stock por lotes."""
+
+    items: List[Product]
+    missing: List[int] = Field([], description="Ids que no existen")
+    rejected: List[int] = Field([], description="Ids cuyo stock quedaria negativo")
+
+
+class ReservationLine(BaseModel):
+    """Producto y unidades a reservar."""
+
+    id: int = Field(..., description="Id del producto")
+    cantidad: int = Field(..., gt=0, example=2)
+
+    class Config:
+        orm_mode = True
+
+
+class ReservationCreate(BaseModel):
+    """Lineas a reservar de forma atomica (todas o ninguna)."""
+
+    items: List[ReservationLine] = Field(..., min_items=1, max_items=100)
+    ttl_segundos: Optional[int] = Field(
+        None, gt=0, le=86400, description="Caducidad; por defecto PRODUCTS_RESERVATION_TTL"
+    )
+
+
+class Reservation(BaseModel):
+    """Estado de una reserva de stock."""
+
+    id: str
+    estado: str = Field(..., description="pendiente, confirmada, liberada o caducada")
+    caduca_en: datetime
+    items: List[ReservationLine]
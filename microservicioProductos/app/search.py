@@ -0,0 +1,189 @@
+"""Busqueda de texto completo sobre el catalogo de productos.
+
+En PostgreSQL se usa un ``tsvector`` ponderado cubierto por un indice GIN. En
+otros motores (SQLite en pruebas locales) se mantiene un indice invertido en
+memoria con la misma normalizacion: minusculas, sin acentos y por tokens.
+"""
+
+from __future__ import annotations
+
+import re
+import threading
+import unicodedata
+from bisect import bisect_left, insort
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+from sqlalchemy import func, literal_column
+
+ACCENTED_CHARS = "áàäâãéèëêíìïîóòöôõúùüûñç"
+PLAIN_CHARS = "aaaaaeeeeiiiiooooouuuunc"
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Peso de cada campo: equivalen a las clases A/B/C de setweight en PostgreSQL.
+FIELD_WEIGHTS = {
+    "nombre": 4.0,
+    "marca": 2.0,
+    "categoria": 2.0,
+    "deporte": 2.0,
+    "descripcion": 1.0,
+}
+SEARCH_FIELDS = tuple(FIELD_WEIGHTS)
+
+
+def normalize_text(value: Optional[str]) -> str:
+    """Pasa a minusculas y elimina tildes y diacriticos."""
+
+    decomposed = unicodedata.normalize("NFKD", value or "")
+    return "".join(char for char in decomposed if not unicodedata.combining(char)).lower()
+
+
+def tokenize(value: Optional[str]) -> List[str]:
+    """Divide un texto normalizado en terminos alfanumericos."""
+
+    return TOKEN_PATTERN.findall(normalize_text(value))
+
+
+def _fold(column):
+    # translate/lower/coalesce son IMMUTABLE, asi que sirven en un indice.
+    return func.translate(
+        func.lower(func.coalesce(column, literal_column("''"))),
+        literal_column(f"'{ACCENTED_CHARS}'"),
+        literal_column(f"'{PLAIN_CHARS}'"),
+    )
+
+
+def _weighted_vector(weight: str, *columns):
+    text = _fold(columns[0])
+    for column in columns[1:]:
+        text = text.op("||")(literal_column("' '")).op("||")(_fold(column))
+    return func.setweight(
+        func.to_tsvector(literal_column("'simple'"), text), literal_column(f"'{weight}'")
+    )
+
+
+def document_expression(nombre, descripcion, marca, categoria, deporte):
+    """Expresion ``tsvector`` indexada en PostgreSQL (debe coincidir con el indice)."""
+
+    return (
+        _weighted_vector("A", nombre)
+        .op("||")(_weighted_vector("B", marca, categoria, deporte))
+        .op("||")(_weighted_vector("C", descripcion))
+    )
+
+
+def build_tsquery(text: str) -> Optional[str]:
+    """Convierte la busqueda en un ``tsquery`` con coincidencia por prefijo."""
+
+    tokens = tokenize(text)
+    if not tokens:
+        return None
+    return " & ".join(f"{token}:*" for token in tokens)
+
+
+class InvertedIndex:
+    """Indice invertido en memoria con coincidencia por prefijo y ranking."""
+
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+        self._postings: Dict[str, Dict[int, float]] = {}
+        self._documents: Dict[int, Dict[str, float]] = {}
+        self._terms: List[str] = []
+        self.loaded = False
+
+    def replace(self, documents: Iterable[Tuple[int, Mapping[str, Optional[str]]]]) -> None:
+        """Reconstruye el indice completo a partir de los documentos dados."""
+
+        with self._lock:
+            self._postings.clear()
+            self._documents.clear()
+            self._terms.clear()
+            for doc_id, fields in documents:
+                self._add(doc_id, fields)
+            self.loaded = True
+
+    def reset(self) -> None:
+        """Vacia el indice; se reconstruira en la siguiente busqueda."""
+
+        with self._lock:
+            self._postings.clear()
+            self._documents.clear()
+            self._terms.clear()
+            self.loaded = False
+
+    def add(self, doc_id: int, fields: Mapping[str, Optional[str]]) -> None:
+        """Indexa (o reindexa) un documento si el indice ya esta cargado."""
+
+        with self._lock:
+            if not self.loaded:
+                return
+            self._remove(doc_id)
+            self._add(doc_id, fields)
+
+    def remove(self, doc_id: int) -> None:
+        """Quita un documento del indice."""
+
+        with self._lock:
+            if self.loaded:
+                self._remove(doc_id)
+
+    def search(self, text: str) -> List[int]:
+        """Devuelve los ids que contienen todos los terminos, por relevancia."""
+
+        tokens = tokenize(text)
+        with self._lock:
+            scores: Optional[Dict[int, float]] = None
+            for token in tokens:
+                token_scores = self._match_prefix(token)
+                if scores is None:
+                    scores = token_scores
+                else:
+                    scores = {
+                        doc_id: score + token_scores[doc_id]
+                        for doc_id, score in scores.items()
+                        if doc_id in token_scores
+                    }
+                if not scores:
+                    return []
+        ranked = sorted((scores or {}).items(), key=lambda item: (-item[1], item[0]))
+        return [doc_id for doc_id, _ in ranked]
+
+    def _match_prefix(self, token: str) -> Dict[int, float]:
+        matches: Dict[int, float] = {}
+        position = bisect_left(self._terms, token)
+        while position < len(self._terms) and self._terms[position].startswith(token):
+            term = self._terms[position]
+            # Un termino completo puntua mas que uno que solo comparte prefijo.
+            factor = 1.0 if term == token else 0.5
+            for doc_id, weight in self._postings[term].items():
+                matches[doc_id] = max(matches.get(doc_id, 0.0), weight * factor)
+            position += 1
+        return matches
+
+    def _add(self, doc_id: int, fields: Mapping[str, Optional[str]]) -> None:
+        weights: Dict[str, float] = {}
+        for field, field_weight in FIELD_WEIGHTS.items():
+            for token in tokenize(fields.get(field)):
+                weights[token] = weights.get(token, 0.0) + field_weight
+
+        self._documents[doc_id] = weights
+        for token, weight in weights.items():
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = {}
+                insort(self._terms, token)
+            postings[doc_id] = weight
+
+    def _remove(self, doc_id: int) -> None:
+        weights = self._documents.pop(doc_id, None)
+        if not weights:
+            return
+        for token in weights:
+            postings = self._postings.get(token)
+            if postings is None:
+                continue
+            postings.pop(doc_id, None)
+            if not postings:
+                del self._postings[token]
+                position = bisect_left(self._terms, token)
+                if position < len(self._terms) and self._terms[position] == token:
+                    del self._terms[position]
@@ -0,0 +1,148 @@
+"""Serializacion rapida de productos a JSON.
+
+Las rutas de lectura devuelven bytes ya codificados en lugar de modelos
+Pydantic: se evita ``from_orm`` y la segunda validacion de
+``response_model``. El JSON de cada producto se memoriza por
+``(id, version)``; como cualquier escritura incrementa la version, una
+entrada nunca queda obsoleta, y las bajas la descartan con ``forget``.
+
+Usa ``orjson`` si esta instalado y ``json`` de la libreria estandar si no.
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+from collections import OrderedDict
+from decimal import Decimal
+from typing import Any, Dict, Iterable, Optional, Tuple
+from pydantic.json import decimal_encoder
+
+from . import schemas
+from .storage import get_storage
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - dependencia opcional
+    orjson = None
+
+PRODUCT_FIELDS = tuple(schemas.Product.__fields__)
+# La exportacion mantiene las columnas de la importacion: las variantes se derivan.
+EXPORT_FIELDS = tuple(field for field in PRODUCT_FIELDS if field != "imagen_variantes")
+MEMO_MAX_ENTRIES = 10_000
+
+
+def _default(value: Any) -> Any:
+    # Mismo criterio que jsonable_encoder: Decimal -> int o float.
+    if isinstance(value, Decimal):
+        return decimal_encoder(value)
+    raise TypeError(f"Tipo no serializable: {type(value).__name__}")
+
+
+def dumps(value: Any) -> bytes:
+    """Codifica ``value`` como JSON compacto en UTF-8."""
+
+    if orjson is not None:
+        return orjson.dumps(value, default=_default)
+    return json.dumps(
+        value, default=_default, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def resolve_imagen_url(value: Optional[str]) -> Optional[str]:
+    """Devuelve URLs absolutas desde la URL publica del almacen de imagenes."""
+
+    if not value:
+        return value
+
+    normalized = value.strip()
+    if normalized.lower().startswith(("http://", "https://")):
+        return normalized
+
+    path = normalized.replace("\\", "/").lstrip("/")
+    return get_storage().public_url(path)
+
+
+def resolve_image_variants(
+    variants: Optional[schemas.ImageVariants],
+) -> Optional[schemas.ImageVariants]:
+    """Resuelve las rutas de cada variante igual que ``imagen_url``."""
+
+    if not variants:
+        return None
+    return {
+        size: {image_format: resolve_imagen_url(path) for image_format, path in formats.items()}
+        for size, formats in variants.items()
+    }
+
+
+def product_dict(product) -> Dict[str, Any]:
+    """Campos publicos de un producto ORM, con las URLs de imagen resueltas."""
+
+    data = {field: getattr(product, field) for field in PRODUCT_FIELDS}
+    data["imagen_url"] = resolve_imagen_url(data["imagen_url"])
+    data["imagen_variantes"] = resolve_image_variants(data["imagen_variantes"])
+    return data
+
+
+def suggestion_dict(suggestion: Dict[str, Any]) -> Dict[str, Any]:
+    """Sugerencia del indice en memoria con las URLs de imagen resueltas."""
+
+    return {
+        **suggestion,
+        "imagen_url": resolve_imagen_url(suggestion["imagen_url"]),
+        "imagen_variantes": resolve_image_variants(suggestion["imagen_variantes"]),
+    }
+
+
+class _ProductMemo:
+    """LRU acotado de JSON por ``(id, version)``."""
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._blobs: "OrderedDict[int, Tuple[int, bytes]]" = OrderedDict()
+
+    def get(self, product_id: int, version: int) -> Optional[bytes]:
+        with self._lock:
+            entry = self._blobs.get(product_id)
+            if entry is None or entry[0] != version:
+                return None
+            self._blobs.move_to_end(product_id)
+            return entry[1]
+
+    def put(self, product_id: int, version: int, blob: bytes) -> None:
+        with self._lock:
+            self._blobs[product_id] = (version, blob)
+            self._blobs.move_to_end(product_id)
+            while len(self._blobs) > self.max_entries:
+                self._blobs.popitem(last=False)
+
+    def forget(self, product_id: int) -> None:
+        with self._lock:
+            self._blobs.pop(product_id, None)
+
+
+_memo = _ProductMemo(MEMO_MAX_ENTRIES)
+
+
+def product_json(product) -> bytes:
+    """JSON de un producto, reutilizado mientras no cambie su version."""
+
+    blob = _memo.get(product.id, product.version)
+    if blob is None:
+        blob = dumps(product_dict(product))
+        _memo.put(product.id, product.version, blob)
+    return blob
+
+
+def products_json(products: Iterable) -> bytes:
+    """Array JSON concatenando los fragmentos memorizados."""
+
+    return b"[" + b",".join(product_json(product) for product in products) + b"]"
+
+
+def forget(product_id: int) -> None:
+    """Descarta el JSON memorizado de un producto (bajas y recargas)."""
+
+    _memo.forget(product_id)
@@ -0,0 +1,223 @@
+"""Instantanea columnar del catalogo para resolver filtros en memoria.
+
+Con ``PRODUCTS_CATALOG_SNAPSHOT=true`` (y ``numpy`` instalado) la tabla
+``producto`` se carga en arrays por columna: categoria, deporte, marca y
+color codificados con diccionario, precio en centimos, stock, disponible e
+id. Los filtros del listado se resuelven con mascaras booleanas
+vectorizadas y la ordenacion con ``argsort``/``lexsort``; la base de datos
+solo carga despues las filas de la pagina por id.
+
+Las escrituras de este proceso actualizan la instantanea al momento
+(``upsert``/``remove``). Las de otros workers no llegan aqui, asi que la
+instantanea se recarga entera cuando supera
+``PRODUCTS_CATALOG_SNAPSHOT_MAX_AGE`` segundos.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from decimal import Decimal
+from functools import lru_cache
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+from .config import get_settings
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - dependencia opcional
+    np = None
+
+ENCODED_FIELDS = ("categoria", "deporte", "marca", "color")
+SNAPSHOT_COLUMNS = ("id", *ENCODED_FIELDS, "precio", "stock", "disponible")
+# Ordenaciones numericas: columna principal (o solo id) y si es descendente.
+# "nombre" depende de la collation de la base de datos y se deja a SQL.
+SORT_COLUMNS = {
+    "id": (None, False),
+    "precio": ("precio", False),
+    "precio_desc": ("precio", True),
+    "stock": ("stock", False),
+    "newest": (None, True),
+}
+SUPPORTED_SORTS = tuple(SORT_COLUMNS)
+MISSING_CODE = -1
+
+
+def _cents(value) -> int:
+    return int((Decimal(str(value)) * 100).to_integral_value())
+
+
+class CatalogSnapshot:
+    """Columnas del catalogo en arrays de NumPy con altas y bajas incrementales."""
+
+    def __init__(self, max_age_seconds: float) -> None:
+        self.max_age_seconds = max_age_seconds
+        self._lock = threading.RLock()
+        self._loaded_at: Optional[float] = None
+        self._size = 0
+        self._positions: Dict[int, int] = {}
+        self._dictionaries: Dict[str, Dict[str, int]] = {}
+        self._columns: Dict[str, "np.ndarray"] = {}
+
+    @property
+    def fresh(self) -> bool:
+        loaded_at = self._loaded_at
+        return loaded_at is not None and time.monotonic() - loaded_at < self.max_age_seconds
+
+    def replace(self, rows: Iterable[Mapping[str, object]]) -> None:
+        """Reconstruye todas las columnas a partir de las filas dadas."""
+
+        with self._lock:
+            self._dictionaries = {field: {} for field in ENCODED_FIELDS}
+            self._positions = {}
+            values: Dict[str, list] = {column: [] for column in SNAPSHOT_COLUMNS}
+            for row in rows:
+                self._positions[row["id"]] = len(values["id"])
+                for column, value in self._encode(row).items():
+                    values[column].append(value)
+
+            self._size = len(values["id"])
+            capacity = max(self._size, 1024)
+            self._columns = {
+                "id": np.zeros(capacity, dtype=np.int64),
+                "precio": np.zeros(capacity, dtype=np.int64),
+                "stock": np.zeros(capacity, dtype=np.int64),
+                "disponible": np.zeros(capacity, dtype=bool),
+                "vivo": np.zeros(capacity, dtype=bool),
+            }
+            for field in ENCODED_FIELDS:
+                self._columns[field] = np.full(capacity, MISSING_CODE, dtype=np.int32)
+            for column, column_values in values.items():
+                self._columns[column][: self._size] = column_values
+            self._columns["vivo"][: self._size] = True
+            self._loaded_at = time.monotonic()
+
+    def reset(self) -> None:
+        """Descarta la instantanea; se recargara en la siguiente consulta."""
+
+        with self._lock:
+            self._loaded_at = None
+
+    def upsert(self, row: Mapping[str, object]) -> None:
+        """Aplica el alta o modificacion de un producto si ya hay instantanea."""
+
+        with self._lock:
+            if self._loaded_at is None:
+                return
+            position = self._positions.get(row["id"])
+            if position is None:
+                position = self._append_slot()
+                self._positions[row["id"]] = position
+            for column, value in self._encode(row).items():
+                self._columns[column][position] = value
+            self._columns["vivo"][position] = True
+
+    def remove(self, product_id: int) -> None:
+        """Marca como borrada la fila de un producto."""
+
+        with self._lock:
+            position = self._positions.pop(product_id, None)
+            if position is not None:
+                self._columns["vivo"][position] = False
+
+    def query(
+        self,
+        *,
+        sort: str = "id",
+        after: Optional[Tuple] = None,
+        skip: int = 0,
+        limit: int = 20,
+        categoria: Optional[str] = None,
+        deporte: Optional[str] = None,
+        marca: Optional[str] = None,
+        precio_min=None,
+        precio_max=None,
+        disponible: Optional[bool] = None,
+    ) -> List[int]:
+        """Ids de la pagina pedida, en el mismo orden que devolveria SQL."""
+
+        exact = {"categoria": categoria, "deporte": deporte, "marca": marca}
+        with self._lock:
+            size = self._size
+            columns = {name: column[:size] for name, column in self._columns.items()}
+            mask = columns["vivo"].copy()
+            for field, value in exact.items():
+                if not value:
+                    continue
+                code = self._dictionaries[field].get(value)
+                if code is None:
+                    return []
+                mask &= columns[field] == code
+            if precio_min is not None:
+                mask &= columns["precio"] >= _cents(precio_min)
+            if precio_max is not None:
+                mask &= columns["precio"] <= _cents(precio_max)
+            if disponible is not None:
+                mask &= columns["disponible"] == disponible
+            ids = columns["id"][mask]
+            primary_column, descending = SORT_COLUMNS[sort]
+            primary = columns[primary_column][mask] if primary_column else None
+
+        # Clave unica por fila (columna principal, id) en un solo entero; se
+        # niega en las ordenaciones descendentes para seleccionar siempre minimos.
+        scale = int(max(ids.max(initial=0), after[-1] if after else 0)) + 1
+        keys = ids if primary is None else primary * scale + ids
+        if descending:
+            keys = -keys
+
+        if after is not None:
+            after_key = int(after[-1])
+            if primary_column == "precio":
+                after_key += _cents(after[0]) * scale
+            elif primary_column:
+                after_key += int(after[0]) * scale
+            keep = keys > (-after_key if descending else after_key)
+            ids, keys = ids[keep], keys[keep]
+            skip = 0
+
+        wanted = skip + limit
+        if wanted < len(keys):
+            # Seleccion parcial O(n): solo se ordenan las primeras ``wanted`` filas.
+            candidates = np.argpartition(keys, wanted - 1)[:wanted]
+            order = candidates[np.argsort(keys[candidates])]
+        else:
+            order = np.argsort(keys)
+        return ids[order[skip:wanted]].tolist()
+
+    def _append_slot(self) -> int:
+        position = self._size
+        if position == len(self._columns["id"]):
+            for name, column in self._columns.items():
+                grown = np.zeros(len(column) * 2, dtype=column.dtype)
+                if name in ENCODED_FIELDS:
+                    grown.fill(MISSING_CODE)
+                grown[:position] = column
+                self._columns[name] = grown
+        self._size += 1
+        return position
+
+    def _encode(self, row: Mapping[str, object]) -> Dict[str, object]:
+        encoded: Dict[str, object] = {
+            "id": row["id"],
+            "precio": _cents(row["precio"]),
+            "stock": row["stock"],
+            "disponible": bool(row["disponible"]),
+        }
+        for field in ENCODED_FIELDS:
+            value = row[field]
+            if value is None:
+                encoded[field] = MISSING_CODE
+                continue
+            dictionary = self._dictionaries[field]
+            encoded[field] = dictionary.setdefault(value, len(dictionary))
+        return encoded
+
+
+@lru_cache()
+def get_snapshot() -> Optional[CatalogSnapshot]:
+    """Instantanea del proceso, o ``None`` si esta desactivada o falta numpy."""
+
+    settings = get_settings()
+    if not settings.catalog_snapshot or np is None:
+        return None
+    return CatalogSnapshot(settings.catalog_snapshot_max_age_seconds)
@@ -0,0 +1,346 @@
+"""Servicio de los ficheros estaticos (imagenes de producto).
+
+``StaticAssets`` amplia ``StaticFiles`` con:
+
+- ``Cache-Control`` de larga duracion: inmutable para las rutas
+  direccionadas por contenido y ``PRODUCTS_STATIC_MAX_AGE`` para el resto.
+- ETag / Last-Modified con 304 (``If-None-Match`` tiene prioridad sobre
+  ``If-Modified-Since``, como indica RFC 9110).
+- Versiones precomprimidas ``.br`` / ``.gz`` de SVG, CSS, JS y similares
+  segun ``Accept-Encoding`` (se generan con ``python -m app.static precompress``).
+- Peticiones ``Range`` de un solo rango (206 / 416).
+- Modo ``X-Accel-Redirect``: con ``PRODUCTS_STATIC_ACCEL_REDIRECT`` la API
+  solo valida la ruta y nginx envia el fichero con ``sendfile``, sin pasar
+  los bytes por Python (``python -m app.static nginx`` genera la
+  configuracion).
+
+Sin nginx, Starlette usa la extension ASGI ``http.response.pathsend`` si el
+servidor la ofrece (envio sin copia); si no, lee el fichero por bloques.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import os
+import re
+from email.utils import formatdate
+from mimetypes import guess_type
+from pathlib import Path, PurePath
+from typing import Iterator, List, Optional, Tuple
+from urllib.parse import quote
+
+import anyio
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse
+from starlette.types import Receive, Scope, Send
+
+from . import images
+from .config import get_settings
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - dependencia opcional
+    brotli = None
+
+# Un ano: el contenido de una ruta direccionada por contenido nunca cambia.
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Formatos de texto que compensa precomprimir (las imagenes ya van comprimidas).
+COMPRESSIBLE_SUFFIXES = (".svg", ".css", ".js", ".mjs", ".json", ".map", ".txt", ".html", ".xml")
+# Codificacion -> extension del fichero precomprimido, por orden de preferencia.
+PRECOMPRESSED_ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+DEFAULT_ACCEL_PREFIX = "/_static/"
+
+
+def cache_control(relative_path: str) -> str:
+    """Politica de cache de una ruta del directorio estatico."""
+
+    if images.is_content_addressed(relative_path):
+        return IMMUTABLE_CACHE_CONTROL
+    return f"public, max-age={get_settings().static_max_age_seconds}"
+
+
+def _accepted_encodings(request_headers: Headers) -> set:
+    accepted = set()
+    for item in request_headers.get("accept-encoding", "").split(","):
+        coding, _, params = item.strip().partition(";")
+        if params.replace(" ", "").lower() in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        accepted.add(coding.strip().lower())
+    return accepted
+
+
+def _precompressed(
+    full_path: str, request_headers: Headers
+) -> Optional[Tuple[str, os.stat_result, str]]:
+    """Fichero precomprimido aceptado por el cliente: (ruta, stat, codificacion)."""
+
+    accepted = _accepted_encodings(request_headers)
+    for encoding, suffix in PRECOMPRESSED_ENCODINGS:
+        if encoding not in accepted and "*" not in accepted:
+            continue
+        candidate = f"{full_path}{suffix}"
+        try:
+            return candidate, os.stat(candidate), encoding
+        except OSError:
+            continue
+    return None
+
+
+def _byte_range(value: str, size: int) -> Optional[Tuple[int, int]]:
+    """Interpreta un unico rango ``bytes=``; ``(0, -1)`` si no es satisfacible.
+
+    Devuelve ``None`` si la cabecera no es valida o pide varios rangos: en
+    ese caso se sirve el fichero completo, como permite RFC 9110.
+    """
+
+    match = RANGE_PATTERN.match(value.strip())
+    if not match or (not match.group(1) and not match.group(2)):
+        return None
+    first, last = match.groups()
+    if not first:
+        length = int(last)
+        if length == 0:
+            return 0, -1
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        return 0, -1
+    return start, end
+
+
+class _FileRangeResponse(Response):
+    """206 con una porcion del fichero, leida por bloques."""
+
+    chunk_size = 64 * 1024
+
+    def __init__(self, path: str, start: int, end: int, size: int, headers: dict) -> None:
+        headers = {
+            **headers,
+            "content-range": f"bytes {start}-{end}/{size}",
+            "content-length": str(end - start + 1),
+        }
+        super().__init__(status_code=206, headers=headers)
+        self.path = path
+        self.start = start
+        self.end = end
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send(
+            {"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers}
+        )
+        if scope["method"].upper() == "HEAD":
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+        remaining = self.end - self.start + 1
+        async with await anyio.open_file(self.path, mode="rb") as file:
+            await file.seek(self.start)
+            while remaining > 0:
+                chunk = await file.read(min(self.chunk_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send(
+                    {"type": "http.response.body", "body": chunk, "more_body": remaining > 0}
+                )
+        if remaining > 0:
+            # El fichero ha encogido mientras se enviaba: se cierra el cuerpo.
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+class StaticAssets(StaticFiles):
+    """``StaticFiles`` con cache, precomprimidos, rangos y X-Accel-Redirect."""
+
+    def file_response(
+        self,
+        full_path: "os.PathLike[str]",
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        relative_path = PurePath(self.get_path(scope)).as_posix()
+        headers = {"Cache-Control": cache_control(relative_path)}
+
+        accel_prefix = get_settings().static_accel_redirect
+        if accel_prefix and status_code == 200:
+            # nginx resuelve la ruta interna, las condiciones y los rangos.
+            location = accel_prefix.rstrip("/") + "/" + quote(relative_path, safe="/")
+            return Response(headers={**headers, "X-Accel-Redirect": location})
+
+        request_headers = Headers(scope=scope)
+        full_path = str(full_path)
+        media_type = guess_type(full_path)[0] or "text/plain"
+        range_header = request_headers.get("range")
+        if full_path.lower().endswith(COMPRESSIBLE_SUFFIXES):
+            headers["Vary"] = "Accept-Encoding"
+            precompressed = None if range_header else _precompressed(full_path, request_headers)
+            if precompressed:
+                full_path, stat_result, encoding = precompressed
+                headers["Content-Encoding"] = encoding
+        headers["Accept-Ranges"] = "bytes"
+
+        response = FileResponse(
+            full_path,
+            status_code=status_code,
+            headers=headers,
+            media_type=media_type,
+            stat_result=stat_result,
+        )
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        if not range_header or status_code != 200:
+            return response
+
+        if_range = request_headers.get("if-range")
+        if if_range and if_range not in (response.headers["etag"], response.headers["last-modified"]):
+            return response
+        byte_range = _byte_range(range_header, stat_result.st_size)
+        if byte_range is None:
+            return response
+        start, end = byte_range
+        validators = {
+            "etag": response.headers["etag"],
+            "last-modified": response.headers["last-modified"],
+        }
+        if end < start:
+            return Response(
+                status_code=416,
+                headers={**headers, "content-range": f"bytes */{stat_result.st_size}"},
+            )
+        return _FileRangeResponse(
+            full_path,
+            start,
+            end,
+            stat_result.st_size,
+            {**headers, **validators, "content-type": response.headers["content-type"]},
+        )
+
+    def is_not_modified(self, response_headers: Headers, request_headers: Headers) -> bool:
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match is not None:
+            # Con If-None-Match se ignora If-Modified-Since.
+            etag = response_headers.get("etag", "").removeprefix("W/")
+            candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+            return etag in candidates or "*" in candidates
+        return super().is_not_modified(response_headers, request_headers)
+
+
+def _compressible_files(root: Path) -> Iterator[Path]:
+    for path in root.rglob("*"):
+        if path.is_file() and path.suffix.lower() in COMPRESSIBLE_SUFFIXES:
+            yield path
+
+
+def precompressed_paths(relative_path: str) -> List[str]:
+    """Rutas de las versiones ``.br``/``.gz`` que ``precompress`` genera para un fichero."""
+
+    if not relative_path.lower().endswith(COMPRESSIBLE_SUFFIXES):
+        return []
+    return [f"{relative_path}{suffix}" for _, suffix in PRECOMPRESSED_ENCODINGS]
+
+
+def precompress(static_dir: Optional[str] = None) -> List[str]:
+    """Genera ``.gz`` (y ``.br`` si esta ``brotli``) de los ficheros de texto.
+
+    Solo reescribe las versiones mas antiguas que el original y descarta las
+    que no reducen el tamano. Devuelve las rutas generadas.
+    """
+
+    root = Path(static_dir or get_settings().static_dir).resolve()
+    compressors = [(".gz", lambda data: gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        compressors.insert(0, (".br", lambda data: brotli.compress(data, quality=11)))
+
+    generated: List[str] = []
+    for path in _compressible_files(root):
+        source_mtime = path.stat().st_mtime
+        data = None
+        for suffix, compress in compressors:
+            target = path.with_name(path.name + suffix)
+            if target.exists() and target.stat().st_mtime >= source_mtime:
+                continue
+            data = path.read_bytes() if data is None else data
+            compressed = compress(data)
+            if len(compressed) >= len(data):
+                target.unlink(missing_ok=True)
+                continue
+            temporary = target.with_name(f".{target.name}.tmp")
+            temporary.write_bytes(compressed)
+            os.replace(temporary, target)
+            generated.append(target.relative_to(root).as_posix())
+    return generated
+
+
+NGINX_TEMPLATE = """\
+# Generado con `python -m app.static nginx` el {generated_at}.
+# Arranca la API con PRODUCTS_STATIC_ACCEL_REDIRECT={accel_prefix}: para /static/
+# la API solo valida la ruta y fija Cache-Control; nginx envia el fichero.
+
+upstream products_api {{
+    server {upstream};
+    keepalive 32;
+}}
+
+server {{
+    listen {listen};
+
+    # Solo accesible mediante X-Accel-Redirect desde la API.
+    location {accel_prefix} {{
+        internal;
+        alias {static_dir}/;
+
+        sendfile on;
+        tcp_nopush on;
+        open_file_cache max=10000 inactive=60s;
+        open_file_cache_valid 60s;
+
+        # Versiones .gz/.br generadas con `python -m app.static precompress`.
+        gzip_static on;
+        # brotli_static on;  # requiere el modulo ngx_brotli
+    }}
+
+    location / {{
+        proxy_pass http://products_api;
+        proxy_http_version 1.1;
+        proxy_set_header Connection "";
+        proxy_set_header Host $host;
+        proxy_set_header X-Forwarded-For $proxy_add_x_forwarded_for;
+        proxy_set_header X-Forwarded-Proto $scheme;
+    }}
+}}
+"""
+
+
+def render_nginx_config(upstream: str, listen: str, accel_prefix: Optional[str] = None) -> str:
+    """Configuracion de nginx para el modo X-Accel-Redirect."""
+
+    settings = get_settings()
+    prefix = accel_prefix or settings.static_accel_redirect or DEFAULT_ACCEL_PREFIX
+    return NGINX_TEMPLATE.format(
+        generated_at=formatdate(usegmt=True),
+        upstream=upstream,
+        listen=listen,
+        accel_prefix="/" + prefix.strip("/") + "/",
+        static_dir=str(Path(settings.static_dir).resolve()),
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Utilidades de ficheros estaticos")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("precompress", help="Genera las versiones .gz/.br")
+    nginx = commands.add_parser("nginx", help="Imprime la configuracion X-Accel-Redirect")
+    nginx.add_argument("--upstream", default="127.0.0.1:8002", help="Direccion de la API")
+    nginx.add_argument("--listen", default="8010", help="Puerto o direccion de escucha")
+    nginx.add_argument("--accel-prefix", default=None, help="Ubicacion interna de nginx")
+    arguments = parser.parse_args()
+
+    if arguments.command == "precompress":
+        written = precompress()
+        print(f"Ficheros precomprimidos: {len(written)}")
+    else:
+        print(render_nginx_config(arguments.upstream, arguments.listen, arguments.accel_prefix))
@@ -0,0 +1,359 @@
+"""Almacen de las imagenes de producto.
+
+Las rutas que se guardan en ``producto.imagen_url`` son relativas
+(``products/<ab>/<sha256>.<ext>``); el backend decide donde vive el fichero
+y desde que URL publica se sirve:
+
+- ``filesystem``: ``PRODUCTS_STATIC_DIR``, servido por ``/static`` (o por
+  nginx). Solo sirve con una replica o con un disco compartido.
+- ``s3``: cualquier servicio compatible con S3 (AWS, MinIO, moto...). Las
+  subidas grandes van por partes (``TransferConfig``) y el cliente de cada
+  proceso reutiliza un pool de conexiones HTTP. Las URLs apuntan a
+  ``PRODUCTS_S3_PUBLIC_URL`` (un CDN) o al propio bucket. Requiere ``boto3``.
+
+Los ficheros se escriben primero en un temporal local (``staging_dir``) y
+se publican con ``publish``: en disco es un rename atomico; en S3 se sube y
+se borra el temporal. Como las rutas derivan del contenido, si el destino
+ya existe no se vuelve a escribir.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from functools import lru_cache
+from logging import getLogger
+from mimetypes import guess_type
+from pathlib import Path
+from typing import ContextManager, Iterable, Iterator, List, Optional
+from urllib.parse import quote, unquote
+
+from .config import get_settings
+
+logger = getLogger(__name__)
+
+# Limite de claves por peticion DeleteObjects.
+S3_DELETE_BATCH = 1000
+
+
+def _normalized(relative_path: Optional[str]) -> Optional[str]:
+    """Ruta relativa limpia, o ``None`` si es externa o sale del almacen."""
+
+    if not relative_path or relative_path.lower().startswith(("http://", "https://")):
+        return None
+    path = relative_path.replace("\\", "/").lstrip("/")
+    if not path or ".." in path.split("/"):
+        return None
+    return path
+
+
+def _content_type(relative_path: str) -> str:
+    return guess_type(relative_path)[0] or "application/octet-stream"
+
+
+def _remove(local_path: str) -> None:
+    try:
+        os.unlink(local_path)
+    except OSError:
+        pass
+
+
+class ImageStorage(ABC):
+    """Interfaz comun de los backends de almacenamiento."""
+
+    name = "base"
+    # Parte comun de todas las URLs publicas (la ruta relativa va a continuacion).
+    url_prefix = ""
+
+    @abstractmethod
+    def staging_dir(self) -> Path:
+        """Directorio local de los temporales que luego se publican."""
+
+    @abstractmethod
+    def publish(self, local_path: str, relative_path: str) -> str:
+        """Publica un temporal en ``relative_path`` (consumiendolo) y devuelve la ruta."""
+
+    @abstractmethod
+    def exists(self, relative_path: str) -> bool:
+        """Indica si el fichero esta publicado."""
+
+    @abstractmethod
+    def delete(self, relative_paths: Iterable[str]) -> None:
+        """Borra ficheros ignorando los ausentes; los fallos solo se registran."""
+
+    @abstractmethod
+    def local_copy(self, relative_path: str) -> ContextManager[Path]:
+        """Ruta local legible del fichero mientras dura el bloque (``with``)."""
+
+    @abstractmethod
+    def public_url(self, relative_path: str) -> str:
+        """URL desde la que los clientes descargan el fichero."""
+
+
+class FilesystemStorage(ImageStorage):
+    """Ficheros en ``static_dir``, servidos desde ``static_base_url``."""
+
+    name = "filesystem"
+
+    def __init__(self, root: str, base_url: str) -> None:
+        self.root = Path(root).resolve()
+        self.base_url = base_url.rstrip("/")
+        self.url_prefix = f"{self.base_url}/"
+
+    def _full_path(self, relative_path: Optional[str]) -> Optional[Path]:
+        path = _normalized(relative_path)
+        if path is None:
+            return None
+        candidate = (self.root / path).resolve()
+        return candidate if candidate.is_relative_to(self.root) else None
+
+    def staging_dir(self) -> Path:
+        # En el mismo sistema de ficheros que el destino para que el rename sea atomico.
+        directory = self.root / "products"
+        directory.mkdir(parents=True, exist_ok=True)
+        return directory
+
+    def publish(self, local_path: str, relative_path: str) -> str:
+        target = self._full_path(relative_path)
+        if target is None:
+            _remove(local_path)
+            raise ValueError(f"Ruta de imagen no valida: {relative_path}")
+        if target.exists():
+            # Mismo contenido ya guardado: se descarta la copia.
+            _remove(local_path)
+            return relative_path
+        target.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(local_path, target)
+        return relative_path
+
+    def exists(self, relative_path: str) -> bool:
+        target = self._full_path(relative_path)
+        return target is not None and target.exists()
+
+    def delete(self, relative_paths: Iterable[str]) -> None:
+        for relative_path in relative_paths:
+            target = self._full_path(relative_path)
+            if target is None:
+                continue
+            try:
+                target.unlink(missing_ok=True)
+            except OSError:
+                # La limpieza no debe romper la operacion principal.
+                logger.warning("No se pudo borrar la imagen %s", relative_path)
+
+    @contextmanager
+    def local_copy(self, relative_path: str) -> Iterator[Path]:
+        target = self._full_path(relative_path)
+        if target is None:
+            raise FileNotFoundError(relative_path)
+        yield target
+
+    def public_url(self, relative_path: str) -> str:
+        return f"{self.base_url}/{quote(relative_path, safe='/:@%+-_.~')}"
+
+
+class S3Storage(ImageStorage):
+    """Objetos en un bucket compatible con S3."""
+
+    name = "s3"
+
+    def __init__(
+        self,
+        client,
+        bucket: str,
+        prefix: str = "",
+        public_url: str = "",
+        multipart_threshold: int = 8 * 1024 * 1024,
+        multipart_chunksize: int = 8 * 1024 * 1024,
+    ) -> None:
+        from boto3.s3.transfer import TransferConfig
+
+        self.client = client
+        self.bucket = bucket
+        self.prefix = prefix.strip("/") + "/" if prefix.strip("/") else ""
+        self.base_url = (public_url or self._bucket_url()).rstrip("/")
+        self.url_prefix = f"{self.base_url}/{self.prefix}"
+        self.transfer_config = TransferConfig(
+            multipart_threshold=multipart_threshold,
+            multipart_chunksize=multipart_chunksize,
+        )
+
+    @classmethod
+    def from_settings(cls) -> "S3Storage":
+        try:
+            import boto3
+            from botocore.config import Config
+        except ImportError as error:  # pragma: no cover - dependencia opcional
+            raise RuntimeError(
+                "PRODUCTS_STORAGE_BACKEND=s3 requiere el paquete 'boto3'"
+            ) from error
+        settings = get_settings()
+        if not settings.s3_bucket:
+            raise RuntimeError("PRODUCTS_STORAGE_BACKEND=s3 requiere PRODUCTS_S3_BUCKET")
+        # Credenciales por la cadena estandar de AWS (variables AWS_*, perfil, rol).
+        client = boto3.client(
+            "s3",
+            endpoint_url=settings.s3_endpoint_url or None,
+            region_name=settings.s3_region or None,
+            config=Config(
+                max_pool_connections=settings.s3_max_pool_connections,
+                retries={"max_attempts": 3, "mode": "standard"},
+            ),
+        )
+        return cls(
+            client,
+            settings.s3_bucket,
+            prefix=settings.s3_prefix,
+            public_url=settings.s3_public_url,
+            multipart_threshold=settings.s3_multipart_threshold_bytes,
+            multipart_chunksize=settings.s3_multipart_chunk_bytes,
+        )
+
+    def _bucket_url(self) -> str:
+        endpoint = self.client.meta.endpoint_url.rstrip("/")
+        return f"{endpoint}/{self.bucket}"
+
+    def _key(self, relative_path: str) -> str:
+        path = _normalized(relative_path)
+        if path is None:
+            raise ValueError(f"Ruta de imagen no valida: {relative_path}")
+        return self.prefix + path
+
+    def staging_dir(self) -> Path:
+        directory = Path(tempfile.gettempdir()) / "sport4data-imagenes"
+        directory.mkdir(parents=True, exist_ok=True)
+        return directory
+
+    def publish(self, local_path: str, relative_path: str) -> str:
+        try:
+            key = self._key(relative_path)
+            if not self.exists(relative_path):
+                # Lazy: static importa images, que importa este modulo.
+                from .static import cache_control
+
+                self.client.upload_file(
+                    local_path,
+                    self.bucket,
+                    key,
+                    ExtraArgs={
+                        "ContentType": _content_type(relative_path),
+                        "CacheControl": cache_control(relative_path),
+                    },
+                    Config=self.transfer_config,
+                )
+        finally:
+            _remove(local_path)
+        return relative_path
+
+    def exists(self, relative_path: str) -> bool:
+        from botocore.exceptions import ClientError
+
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self._key(relative_path))
+        except ClientError as error:
+            if error.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+        return True
+
+    def delete(self, relative_paths: Iterable[str]) -> None:
+        keys = [self.prefix + path for path in map(_normalized, relative_paths) if path]
+        for start in range(0, len(keys), S3_DELETE_BATCH):
+            batch = keys[start : start + S3_DELETE_BATCH]
+            try:
+                self.client.delete_objects(
+                    Bucket=self.bucket,
+                    Delete={"Objects": [{"Key": key} for key in batch], "Quiet": True},
+                )
+            except Exception:
+                logger.exception("No se pudieron borrar %s imagenes de S3", len(batch))
+
+    @contextmanager
+    def local_copy(self, relative_path: str) -> Iterator[Path]:
+        handle = tempfile.NamedTemporaryFile(
+            dir=self.staging_dir(), prefix=".descarga-", suffix=Path(relative_path).suffix, delete=False
+        )
+        handle.close()
+        try:
+            self.client.download_file(
+                self.bucket, self._key(relative_path), handle.name, Config=self.transfer_config
+            )
+            yield Path(handle.name)
+        finally:
+            _remove(handle.name)
+
+    def public_url(self, relative_path: str) -> str:
+        return f"{self.base_url}/{quote(self.prefix + relative_path, safe='/:@%+-_.~')}"
+
+
+@lru_cache()
+def get_storage() -> ImageStorage:
+    """Backend configurado para este proceso."""
+
+    settings = get_settings()
+    backend = settings.storage_backend.lower()
+    if backend == "filesystem":
+        return FilesystemStorage(settings.static_dir, settings.static_base_url)
+    if backend == "s3":
+        return S3Storage.from_settings()
+    raise RuntimeError(f"Backend de almacenamiento desconocido: {settings.storage_backend}")
+
+
+def relative_path(value: Optional[str]) -> Optional[str]:
+    """Ruta relativa de una URL publica de las imagenes propias.
+
+    Los clientes reenvian la ``imagen_url`` absoluta que devuelve la API
+    (formulario de edicion, CSV exportado); se guarda y se cuenta por su
+    ruta relativa. Cualquier otro valor se devuelve sin cambios.
+    """
+
+    if not value:
+        return value
+    normalized = value.strip()
+    prefixes = (get_storage().url_prefix, get_settings().static_base_url.rstrip("/") + "/")
+    for prefix in prefixes:
+        if prefix != "/" and normalized.startswith(prefix):
+            path = normalized[len(prefix) :].split("#")[0].split("?")[0]
+            return unquote(path) or normalized
+    return normalized
+
+
+def upload_local_images(storage: Optional[ImageStorage] = None) -> List[str]:
+    """Copia al backend las imagenes de ``static_dir/products`` que aun no tenga.
+
+    Sirve para pasar de ``filesystem`` a ``s3`` sin cambiar las rutas
+    guardadas en la base de datos. Devuelve las rutas subidas.
+    """
+
+    storage = storage or get_storage()
+    root = Path(get_settings().static_dir).resolve()
+    uploaded: List[str] = []
+    if isinstance(storage, FilesystemStorage):
+        return uploaded
+    for path in sorted((root / "products").rglob("*")):
+        if not path.is_file() or path.name.startswith("."):
+            continue
+        relative_path = path.relative_to(root).as_posix()
+        if storage.exists(relative_path):
+            continue
+        # publish consume el fichero: se sube una copia.
+        handle = tempfile.NamedTemporaryFile(dir=storage.staging_dir(), delete=False)
+        with handle, path.open("rb") as source:
+            while chunk := source.read(1024 * 1024):
+                handle.write(chunk)
+        storage.publish(handle.name, relative_path)
+        uploaded.append(relative_path)
+    return uploaded
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Utilidades del almacen de imagenes")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("upload-local", help="Sube al backend las imagenes de static_dir")
+    arguments = parser.parse_args()
+
+    written = upload_local_images()
+    print(f"Imagenes subidas: {len(written)}")
@@ -0,0 +1,132 @@
+"""Indice de prefijos en memoria para las sugerencias del buscador."""
+
+from __future__ import annotations
+
+import threading
+import time
+from bisect import bisect_left, insort
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+from .search import tokenize
+
+SUGGESTION_FIELDS = ("id", "nombre", "categoria", "deporte", "imagen_url", "imagen_variantes")
+
+
+def _keys_for(nombre: Optional[str], marca: Optional[str]) -> List[str]:
+    """Claves normalizadas: el nombre desde cada palabra y la marca."""
+
+    words = tokenize(nombre)
+    keys = [" ".join(words[position:]) for position in range(len(words))]
+    brand = " ".join(tokenize(marca))
+    if brand:
+        keys.append(brand)
+    return keys
+
+
+class PrefixIndex:
+    """Array ordenado de claves normalizadas consultado con ``bisect``.
+
+    Cada producto aporta su nombre completo, el nombre a partir de cada
+    palabra ("running vector", "vector") y su marca, de modo que un prefijo
+    encuentra coincidencias en cualquier palabra del nombre.
+
+    Las escrituras del propio proceso se aplican al momento; las de otros
+    workers o replicas, al recargarlo cuando tiene mas de
+    ``max_age_seconds``.
+    """
+
+    def __init__(self, max_age_seconds: float = 30) -> None:
+        self.max_age_seconds = max_age_seconds
+        self._lock = threading.RLock()
+        self._entries: List[Tuple[str, int]] = []
+        self._keys: Dict[int, List[str]] = {}
+        self._rows: Dict[int, Dict[str, object]] = {}
+        self._loaded_at: Optional[float] = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded_at is not None
+
+    @property
+    def fresh(self) -> bool:
+        loaded_at = self._loaded_at
+        return loaded_at is not None and time.monotonic() - loaded_at < self.max_age_seconds
+
+    def replace(self, rows: Iterable[Mapping[str, object]]) -> None:
+        """Reconstruye el indice con las filas dadas."""
+
+        with self._lock:
+            self._entries.clear()
+            self._keys.clear()
+            self._rows.clear()
+            for row in rows:
+                self._entries.extend(self._add(row))
+            self._entries.sort()
+            self._loaded_at = time.monotonic()
+
+    def reset(self) -> None:
+        """Vacia el indice; se reconstruira en la siguiente consulta."""
+
+        with self._lock:
+            self._entries.clear()
+            self._keys.clear()
+            self._rows.clear()
+            self._loaded_at = None
+
+    def add(self, row: Mapping[str, object]) -> None:
+        """Inserta o actualiza un producto si el indice ya esta cargado."""
+
+        with self._lock:
+            if not self.loaded:
+                return
+            self._remove(row["id"])
+            for entry in self._add(row):
+                insort(self._entries, entry)
+
+    def remove(self, product_id: int) -> None:
+        """Quita un producto del indice."""
+
+        with self._lock:
+            if self.loaded:
+                self._remove(product_id)
+
+    def lookup(
+        self, prefix: str, limit: int = 5, disponible: Optional[bool] = None
+    ) -> List[Dict[str, object]]:
+        """Devuelve hasta ``limit`` productos cuyo nombre o marca empieza por el prefijo."""
+
+        normalized = " ".join(tokenize(prefix))
+        if not normalized:
+            return []
+
+        results: List[Dict[str, object]] = []
+        seen = set()
+        with self._lock:
+            position = bisect_left(self._entries, (normalized, -1))
+            while position < len(self._entries) and len(results) < limit:
+                key, product_id = self._entries[position]
+                if not key.startswith(normalized):
+                    break
+                position += 1
+                row = self._rows[product_id]
+                if product_id in seen:
+                    continue
+                if disponible is not None and row["disponible"] != disponible:
+                    continue
+                seen.add(product_id)
+                results.append({field: row[field] for field in SUGGESTION_FIELDS})
+        return results
+
+    def _add(self, row: Mapping[str, object]) -> List[Tuple[str, int]]:
+        product_id = row["id"]
+        keys = _keys_for(row.get("nombre"), row.get("marca"))
+        self._rows[product_id] = dict(row)
+        self._keys[product_id] = keys
+        return [(key, product_id) for key in keys]
+
+    def _remove(self, product_id: int) -> None:
+        self._rows.pop(product_id, None)
+        for key in self._keys.pop(product_id, []):
+            position = bisect_left(self._entries, (key, product_id))
+            if position < len(self._entries) and self._entries[position] == (key, product_id):
+                del self._entries[position]
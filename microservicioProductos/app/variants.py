@@ -0,0 +1,203 @@
+"""Variantes redimensionadas de las imagenes de producto.
+
+Tras guardar una imagen local se encola, como tarea en segundo plano de la
+respuesta, su procesado en un ``ProcessPoolExecutor``: el decodificado y el
+redimensionado no pasan por el event loop ni por el GIL del worker web. Se
+generan los tamanos de ``VARIANT_WIDTHS`` en WebP y, si Pillow lo soporta,
+AVIF, sin metadatos (EXIF, XMP, perfiles) y con la orientacion EXIF ya
+aplicada. Los ficheros se publican en el mismo almacen que el original
+(``storage``) y sus rutas se guardan en ``producto.imagen_variantes``.
+
+Requiere ``Pillow``; sin el paquete (o con ``PRODUCTS_IMAGE_VARIANTS=false``)
+solo se sirve la imagen original.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from logging import getLogger
+from pathlib import Path
+from typing import Dict, Optional, Sequence, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+
+from . import crud, crud_async, images, schemas
+from .config import get_settings
+from .database import AsyncSessionLocal, SessionLocal
+from .storage import get_storage
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # pragma: no cover - dependencia opcional
+    Image = None
+
+logger = getLogger(__name__)
+
+# Ancho maximo de cada variante; nunca se amplia una imagen mas pequena.
+VARIANT_WIDTHS = {"thumb": 160, "medium": 480, "large": 1200}
+# Formato de salida: (formato de Pillow, opciones de guardado).
+VARIANT_FORMATS: Dict[str, Tuple[str, dict]] = {
+    "webp": ("WEBP", {"quality": 80, "method": 4}),
+    "avif": ("AVIF", {"quality": 55}),
+}
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def available_formats() -> Tuple[str, ...]:
+    """Formatos de ``VARIANT_FORMATS`` que la instalacion de Pillow puede escribir."""
+
+    if Image is None:
+        return ()
+    Image.init()
+    return tuple(
+        name for name, (pillow_format, _) in VARIANT_FORMATS.items() if pillow_format in Image.SAVE
+    )
+
+
+def _prepared(image: "Image.Image") -> "Image.Image":
+    # Se aplica la orientacion EXIF antes de descartar los metadatos.
+    image = ImageOps.exif_transpose(image)
+    has_alpha = image.mode in ("RGBA", "LA", "PA") or "transparency" in image.info
+    image = image.convert("RGBA" if has_alpha else "RGB")
+    image.info = {}
+    return image
+
+
+def render_variants(relative_path: str, formats: Sequence[str]) -> schemas.ImageVariants:
+    """Genera las variantes de una imagen y devuelve sus rutas relativas.
+
+    Se ejecuta en un proceso del pool, con su propio cliente del almacen.
+    Cada fichero se escribe en un temporal y se publica junto al original.
+    """
+
+    storage = get_storage()
+    relative = Path(relative_path)
+    variants: schemas.ImageVariants = {}
+    with storage.local_copy(relative_path) as source, Image.open(source) as original:
+        image = _prepared(original)
+
+    for size, width in VARIANT_WIDTHS.items():
+        resized = None
+        for name in formats:
+            target = relative.with_name(f"{relative.stem}-{size}.{name}").as_posix()
+            variants.setdefault(size, {})[name] = target
+            if storage.exists(target):
+                # Si existe es de la misma imagen (nombres derivados del contenido).
+                continue
+            if resized is None:
+                resized = image.copy()
+                resized.thumbnail((width, width * 4), Image.Resampling.LANCZOS)
+            pillow_format, options = VARIANT_FORMATS[name]
+            handle = tempfile.NamedTemporaryFile(
+                dir=storage.staging_dir(), prefix=".variante-", delete=False
+            )
+            try:
+                with handle:
+                    resized.save(handle, pillow_format, **options)
+            except BaseException:
+                Path(handle.name).unlink(missing_ok=True)
+                raise
+            storage.publish(handle.name, target)
+    return variants
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # spawn: los procesos no heredan conexiones ni hilos del worker web.
+            _executor = ProcessPoolExecutor(
+                max_workers=get_settings().image_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _executor
+
+
+def shutdown() -> None:
+    """Detiene el pool de procesos (al apagar la aplicacion)."""
+
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
+def _is_local(image_url: Optional[str]) -> bool:
+    return bool(image_url) and not image_url.lower().startswith(("http://", "https://"))
+
+
+def _store_variants(product_id: int, source: str, variants: schemas.ImageVariants) -> None:
+    db = SessionLocal()
+    try:
+        if crud.set_image_variants(db, product_id, source, variants) is not None:
+            return
+        # La imagen ha cambiado. Las variantes (comunes a todos los productos
+        # con el mismo original) solo sobran si el original se libero: sin
+        # fila en imagen_blob y ya borrado. Un original sin fila que sigue
+        # existiendo no es propio y no se toca.
+        if crud.image_is_referenced(db, source) or get_storage().exists(source):
+            return
+        images.delete_files(images.variant_paths(variants))
+    finally:
+        db.close()
+
+
+async def _store_variants_async(
+    product_id: int, source: str, variants: schemas.ImageVariants
+) -> None:
+    # Igual que _store_variants, con AsyncSession (PRODUCTS_DATABASE_ASYNC).
+    async with AsyncSessionLocal() as db:
+        if await crud_async.set_image_variants(db, product_id, source, variants) is not None:
+            return
+        if await crud_async.image_is_referenced(db, source):
+            return
+    if await run_in_threadpool(get_storage().exists, source):
+        return
+    await run_in_threadpool(images.delete_files, images.variant_paths(variants))
+
+
+async def process_product_image(product_id: int, image_url: Optional[str]) -> None:
+    """Genera y registra las variantes de la imagen local de un producto.
+
+    Pensada para ``BackgroundTasks``: los errores se registran y no se
+    propagan. Si la imagen del producto cambia mientras tanto, las variantes
+    generadas solo se descartan si el original ya se ha liberado y borrado.
+    """
+
+    settings = get_settings()
+    formats = available_formats()
+    if not settings.image_variants or not formats or not _is_local(image_url):
+        return
+
+    loop = asyncio.get_running_loop()
+    try:
+        variants = await loop.run_in_executor(
+            _get_executor(),
+            render_variants,
+            image_url,
+            formats,
+        )
+    except BrokenProcessPool:
+        # Un proceso murio (p. ej. por memoria): el siguiente encargo crea otro pool.
+        logger.exception("El pool de imagenes se ha roto procesando %s", image_url)
+        shutdown()
+        return
+    except Exception:
+        logger.exception("No se pudieron generar las variantes de %s", image_url)
+        return
+
+    try:
+        if AsyncSessionLocal is not None:
+            await _store_variants_async(product_id, image_url, variants)
+        else:
+            await run_in_threadpool(_store_variants, product_id, image_url, variants)
+    except Exception:
+        logger.exception("No se pudieron guardar las variantes del producto %s", product_id)
@@ -0,0 +1,139 @@
+"""Compara el servicio con PRODUCTS_DATABASE_ASYNC=false y =true bajo carga.
+
+Arranca uvicorn dos veces (threadpool y AsyncSession) contra la misma base
+de datos, carga un catalogo con ``/products/bulk`` y lanza ``--clients``
+clientes concurrentes que alternan listados y detalles. Muestra peticiones
+por segundo y latencias p50/p99 de cada modo.
+
+Ejecutar desde microservicioProductos:
+    python benchmarks/load_async.py --database-url postgresql+psycopg://...
+
+Sin ``--database-url`` usa un SQLite temporal (util solo como prueba).
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import httpx
+
+SERVICE_DIR = Path(__file__).resolve().parents[1]
+
+
+def _start_server(port: int, env: Dict[str, str]) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=SERVICE_DIR,
+        env={**os.environ, **env},
+    )
+
+
+async def _wait_ready(client: httpx.AsyncClient) -> None:
+    for _ in range(100):
+        try:
+            if (await client.get("/")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.1)
+    raise RuntimeError("El servidor no ha arrancado")
+
+
+async def _seed(client: httpx.AsyncClient, products: int) -> List[int]:
+    body = "\n".join(
+        json.dumps({"nombre": f"Bench {index}", "marca": "Bench", "precio": "10", "stock": 5})
+        for index in range(products)
+    )
+    response = await client.post("/products/bulk", content=body, timeout=120)
+    response.raise_for_status()
+    listing = (await client.get("/products", params={"search": "Bench", "limit": 100})).json()
+    return [product["id"] for product in listing]
+
+
+async def _client(
+    client: httpx.AsyncClient, product_ids: List[int], requests: int, offset: int, latencies: List[float]
+) -> int:
+    errors = 0
+    for index in range(requests):
+        if (offset + index) % 2:
+            url = f"/products/{product_ids[(offset + index) % len(product_ids)]}"
+        else:
+            url = f"/products?skip={(offset + index) % 50}&limit=20"
+        started = time.perf_counter()
+        try:
+            response = await client.get(url)
+            if response.status_code != 200:
+                errors += 1
+        except httpx.HTTPError:
+            errors += 1
+        latencies.append(time.perf_counter() - started)
+    return errors
+
+
+async def _run_mode(args: argparse.Namespace, database_async: bool, port: int) -> dict:
+    env = {
+        "PRODUCTS_DATABASE_URL": args.database_url,
+        "PRODUCTS_STATIC_DIR": args.static_dir,
+        "PRODUCTS_DATABASE_ASYNC": str(database_async).lower(),
+        "PRODUCTS_CACHE_BACKEND": "none",
+        "PRODUCTS_IMAGE_VARIANTS": "false",
+    }
+    server = _start_server(port, env)
+    limits = httpx.Limits(max_connections=args.clients, max_keepalive_connections=args.clients)
+    try:
+        async with httpx.AsyncClient(
+            base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=60
+        ) as client:
+            await _wait_ready(client)
+            product_ids = await _seed(client, args.products)
+            latencies: List[float] = []
+            started = time.perf_counter()
+            errors = await asyncio.gather(
+                *(
+                    _client(client, product_ids, args.requests, offset, latencies)
+                    for offset in range(args.clients)
+                )
+            )
+            elapsed = time.perf_counter() - started
+    finally:
+        server.terminate()
+        server.wait()
+
+    latencies.sort()
+    return {
+        "modo": "async" if database_async else "threadpool",
+        "peticiones": len(latencies),
+        "errores": sum(errors),
+        "req_s": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 1),
+        "p99_ms": round(latencies[int(len(latencies) * 0.99) - 1] * 1000, 1),
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", help="Base de datos de prueba (se le anaden productos)")
+    parser.add_argument("--clients", type=int, default=500)
+    parser.add_argument("--requests", type=int, default=10, help="Peticiones por cliente")
+    parser.add_argument("--products", type=int, default=2000)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        args.static_dir = tmp
+        if not args.database_url:
+            args.database_url = f"sqlite:///{tmp}/bench.db"
+        for database_async in (False, True):
+            print(json.dumps(await _run_mode(args, database_async, args.port)))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
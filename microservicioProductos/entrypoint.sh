@@ -6,8 +6,14 @@ APP_PORT="${PORT:-8002}"
 echo "[entrypoint] Esperando a la base de datos..."
 python -c "from app.bootstrap import wait_for_database; wait_for_database()"
 
+echo "[entrypoint] Aplicando migraciones..."
+python -m app.migrations
+
 echo "[entrypoint] Ejecutando seed de productos..."
 python seed_products.py
 
+echo "[entrypoint] Precomprimiendo estaticos..."
+python -m app.static precompress
+
 echo "[entrypoint] Iniciando FastAPI en el puerto ${APP_PORT}..."
 exec uvicorn app.main:app --host 0.0.0.0 --port "${APP_PORT}"
@@ -0,0 +1,45 @@
+"""Entorno comun de las pruebas."""
+
+import os
+import tempfile
+
+import pytest
+
+# Antes de importar app: las migraciones leen y renombran ficheros de static_dir
+# y el engine del proceso se crea al importar app.database.
+TEST_DIR = tempfile.mkdtemp(prefix="sport4data-tests-")
+os.environ["PRODUCTS_STATIC_DIR"] = TEST_DIR
+os.environ["PRODUCTS_DATABASE_URL"] = f"sqlite:///{os.path.join(TEST_DIR, 'productos.db')}"
+os.environ["PRODUCTS_IMAGE_VARIANTS"] = "false"
+os.environ["PRODUCTS_CACHE_BACKEND"] = "memory"
+
+
+@pytest.fixture
+def client():
+    """Cliente de la API sobre un catalogo vacio."""
+
+    from fastapi.testclient import TestClient
+
+    from app import crud
+    from app.database import Base, SessionLocal
+    from app.main import app
+
+    with SessionLocal() as db:
+        for table in reversed(Base.metadata.sorted_tables):
+            db.execute(table.delete())
+        db.commit()
+    crud._catalog_reloaded()
+    return TestClient(app)
+
+
+@pytest.fixture
+def make_product(client):
+    """Crea un producto por la API y devuelve su JSON."""
+
+    def create(**fields) -> dict:
+        payload = {"nombre": "Producto", "precio": "10", "stock": 1, **fields}
+        response = client.post("/products", json=payload)
+        assert response.status_code == 201, response.text
+        return response.json()
+
+    return create
@@ -0,0 +1,118 @@
+"""La importacion masiva deja el mismo catalogo que importar fila a fila."""
+
+import csv
+import io
+import json
+from typing import List, Tuple
+
+import pytest
+from pydantic import ValidationError
+from sqlalchemy import select
+
+from app import bulk, crud, models, schemas
+from app.database import Base, SessionLocal
+from app.routers.products import DUPLICATE_PRODUCT_MESSAGE
+
+CATALOG_COLUMNS = ("nombre", "marca", "categoria", "precio", "stock", "descripcion", "disponible")
+# Mas filas que BULK_CHUNK_SIZE: los duplicados y errores cruzan bloques.
+ROWS = bulk.BULK_CHUNK_SIZE + 200
+
+
+def _records() -> List[dict]:
+    records = []
+    for number in range(ROWS):
+        record = {
+            "nombre": f"Producto {number}",
+            "marca": "Alfa" if number % 2 else "Beta",
+            "categoria": "ropa",
+            "precio": f"{number % 50}.{number % 100:02d}",
+            "stock": number % 9,
+            "descripcion": "Con coma, comillas \"dobles\" y\nsalto de linea",
+        }
+        if number % 97 == 3:
+            record["stock"] = -1
+        if number % 131 == 7:
+            del record["precio"]
+        if number % 113 == 5:
+            # Mismo nombre y marca que una fila anterior (a veces de otro bloque).
+            earlier = number - (bulk.BULK_CHUNK_SIZE if number > bulk.BULK_CHUNK_SIZE else 4)
+            record["nombre"] = f"  PRODUCTO {earlier} "
+            record["marca"] = "Alfa" if earlier % 2 else "Beta"
+        records.append(record)
+    records.append({"nombre": "existente", "marca": "alfa", "precio": "1", "stock": 1})
+    return records
+
+
+def _body(records: List[dict], bulk_format: str) -> Tuple[str, List[int]]:
+    """Cuerpo de la importacion y linea en la que empieza cada registro."""
+
+    if bulk_format == "ndjson":
+        return "\n".join(json.dumps(record) for record in records), list(
+            range(1, len(records) + 1)
+        )
+    output = io.StringIO()
+    writer = csv.DictWriter(output, fieldnames=CATALOG_COLUMNS, lineterminator="\n")
+    writer.writeheader()
+    lines = []
+    for record in records:
+        lines.append(output.getvalue().count("\n") + 1)
+        writer.writerow(record)
+    return output.getvalue(), lines
+
+
+def _catalog() -> List[tuple]:
+    columns = [getattr(models.Product, column) for column in CATALOG_COLUMNS]
+    with SessionLocal() as db:
+        return [tuple(row) for row in db.execute(select(*columns).order_by(models.Product.id))]
+
+
+def _reset_catalog() -> None:
+    with SessionLocal() as db:
+        for table in reversed(Base.metadata.sorted_tables):
+            db.execute(table.delete())
+        db.commit()
+    crud._catalog_reloaded()
+
+
+def _import_row_by_row(records: List[dict], lines: List[int]) -> schemas.ProductBulkResult:
+    result = schemas.ProductBulkResult()
+    with SessionLocal() as db:
+        for line, record in zip(lines, records):
+            result.recibidos += 1
+            try:
+                product_in = schemas.ProductCreate.parse_obj(record)
+            except ValidationError:
+                result.errores.append(schemas.ProductBulkError(linea=line, errores=["invalido"]))
+                continue
+            if crud.create_product(db, product_in) is None:
+                result.errores.append(
+                    schemas.ProductBulkError(linea=line, errores=[DUPLICATE_PRODUCT_MESSAGE])
+                )
+            else:
+                result.insertados += 1
+    return result
+
+
+def _outcome(result: schemas.ProductBulkResult) -> tuple:
+    duplicates = [error.linea for error in result.errores if error.errores == [DUPLICATE_PRODUCT_MESSAGE]]
+    invalid = [error.linea for error in result.errores if error.linea not in duplicates]
+    return result.recibidos, result.insertados, duplicates, invalid
+
+
+@pytest.mark.parametrize("bulk_format", bulk.BULK_FORMATS)
+def test_bulk_import_matches_row_by_row(client, make_product, bulk_format):
+    records = _records()
+    body, lines = _body(records, bulk_format)
+
+    make_product(nombre="Existente", marca="Alfa")
+    response = client.post("/products/bulk", params={"format": bulk_format}, content=body)
+    assert response.status_code == 200, response.text
+    imported = schemas.ProductBulkResult.parse_obj(response.json())
+    bulk_catalog = _catalog()
+
+    _reset_catalog()
+    make_product(nombre="Existente", marca="Alfa")
+    expected = _import_row_by_row(records, lines)
+
+    assert _outcome(imported) == _outcome(expected)
+    assert bulk_catalog == _catalog()
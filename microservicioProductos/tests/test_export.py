@@ -0,0 +1,68 @@
+"""La exportacion se puede volver a importar con POST /products/bulk."""
+
+import json
+from typing import List
+
+import pytest
+from sqlalchemy import select
+
+from app import crud, models
+from app.database import Base, SessionLocal
+
+PRODUCTS = [
+    {
+        "nombre": "Camiseta ñandu «pro»",
+        "categoria": "ropa",
+        "deporte": "running",
+        "color": "azul",
+        "marca": "Zeta",
+        "precio": "19.90",
+        "stock": 3,
+        "descripcion": 'Con coma, comillas "dobles"\ny salto de linea',
+        "imagen_url": "https://cdn.example.com/camiseta.jpg",
+    },
+    {"nombre": "Balon", "precio": "10", "stock": 0, "disponible": False},
+    {"nombre": "Mochila", "precio": "35", "stock": 1, "imagen_url": "products/ab/mochila.png"},
+    # Sin cadenas vacias: en CSV una celda vacia equivale a un campo ausente.
+    {"nombre": "Raqueta", "marca": "Alfa", "precio": "1234.05", "stock": 7},
+]
+
+
+def _export(client, export_format: str) -> str:
+    response = client.get("/products/export", params={"format": export_format, "sort": "id"})
+    assert response.status_code == 200, response.text
+    return response.text
+
+
+def _stored_images() -> List[str]:
+    with SessionLocal() as db:
+        return list(db.scalars(select(models.Product.imagen_url).order_by(models.Product.id)))
+
+
+def _catalog(client) -> List[dict]:
+    rows = [json.loads(line) for line in _export(client, "ndjson").splitlines()]
+    for row in rows:
+        row.pop("id")
+    return rows
+
+
+@pytest.mark.parametrize("export_format", ["ndjson", "csv"])
+def test_export_round_trips_through_bulk_import(client, make_product, export_format):
+    for product in PRODUCTS:
+        make_product(**product)
+    original = _catalog(client)
+    images = _stored_images()
+    exported = _export(client, export_format)
+
+    with SessionLocal() as db:
+        for table in reversed(Base.metadata.sorted_tables):
+            db.execute(table.delete())
+        db.commit()
+    crud._catalog_reloaded()
+
+    response = client.post("/products/bulk", params={"format": export_format}, content=exported)
+    assert response.status_code == 200, response.text
+    assert response.json() == {"recibidos": len(PRODUCTS), "insertados": len(PRODUCTS), "errores": []}
+    assert _catalog(client) == original
+    # La exportacion publica URLs absolutas; la importacion vuelve a guardar rutas relativas.
+    assert _stored_images() == images
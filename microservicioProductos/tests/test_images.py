@@ -0,0 +1,43 @@
+"""Borrado de los ficheros de imagen al soltar la ultima referencia."""
+
+import base64
+from pathlib import Path
+
+from app import static
+from app.config import get_settings
+
+SVG = b'<svg xmlns="http://www.w3.org/2000/svg" width="10" height="10">' + b"<rect/>" * 200 + b"</svg>"
+
+
+def _stored_path(product: dict) -> Path:
+    relative = product["imagen_url"].split("/static/", 1)[1]
+    return Path(get_settings().static_dir) / relative
+
+
+def _create_with_svg(make_product, nombre: str) -> dict:
+    return make_product(
+        nombre=nombre,
+        imagen_base64=base64.b64encode(SVG).decode("ascii"),
+        imagen_nombre="logo.svg",
+        imagen_mime="image/svg+xml",
+    )
+
+
+def test_precompressed_svg_siblings_are_removed_with_the_last_reference(client, make_product):
+    first = _create_with_svg(make_product, "Uno")
+    second = _create_with_svg(make_product, "Dos")
+    original = _stored_path(first)
+    assert _stored_path(second) == original
+
+    static.precompress()
+    siblings = [original.with_name(original.name + ".gz")]
+    if static.brotli is not None:
+        siblings.append(original.with_name(original.name + ".br"))
+    assert all(path.exists() for path in siblings)
+
+    client.delete(f"/products/{first['id']}")
+    assert original.exists() and all(path.exists() for path in siblings)
+
+    client.delete(f"/products/{second['id']}")
+    assert not original.exists()
+    assert not any(path.exists() for path in siblings)
@@ -0,0 +1,159 @@
+"""Indices de filtros y ordenaciones del listado de productos.
+
+Comprueba que las migraciones crean los indices sobre una tabla ya
+existente y que el planificador los usa para las consultas del listado.
+El caso de PostgreSQL solo se ejecuta con ``PRODUCTS_TEST_DATABASE_URL``
+apuntando a una base desechable (se crean y borran todas las tablas).
+"""
+
+import os
+from typing import Optional
+
+import pytest
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.orm import Session
+
+from app import crud, models
+from app.database import Base
+from app.migrations import apply_migrations, migration_metadata
+
+LISTING_INDEXES = {
+    "ix_producto_disponible_deporte_categoria",
+    "ix_producto_categoria_precio",
+    "ix_producto_deporte_precio",
+    "ix_producto_marca",
+    "ix_producto_precio_id",
+    "ix_producto_nombre_id",
+    "ix_producto_stock_id",
+}
+
+# (filtros, sort, indice que debe aparecer en el plan).
+LISTING_PLANS = [
+    (
+        {"disponible": True, "deporte": "d3", "categoria": "c3"},
+        None,
+        "ix_producto_disponible_deporte_categoria",
+    ),
+    ({"categoria": "c3"}, "precio", "ix_producto_categoria_precio"),
+    ({"deporte": "d3"}, "precio", "ix_producto_deporte_precio"),
+    ({"marca": "M3"}, None, "ix_producto_marca"),
+    ({}, "precio", "ix_producto_precio_id"),
+    ({}, "precio_desc", "ix_producto_precio_id"),
+    ({}, "nombre", "ix_producto_nombre_id"),
+    ({}, "stock", "ix_producto_stock_id"),
+]
+
+# Producto tal y como estaba antes de las migraciones (sin indices ni version).
+LEGACY_PRODUCT_TABLE = """
+CREATE TABLE producto (
+    id INTEGER PRIMARY KEY,
+    nombre VARCHAR(255) NOT NULL,
+    categoria VARCHAR(100),
+    deporte VARCHAR(100),
+    color VARCHAR(60),
+    marca VARCHAR(120),
+    precio NUMERIC(10, 2) NOT NULL,
+    stock INTEGER NOT NULL,
+    descripcion TEXT,
+    imagen_url TEXT,
+    disponible BOOLEAN NOT NULL
+)
+"""
+
+
+def _index_names(engine) -> set:
+    if engine.dialect.name == "sqlite":
+        # El inspector de SQLite omite los indices de expresiones.
+        with engine.connect() as connection:
+            return set(
+                connection.execute(
+                    text("SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'producto'")
+                ).scalars()
+            )
+    return {index["name"] for index in inspect(engine).get_indexes("producto")}
+
+
+def _listing_plan(db: Session, sort: Optional[str], **filters) -> str:
+    query, relevance = crud._filtered_query(db, **filters)
+    query = crud._ordered(query, sort, relevance).limit(20)
+    dialect = db.get_bind().dialect
+    sql = str(query.compile(dialect=dialect, compile_kwargs={"literal_binds": True}))
+    explain = "EXPLAIN QUERY PLAN " if dialect.name == "sqlite" else "EXPLAIN "
+    return "\n".join(str(row[-1]) for row in db.execute(text(explain + sql)))
+
+
+@pytest.fixture
+def sqlite_engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'productos.db'}")
+    yield engine
+    engine.dispose()
+
+
+def _postgres_engine():
+    url = os.environ.get("PRODUCTS_TEST_DATABASE_URL")
+    if not url:
+        pytest.skip("PRODUCTS_TEST_DATABASE_URL no definida")
+    engine = create_engine(url)
+    if engine.dialect.name != "postgresql":
+        pytest.skip("PRODUCTS_TEST_DATABASE_URL no es PostgreSQL")
+    return engine
+
+
+@pytest.fixture(params=["sqlite", "postgresql"])
+def catalog_engine(request, tmp_path):
+    if request.param == "sqlite":
+        engine = create_engine(f"sqlite:///{tmp_path / 'productos.db'}")
+    else:
+        engine = _postgres_engine()
+    apply_migrations(engine)
+    rows = [
+        {
+            "nombre": f"Producto {number}",
+            "precio": number % 97,
+            "stock": number % 13,
+            "marca": f"M{number % 500}",
+            "categoria": f"c{number % 30}",
+            "deporte": f"d{number % 25}",
+            "disponible": number % 5 != 0,
+        }
+        for number in range(3000)
+    ]
+    with engine.begin() as connection:
+        connection.execute(models.Product.__table__.insert(), rows)
+        connection.execute(text("ANALYZE producto"))
+    yield engine
+    Base.metadata.drop_all(bind=engine)
+    migration_metadata.drop_all(bind=engine)
+    engine.dispose()
+
+
+def test_migrations_create_listing_indexes_on_existing_table(sqlite_engine):
+    with sqlite_engine.begin() as connection:
+        connection.execute(text(LEGACY_PRODUCT_TABLE))
+        connection.execute(
+            text(
+                "INSERT INTO producto (nombre, marca, precio, stock, disponible) "
+                "VALUES ('Camiseta', 'Marca', 10, 1, 1), ('camiseta ', 'MARCA', 12, 2, 1)"
+            )
+        )
+
+    applied = apply_migrations(sqlite_engine)
+
+    assert "0001_indices_filtros_producto" in applied
+    assert "0003_indices_ordenacion_producto" in applied
+    names = _index_names(sqlite_engine)
+    assert LISTING_INDEXES <= names
+    assert "ux_producto_nombre_marca" in names
+    # Una segunda pasada no vuelve a aplicar nada.
+    assert apply_migrations(sqlite_engine) == []
+
+
+@pytest.mark.parametrize("filters, sort, index_name", LISTING_PLANS)
+def test_listing_query_uses_index(catalog_engine, filters, sort, index_name):
+    with Session(catalog_engine) as db:
+        if catalog_engine.dialect.name == "postgresql":
+            # Con pocas filas una lectura secuencial siempre es mas barata.
+            db.execute(text("SET LOCAL enable_seqscan = off"))
+        plan = _listing_plan(db, sort, **filters)
+
+    assert index_name in plan, plan
@@ -0,0 +1,69 @@
+"""Paginacion del listado de productos."""
+
+from typing import List
+
+import pytest
+
+from app import crud
+
+
+def _cursor_ids(client, **params) -> List[int]:
+    """Recorre todas las paginas con cursor y devuelve los ids en orden."""
+
+    ids: List[int] = []
+    cursor = ""
+    while cursor is not None:
+        response = client.get("/products", params={**params, "cursor": cursor})
+        assert response.status_code == 200, response.text
+        page = response.json()
+        ids.extend(product["id"] for product in page["items"])
+        cursor = page["next_cursor"]
+    return ids
+
+
+def test_search_with_cursor_returns_every_match_once(client, make_product):
+    # La relevancia (nombre pesa mas que descripcion) no sigue el orden de id.
+    for number in range(1, 11):
+        if number % 2:
+            make_product(nombre=f"Camiseta {number}", descripcion="Para trail")
+        else:
+            make_product(nombre=f"Zapatilla trail {number}")
+    make_product(nombre="Balon", descripcion="Futbol")
+
+    matches = client.get("/products", params={"search": "trail", "limit": 100}).json()
+    paged = _cursor_ids(client, search="trail", limit=3)
+
+    assert len(paged) == len(set(paged))
+    assert sorted(paged) == sorted(product["id"] for product in matches)
+    assert paged == sorted(paged)
+
+
+def _offset_ids(client, **params) -> List[int]:
+    """Recorre todas las paginas con skip/limit y devuelve los ids en orden."""
+
+    ids: List[int] = []
+    while True:
+        response = client.get("/products", params={**params, "skip": len(ids)})
+        assert response.status_code == 200, response.text
+        page = response.json()
+        if not page:
+            return ids
+        ids.extend(product["id"] for product in page)
+
+
+@pytest.mark.parametrize("sort", crud.SORT_OPTIONS)
+def test_cursor_traversal_matches_offset_pages(client, make_product, sort):
+    # Empates de precio, stock y nombre (con distinta marca) para probar el desempate por id.
+    for number in range(23):
+        make_product(
+            nombre=f"Producto {number % 8}",
+            marca=f"Marca {number}",
+            precio=f"{10 + number % 4}.50",
+            stock=number % 3,
+            disponible=number % 5 != 0,
+        )
+
+    for filters in ({}, {"disponible": True}):
+        offset = _offset_ids(client, sort=sort, limit=4, **filters)
+        assert len(offset) == len(set(offset))
+        assert _cursor_ids(client, sort=sort, limit=4, **filters) == offset
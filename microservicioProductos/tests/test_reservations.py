@@ -0,0 +1,61 @@
+"""Reservas de stock concurrentes."""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app import crud, models
+from app.database import Base
+from app.migrations import apply_migrations, migration_metadata
+
+PARALLEL_RESERVATIONS = 16
+
+
+def test_parallel_reservations_sell_the_last_unit_once(client, make_product):
+    product = make_product(nombre="Ultima unidad", stock=1)
+    payload = {"items": [{"id": product["id"], "cantidad": 1}]}
+
+    with ThreadPoolExecutor(PARALLEL_RESERVATIONS) as pool:
+        responses = list(
+            pool.map(
+                lambda _: client.post("/products/reservations", json=payload),
+                range(PARALLEL_RESERVATIONS),
+            )
+        )
+
+    statuses = sorted(response.status_code for response in responses)
+    assert statuses == [201] + [409] * (PARALLEL_RESERVATIONS - 1)
+    assert client.get(f"/products/{product['id']}").json()["stock"] == 0
+
+
+def test_parallel_reservations_on_postgresql():
+    url = os.environ.get("PRODUCTS_TEST_DATABASE_URL")
+    if not url:
+        pytest.skip("PRODUCTS_TEST_DATABASE_URL no definida")
+    engine = create_engine(url, pool_size=PARALLEL_RESERVATIONS)
+    apply_migrations(engine)
+    try:
+        with Session(engine) as db:
+            product = models.Product(nombre="Ultima unidad", precio=10, stock=1)
+            db.add(product)
+            db.commit()
+            product_id = product.id
+
+        def reserve(_):
+            with Session(engine) as db:
+                reservation, _ = crud.reserve_stock(db, {product_id: 1}, ttl_seconds=60)
+                return reservation is not None
+
+        with ThreadPoolExecutor(PARALLEL_RESERVATIONS) as pool:
+            results = list(pool.map(reserve, range(PARALLEL_RESERVATIONS)))
+
+        assert results.count(True) == 1
+        with Session(engine) as db:
+            assert db.get(models.Product, product_id).stock == 0
+    finally:
+        Base.metadata.drop_all(bind=engine)
+        migration_metadata.drop_all(bind=engine)
+        engine.dispose()
@@ -0,0 +1,91 @@
+"""JSON precalculado de productos frente a la serializacion de Pydantic."""
+
+import json
+from decimal import Decimal
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+
+from app import models, schemas, serialization
+
+PRODUCTS = [
+    models.Product(
+        id=1,
+        version=1,
+        nombre="Camiseta tecnica ñandu «pro»",
+        categoria="ropa",
+        deporte="running",
+        color="azul",
+        marca="Zeta",
+        precio=Decimal("19.90"),
+        stock=3,
+        descripcion='Linea 1\nLinea 2 "comillas" \\ barra',
+        imagen_url="products/ab/abcdef.png",
+        disponible=True,
+        imagen_variantes={"thumb": {"webp": "products/ab/abcdef-thumb.webp"}},
+    ),
+    models.Product(
+        id=2,
+        version=4,
+        nombre="Balon",
+        categoria=None,
+        deporte=None,
+        color=None,
+        marca=None,
+        precio=Decimal("10"),
+        stock=0,
+        descripcion=None,
+        imagen_url="https://cdn.example.com/balon.jpg",
+        disponible=False,
+        imagen_variantes=None,
+    ),
+    models.Product(
+        id=3,
+        version=2,
+        nombre="Raqueta",
+        precio=Decimal("1234567.01"),
+        stock=2_000_000_000,
+        disponible=True,
+    ),
+]
+
+
+@pytest.fixture(params=["orjson", "json"])
+def encoder(request, monkeypatch):
+    """Ejecuta la prueba con orjson y con el respaldo de la libreria estandar."""
+
+    if request.param == "orjson":
+        pytest.importorskip("orjson")
+    else:
+        monkeypatch.setattr(serialization, "orjson", None)
+    return request.param
+
+
+@pytest.mark.parametrize("product", PRODUCTS, ids=lambda product: product.nombre)
+def test_product_json_matches_pydantic(encoder, product):
+    expected = jsonable_encoder(schemas.Product.parse_obj(serialization.product_dict(product)))
+
+    serialization.forget(product.id)
+    assert json.loads(serialization.product_json(product)) == expected
+
+
+def test_orjson_and_json_produce_the_same_bytes(monkeypatch):
+    pytest.importorskip("orjson")
+    values = [serialization.product_dict(product) for product in PRODUCTS]
+
+    fast = [serialization.dumps(value) for value in values]
+    monkeypatch.setattr(serialization, "orjson", None)
+    standard = [serialization.dumps(value) for value in values]
+
+    assert fast == standard
+
+
+def test_listing_json_matches_the_serialized_products(client, make_product):
+    created = [
+        make_product(nombre="Mochila", precio="35.50", stock=4, marca="Alfa"),
+        make_product(nombre="Guantes", precio="12", stock=0, categoria="accesorios"),
+    ]
+
+    listing = client.get("/products", params={"sort": "id"}).json()
+
+    assert listing == created
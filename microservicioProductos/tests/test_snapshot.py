@@ -0,0 +1,97 @@
+"""La instantanea columnar devuelve las mismas filas que la consulta SQL."""
+
+from decimal import Decimal
+from typing import List, Optional
+
+import pytest
+
+from app import crud, models, snapshot
+from app.database import SessionLocal
+
+pytest.importorskip("numpy")
+
+FILTERS = [
+    {},
+    {"categoria": "ropa"},
+    {"deporte": "running", "disponible": True},
+    {"marca": "Alfa", "precio_min": Decimal("10.50")},
+    {"precio_min": Decimal("5"), "precio_max": Decimal("20.25"), "disponible": False},
+    {"categoria": "inexistente"},
+]
+
+
+@pytest.fixture
+def catalog(client):
+    """Catalogo con empates de precio y stock, nulos y productos no disponibles."""
+
+    categories = ["ropa", "calzado", None]
+    sports = ["running", "futbol", "tenis", None]
+    with SessionLocal() as db:
+        for number in range(60):
+            db.add(
+                models.Product(
+                    nombre=f"Producto {number:02d}",
+                    categoria=categories[number % 3],
+                    deporte=sports[number % 4],
+                    marca="Alfa" if number % 5 else "Beta",
+                    precio=Decimal("5.00") + Decimal("0.75") * (number % 23),
+                    stock=number % 7,
+                    disponible=number % 6 != 0,
+                )
+            )
+        db.commit()
+    crud._catalog_reloaded()
+
+
+def _page_ids(monkeypatch, catalog: Optional[snapshot.CatalogSnapshot], **params) -> List[int]:
+    with monkeypatch.context() as patch, SessionLocal() as db:
+        patch.setattr(snapshot, "get_snapshot", lambda: catalog)
+        return [product.id for product in crud.list_products(db, **params)]
+
+
+def _cursor_ids(monkeypatch, catalog, sort: str, filters: dict) -> List[int]:
+    ids: List[int] = []
+    after = None
+    with monkeypatch.context() as patch, SessionLocal() as db:
+        patch.setattr(snapshot, "get_snapshot", lambda: catalog)
+        while True:
+            page = crud.list_products(db, sort=sort, after=after, limit=7, **filters)
+            ids.extend(product.id for product in page)
+            if len(page) < 7:
+                return ids
+            after = crud.decode_cursor(crud.encode_cursor(page[-1], sort), sort)
+
+
+@pytest.mark.parametrize("sort", snapshot.SUPPORTED_SORTS)
+@pytest.mark.parametrize("filters", FILTERS, ids=str)
+def test_snapshot_matches_sql_with_offset(catalog, monkeypatch, sort, filters):
+    for skip in (0, 5, 40):
+        params = {"sort": sort, "skip": skip, "limit": 10, **filters}
+        in_memory = _page_ids(monkeypatch, snapshot.CatalogSnapshot(60), **params)
+        assert in_memory == _page_ids(monkeypatch, None, **params)
+
+
+@pytest.mark.parametrize("sort", snapshot.SUPPORTED_SORTS)
+@pytest.mark.parametrize("filters", FILTERS, ids=str)
+def test_snapshot_matches_sql_with_cursor(catalog, monkeypatch, sort, filters):
+    in_memory = _cursor_ids(monkeypatch, snapshot.CatalogSnapshot(60), sort, filters)
+    assert in_memory == _cursor_ids(monkeypatch, None, sort, filters)
+
+
+def test_snapshot_follows_writes_of_this_process(client, make_product, monkeypatch):
+    catalog = snapshot.CatalogSnapshot(60)
+    monkeypatch.setattr(snapshot, "get_snapshot", lambda: catalog)
+    first = make_product(nombre="Uno", precio="30", stock=2)
+    second = make_product(nombre="Dos", precio="10", stock=5)
+    assert _page_ids(monkeypatch, catalog, sort="precio") == [second["id"], first["id"]]
+
+    client.patch(f"/products/{first['id']}/stock", json={"stock": 9})
+    client.put(f"/products/{second['id']}", json={"precio": "50"})
+    third = make_product(nombre="Tres", precio="20", stock=1)
+
+    for sort in ("precio", "stock"):
+        assert _page_ids(monkeypatch, catalog, sort=sort) == _page_ids(
+            monkeypatch, None, sort=sort
+        )
+    client.delete(f"/products/{third['id']}")
+    assert catalog.query(sort="id") == [first["id"], second["id"]]
@@ -127,8 +127,8 @@ function setupSearchSuggestions(input) {
 
   async function fetchSuggestions(term) {
     try {
-      const payload = await apiRequest(`/products${buildQueryString({
-        search: term,
+      const payload = await apiRequest(`/products/suggest${buildQueryString({
+        q: term,
         limit: 5,
       })}`);
       const products = payload?.data || payload || [];
@@ -683,76 +683,88 @@ function renderUsers(users = []) {
   if (!highlightCards.length) return;
 
   const statusEl = $('#runningMessage');
-  let completed = 0;
   let failures = 0;
-  const total = highlightCards.length;
 
+  function renderCardProducts(list, products) {
+    list.innerHTML = '';
+    if (!products.length) {
+      const empty = document.createElement('li');
+      empty.textContent = 'Sin productos disponibles.';
+      list.appendChild(empty);
+      return;
+    }
+    products.forEach((product) => {
+      const li = document.createElement('li');
+      const button = document.createElement('button');
+      button.type = 'button';
+      const nameSpan = document.createElement('span');
+      nameSpan.textContent = product.nombre || 'Producto';
+      const arrowSpan = document.createElement('span');
+      arrowSpan.textContent = '→';
+      button.appendChild(nameSpan);
+      button.appendChild(arrowSpan);
+      button.addEventListener('click', () => {
+        document.dispatchEvent(new CustomEvent('sd:product-detail', {
+          detail: { id: product.id },
+        }));
+      });
+      li.appendChild(button);
+      list.appendChild(li);
+    });
+  }
+
+  function renderCardError(list) {
+    list.innerHTML = '';
+    const err = document.createElement('li');
+    err.textContent = 'Error al cargar la categoria.';
+    list.appendChild(err);
+  }
+
+  const cards = [];
   highlightCards.forEach((card) => {
     const sport = card.getAttribute('data-sport');
     const category = card.getAttribute('data-category');
     const list = card.querySelector('[data-role="highlight-links"]');
     if (!sport || !list) {
-      completed += 1;
       return;
     }
+    cards.push({ sport, category, list });
+  });
 
-    async function loadCard() {
-      try {
-        const query = buildQueryString({
-          deporte: sport,
-          categoria: category,
-          disponible: true,
+  async function loadCards() {
+    if (!cards.length) return;
+    try {
+      // Todas las tarjetas se resuelven con una sola peticion al catalogo.
+      const payload = await apiRequest('/products/groups', {
+        method: 'POST',
+        body: {
+          groups: cards.map((card, index) => ({
+            key: String(index),
+            deporte: card.sport,
+            categoria: card.category || undefined,
+            disponible: true,
+          })),
           limit: 3,
-        });
-        const payload = await apiRequest(`/products${query}`);
-        const products = payload?.data || payload || [];
-        list.innerHTML = '';
-        if (!products.length) {
-          const empty = document.createElement('li');
-          empty.textContent = 'Sin productos disponibles.';
-          list.appendChild(empty);
-          return;
-        }
-        products.forEach((product) => {
-          const li = document.createElement('li');
-          const button = document.createElement('button');
-          button.type = 'button';
-          const nameSpan = document.createElement('span');
-          nameSpan.textContent = product.nombre || 'Producto';
-          const arrowSpan = document.createElement('span');
-          arrowSpan.textContent = '→';
-          button.appendChild(nameSpan);
-          button.appendChild(arrowSpan);
-          button.addEventListener('click', () => {
-            document.dispatchEvent(new CustomEvent('sd:product-detail', {
-              detail: { id: product.id },
-            }));
-          });
-          li.appendChild(button);
-          list.appendChild(li);
-        });
-      } catch (error) {
-        list.innerHTML = '';
-        const err = document.createElement('li');
-        err.textContent = 'Error al cargar la categoria.';
-        list.appendChild(err);
-        failures += 1;
-      } finally {
-        completed += 1;
-        if (statusEl) {
-          if (completed < total) {
-            statusEl.textContent = `Sincronizando datos (${completed}/${total})...`;
-          } else if (failures) {
-            statusEl.textContent = 'Destacados cargados con incidencias.';
-          } else {
-            statusEl.textContent = 'Datos actualizados correctamente.';
-          }
-        }
+        },
+      });
+      const groups = payload?.data || payload || [];
+      cards.forEach((card, index) => {
+        const group = groups.find((item) => item.key === String(index));
+        renderCardProducts(card.list, group?.items || []);
+      });
+    } catch (error) {
+      cards.forEach((card) => renderCardError(card.list));
+      failures = cards.length;
+    } finally {
+      if (statusEl) {
+        statusEl.textContent = failures
+          ? 'Destacados cargados con incidencias.'
+          : 'Datos actualizados correctamente.';
       }
     }
+  }
 
-    loadCard();
-  });
+  loadCards();
 })();
 
 (function initHomeCatalog() {
@@ -2416,7 +2428,6 @@ function renderUsers(users = []) {
     return;
   }
 
-  const PAGE_SIZE = 100;
   const placeholderImage = 'https://images.unsplash.com/photo-1508609349937-5ec4ae374ebf?auto=format&fit=crop&w=700&q=80';
   let products = [];
   let editingProductId = null;
@@ -2725,13 +2736,23 @@ function renderUsers(users = []) {
     );
   }
 
-  function updateFiltersFromProducts() {
-    const categories = products
-      .map((product) => product?.categoria)
-      .filter(Boolean);
-    const sports = products
-      .map((product) => product?.deporte)
-      .filter(Boolean);
+  async function updateFiltersFromProducts() {
+    let categories;
+    let sports;
+    try {
+      // Las facetas se calculan en el servidor, sin recorrer el catalogo.
+      const payload = await apiRequest('/products/facets');
+      const facets = payload?.data || payload || {};
+      categories = (facets.categoria || []).map((facet) => facet.valor);
+      sports = (facets.deporte || []).map((facet) => facet.valor);
+    } catch (error) {
+      categories = products
+        .map((product) => product?.categoria)
+        .filter(Boolean);
+      sports = products
+        .map((product) => product?.deporte)
+        .filter(Boolean);
+    }
 
     syncFilterSelectOptions(categoryFilter, categories, 'Todas las categorias');
     syncFilterSelectOptions(sportFilter, sports, 'Todos los deportes');
@@ -2827,23 +2848,32 @@ function renderUsers(users = []) {
   }
 
   async function fetchAllProducts() {
-    const collected = [];
-    let skip = 0;
-
-    while (true) {
-      const payload = await apiRequest(`/products${buildQueryString({ limit: PAGE_SIZE, skip })}`);
-      const chunk = payload?.data || payload || [];
-      if (!Array.isArray(chunk) || !chunk.length) {
-        break;
-      }
-      collected.push(...chunk);
-      if (chunk.length < PAGE_SIZE) {
-        break;
-      }
-      skip += PAGE_SIZE;
-    }
-
-    return collected;
+    // Una sola peticion en streaming (NDJSON) en lugar de paginar todo el catalogo.
+    const response = await fetch(`${API_BASE}/products/export${buildQueryString({ format: 'ndjson' })}`);
+    if (!response.ok) {
+      throw new Error('No se pudo cargar la lista de productos');
+    }
+    // Cada linea se parsea segun llega: no se acumula el cuerpo completo como texto.
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    const items = [];
+    let pending = '';
+    const parseLines = (final) => {
+      const lines = pending.split('\n');
+      pending = final ? '' : lines.pop();
+      lines.forEach((line) => {
+        if (line.trim()) items.push(JSON.parse(line));
+      });
+    };
+    for (;;) {
+      const { done, value } = await reader.read();
+      if (done) break;
+      pending += decoder.decode(value, { stream: true });
+      parseLines(false);
+    }
+    pending += decoder.decode();
+    parseLines(true);
+    return items;
   }
 
   async function loadProducts() {